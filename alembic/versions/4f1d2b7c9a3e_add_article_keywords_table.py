@@ -0,0 +1,63 @@
+"""add article_keywords table and category index
+
+Revision ID: 4f1d2b7c9a3e
+Revises: c574fa5f9cd6
+Create Date: 2026-10-16 12:20:41.318207
+
+"""
+from typing import Sequence, Union
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f1d2b7c9a3e'
+down_revision: Union[str, Sequence[str], None] = 'c574fa5f9cd6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    article_keywords = op.create_table('article_keywords',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('article_id', sa.Integer(), nullable=False, comment='文章ID'),
+    sa.Column('keyword', sa.String(length=100), nullable=False, comment='归一化关键词（小写）'),
+    sa.ForeignKeyConstraint(['article_id'], ['articles.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('keyword', 'article_id', name='uq_article_keywords_keyword_article')
+    )
+    op.create_index(op.f('ix_article_keywords_id'), 'article_keywords', ['id'], unique=False)
+    op.create_index(op.f('ix_article_keywords_article_id'), 'article_keywords', ['article_id'], unique=False)
+    op.create_index('ix_articles_user_category', 'articles', ['user_id', 'category'], unique=False)
+
+    # 回填：把 articles.keywords 中已有的JSON关键词展开为行
+    conn = op.get_bind()
+    rows = []
+    for article_id, keywords in conn.execute(
+            sa.text("SELECT id, keywords FROM articles WHERE keywords IS NOT NULL AND keywords <> ''")
+    ):
+        try:
+            values = json.loads(keywords)
+        except ValueError:
+            continue
+        if not isinstance(values, list):
+            continue
+        seen = set()
+        for value in values:
+            keyword = ' '.join(str(value).split()).lower()[:100]
+            if keyword and keyword not in seen:
+                seen.add(keyword)
+                rows.append({'article_id': article_id, 'keyword': keyword})
+    if rows:
+        op.bulk_insert(article_keywords, rows)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_articles_user_category', table_name='articles')
+    op.drop_index(op.f('ix_article_keywords_article_id'), table_name='article_keywords')
+    op.drop_index(op.f('ix_article_keywords_id'), table_name='article_keywords')
+    op.drop_table('article_keywords')
@@ -0,0 +1,99 @@
+"""add term vector to articles
+
+Revision ID: 5c2d8e1f7a94
+Revises: e2a7c41b8d05
+Create Date: 2026-10-16 14:32:07.418263
+
+"""
+from typing import Dict, Sequence, Union
+import heapq
+import json
+import re
+import zlib
+
+from alembic import op
+from bs4 import BeautifulSoup
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2d8e1f7a94'
+down_revision: Union[str, Sequence[str], None] = 'e2a7c41b8d05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+# 以下分词与散列逻辑为本次迁移时的快照，不随应用代码变化
+MAX_CHARS = 20000
+HASH_FEATURES = 2 ** 18
+MAX_TERMS = 64
+
+_HAN = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+_CJK_RE = re.compile(r'[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]')
+_SEARCH_RUN_RE = re.compile(rf'[{_HAN}]+|[^\W_{_HAN}]+')
+
+
+def _html_to_text(content: str) -> str:
+    if not content:
+        return ""
+    if '<' in content and '>' in content:
+        content = BeautifulSoup(content, 'html.parser').get_text(separator=' ', strip=True)
+    return re.sub(r'\s+', ' ', content).strip()
+
+
+def _tokens(text: str):
+    """汉字段切为重叠的二元组（单字保留单字），其他词转小写"""
+    for match in _SEARCH_RUN_RE.finditer(text or ''):
+        run = match.group()
+        if _CJK_RE.match(run[0]):
+            yield from ([run[i:i + 2] for i in range(len(run) - 1)] if len(run) > 1 else [run])
+        else:
+            yield run.lower()
+
+
+def _term_vector(title: str, summary: str, content: str) -> str:
+    """哈希词频向量JSON：标题词计2次，正文取前MAX_CHARS字，只保留词频最高的MAX_TERMS项"""
+    body = f"{summary or ''} {_html_to_text(content or '')}"[:MAX_CHARS]
+    counts: Dict[int, int] = {}
+    for text, weight in ((title or '', 2), (body, 1)):
+        for token in _tokens(text):
+            bucket = zlib.crc32(token.encode()) % HASH_FEATURES
+            counts[bucket] = counts.get(bucket, 0) + weight
+    top = heapq.nlargest(MAX_TERMS, counts.items(), key=lambda item: item[1])
+    return json.dumps({str(bucket): count for bucket, count in sorted(top)})
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('articles', sa.Column('term_vector', sa.Text(), nullable=True, comment='哈希词频向量JSON（内容推荐用）'))
+
+    # 回填词频向量（按主键分批）
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text(
+                "SELECT id, title, summary, content FROM articles "
+                "WHERE id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BACKFILL_BATCH_SIZE}
+        ).fetchall()
+        if not rows:
+            break
+        conn.execute(
+            sa.text("UPDATE articles SET term_vector = :term_vector WHERE id = :id"),
+            [
+                {
+                    "id": row.id,
+                    "term_vector": _term_vector(row.title, row.summary, row.content),
+                }
+                for row in rows
+            ]
+        )
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('articles', 'term_vector')
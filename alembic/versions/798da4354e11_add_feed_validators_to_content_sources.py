@@ -0,0 +1,33 @@
+"""add feed validators to content sources
+
+Revision ID: 798da4354e11
+Revises: 2ec61f38a5be
+Create Date: 2026-10-16 09:12:41.208113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '798da4354e11'
+down_revision: Union[str, Sequence[str], None] = '2ec61f38a5be'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 条件请求所需的校验信息
+    op.add_column('content_sources', sa.Column('feed_etag', sa.String(length=255), nullable=True))
+    op.add_column('content_sources', sa.Column('feed_last_modified', sa.String(length=100), nullable=True))
+    op.add_column('content_sources', sa.Column('feed_content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('content_sources', 'feed_content_hash')
+    op.drop_column('content_sources', 'feed_last_modified')
+    op.drop_column('content_sources', 'feed_etag')
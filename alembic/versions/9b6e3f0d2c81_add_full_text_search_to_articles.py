@@ -0,0 +1,140 @@
+"""add full text search to articles
+
+Revision ID: 9b6e3f0d2c81
+Revises: 4f1d2b7c9a3e
+Create Date: 2026-10-16 13:05:12.774120
+
+"""
+from typing import Dict, List, Sequence, Union
+import re
+
+from alembic import op
+from bs4 import BeautifulSoup
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b6e3f0d2c81'
+down_revision: Union[str, Sequence[str], None] = '4f1d2b7c9a3e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+# 以下分词逻辑与DDL为本次迁移时的快照，不随应用代码变化
+SEARCH_INDEX_MAX_CHARS = 20000
+
+_HAN = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+_CJK_RE = re.compile(r'[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]')
+_SEARCH_RUN_RE = re.compile(rf'[{_HAN}]+|[^\W_{_HAN}]+')
+
+POSTGRES_SEARCH_DDL = [
+    """
+    ALTER TABLE articles ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(search_title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(search_body, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX ix_articles_search_vector ON articles USING GIN (search_vector)",
+]
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE articles_fts USING fts5(
+        search_title, search_body, content='articles', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER articles_fts_ai AFTER INSERT ON articles BEGIN
+        INSERT INTO articles_fts(rowid, search_title, search_body)
+        VALUES (new.id, new.search_title, new.search_body);
+    END
+    """,
+    """
+    CREATE TRIGGER articles_fts_ad AFTER DELETE ON articles BEGIN
+        INSERT INTO articles_fts(articles_fts, rowid, search_title, search_body)
+        VALUES ('delete', old.id, old.search_title, old.search_body);
+    END
+    """,
+    """
+    CREATE TRIGGER articles_fts_au AFTER UPDATE OF search_title, search_body ON articles BEGIN
+        INSERT INTO articles_fts(articles_fts, rowid, search_title, search_body)
+        VALUES ('delete', old.id, old.search_title, old.search_body);
+        INSERT INTO articles_fts(rowid, search_title, search_body)
+        VALUES (new.id, new.search_title, new.search_body);
+    END
+    """,
+]
+
+
+def _html_to_text(content: str) -> str:
+    if not content:
+        return ""
+    if '<' in content and '>' in content:
+        content = BeautifulSoup(content, 'html.parser').get_text(separator=' ', strip=True)
+    return re.sub(r'\s+', ' ', content).strip()
+
+
+def _search_tokens(text: str) -> str:
+    """汉字段切为重叠的二元组（单字保留单字），其他词转小写，以空格连接"""
+    tokens: List[str] = []
+    for match in _SEARCH_RUN_RE.finditer(text or ''):
+        run = match.group()
+        if _CJK_RE.match(run[0]):
+            tokens.extend([run[i:i + 2] for i in range(len(run) - 1)] if len(run) > 1 else [run])
+        else:
+            tokens.append(run.lower())
+    return ' '.join(tokens)
+
+
+def _search_fields(title: str, summary: str, content: str) -> Dict[str, str]:
+    body = f"{summary or ''} {_html_to_text(content or '')}"[:SEARCH_INDEX_MAX_CHARS]
+    return {"search_title": _search_tokens(title or ''), "search_body": _search_tokens(body)}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('articles', sa.Column('search_title', sa.Text(), nullable=True, comment='分词后的标题（全文检索用）'))
+    op.add_column('articles', sa.Column('search_body', sa.Text(), nullable=True, comment='分词后的摘要与正文（全文检索用）'))
+
+    # 回填检索列（分词在应用层完成，按主键分批）
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text(
+                "SELECT id, title, summary, content FROM articles "
+                "WHERE id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BACKFILL_BATCH_SIZE}
+        ).fetchall()
+        if not rows:
+            break
+        conn.execute(
+            sa.text("UPDATE articles SET search_title = :search_title, search_body = :search_body WHERE id = :id"),
+            [
+                {"id": row.id, **_search_fields(row.title, row.summary, row.content)}
+                for row in rows
+            ]
+        )
+        last_id = rows[-1].id
+
+    dialect = conn.dialect.name
+    statements = {"postgresql": POSTGRES_SEARCH_DDL, "sqlite": SQLITE_SEARCH_DDL}.get(dialect, [])
+    for statement in statements:
+        op.execute(statement)
+    if dialect == "sqlite":
+        op.execute("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_articles_search_vector")
+        op.drop_column('articles', 'search_vector')
+    elif dialect == "sqlite":
+        for trigger in ("articles_fts_ai", "articles_fts_ad", "articles_fts_au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS articles_fts")
+    op.drop_column('articles', 'search_body')
+    op.drop_column('articles', 'search_title')
@@ -0,0 +1,220 @@
+"""add near duplicate detection to articles
+
+Revision ID: b7e4f2a9c610
+Revises: 5c2d8e1f7a94
+Create Date: 2026-10-16 15:20:44.905127
+
+"""
+from collections import Counter
+from typing import Dict, Iterable, Optional, Sequence, Union
+import hashlib
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from alembic import op
+from bs4 import BeautifulSoup
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e4f2a9c610'
+down_revision: Union[str, Sequence[str], None] = '5c2d8e1f7a94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+# 以下分词与SimHash逻辑为本次迁移时的快照，不随应用代码变化
+MAX_CHARS = 20000
+MIN_TOKENS = 30
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 4
+SIMHASH_BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+
+_HAN = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+_CJK_RE = re.compile(r'[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]')
+_SEARCH_RUN_RE = re.compile(rf'[{_HAN}]+|[^\W_{_HAN}]+')
+
+
+def _html_to_text(content: str) -> str:
+    if not content:
+        return ""
+    if '<' in content and '>' in content:
+        content = BeautifulSoup(content, 'html.parser').get_text(separator=' ', strip=True)
+    return re.sub(r'\s+', ' ', content).strip()
+
+
+def _tokens(text: str):
+    """汉字段切为重叠的二元组（单字保留单字），其他词转小写"""
+    for match in _SEARCH_RUN_RE.finditer(text or ''):
+        run = match.group()
+        if _CJK_RE.match(run[0]):
+            yield from ([run[i:i + 2] for i in range(len(run) - 1)] if len(run) > 1 else [run])
+        else:
+            yield run.lower()
+
+
+def _simhash(tokens: Iterable[str]) -> int:
+    totals = [0] * SIMHASH_BITS
+    for token, weight in Counter(tokens).items():
+        value = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), 'big')
+        for bit in range(SIMHASH_BITS):
+            totals[bit] += weight if value >> bit & 1 else -weight
+    return sum(1 << bit for bit, total in enumerate(totals) if total > 0)
+
+
+def _simhash_fields(title: str, content: str) -> Dict[str, Optional[int]]:
+    """SimHash（按有符号64位存储）及4个16位分段；分词少于MIN_TOKENS的短文本不计算"""
+    text = f"{title or ''} {_html_to_text(content or '')}"[:MAX_CHARS]
+    tokens = list(_tokens(text))
+    if len(tokens) < MIN_TOKENS:
+        return {"simhash": None, **{f"simhash_b{i}": None for i in range(SIMHASH_BANDS)}}
+    value = _simhash(tokens)
+    mask = (1 << SIMHASH_BAND_BITS) - 1
+    return {
+        "simhash": value - (1 << SIMHASH_BITS) if value >= 1 << (SIMHASH_BITS - 1) else value,
+        **{f"simhash_b{i}": value >> (SIMHASH_BAND_BITS * i) & mask for i in range(SIMHASH_BANDS)},
+    }
+
+
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid",
+    "mc_cid", "mc_eid", "_hsenc", "_hsmi", "spm", "share_source",
+}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def _canonicalize_url(url: str) -> str:
+    """scheme与主机名小写、去掉默认端口、片段、跟踪参数与路径末尾的斜杠，其余查询参数排序"""
+    url = (url or '').strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return url
+
+    netloc = parts.hostname.lower()
+    if port and port != DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{port}"
+    path = parts.path.rstrip('/') or '/'
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ))
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+
+def _backfill_canonical_urls(conn) -> None:
+    """为历史文章填写规范URL（原始链接 url 保持不变）
+
+    同一用户规范URL相同的多篇文章合并到ID最小的一行（任一行已读则保留已读），删除多余的行；
+    不同用户的文章互不影响
+    """
+    urls_in = sa.bindparam('urls', expanding=True)
+    ids_in = sa.bindparam('ids', expanding=True)
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text("SELECT id, user_id, url, is_read FROM articles WHERE id > :last_id ORDER BY id LIMIT :limit"),
+            {"last_id": last_id, "limit": BACKFILL_BATCH_SIZE}
+        ).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        canonical = {row.id: _canonicalize_url(row.url) for row in rows}
+
+        # 之前批次中已填写规范URL的文章（ID更小）优先保留
+        owners = {
+            (owner.user_id, owner.canonical_url): owner.id for owner in conn.execute(
+                sa.text("SELECT id, user_id, canonical_url FROM articles WHERE canonical_url IN :urls").bindparams(urls_in),
+                {"urls": list(set(canonical.values()))}
+            )
+        }
+        updates, merged, read_targets = [], [], set()
+        for row in rows:
+            key = (row.user_id, canonical[row.id])
+            target = owners.get(key)
+            if target is None:
+                owners[key] = row.id
+                updates.append({"id": row.id, "canonical_url": key[1]})
+            else:
+                merged.append(row.id)
+                if row.is_read:
+                    read_targets.add(target)
+
+        if merged:
+            conn.execute(sa.text("DELETE FROM article_keywords WHERE article_id IN :ids").bindparams(ids_in), {"ids": merged})
+            conn.execute(sa.text("DELETE FROM articles WHERE id IN :ids").bindparams(ids_in), {"ids": merged})
+        if updates:
+            conn.execute(sa.text("UPDATE articles SET canonical_url = :canonical_url WHERE id = :id"), updates)
+        if read_targets:
+            conn.execute(
+                sa.text("UPDATE articles SET is_read = :is_read WHERE id IN :ids").bindparams(ids_in),
+                {"is_read": True, "ids": list(read_targets)}
+            )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('articles', sa.Column('simhash', sa.BigInteger(), nullable=True, comment='标题与正文的64位SimHash'))
+    for band in range(SIMHASH_BANDS):
+        op.add_column('articles', sa.Column(f'simhash_b{band}', sa.Integer(), nullable=True, comment=f'SimHash第{band}段（16位）'))
+    op.add_column('articles', sa.Column('duplicate_of', sa.Integer(), nullable=True, comment='近似重复时指向同簇最早的文章'))
+    op.create_foreign_key(
+        'articles_duplicate_of_fkey', 'articles', 'articles', ['duplicate_of'], ['id'], ondelete='SET NULL'
+    )
+    op.create_index(op.f('ix_articles_duplicate_of'), 'articles', ['duplicate_of'], unique=False)
+
+    # 入库去重与查询改用规范URL，先为历史文章填写，避免它们被当作新文章重新抓取
+    op.add_column('articles', sa.Column('canonical_url', sa.String(length=500), nullable=True, comment='规范化后的URL（去重用）'))
+    conn = op.get_bind()
+    _backfill_canonical_urls(conn)
+    op.alter_column('articles', 'canonical_url', existing_type=sa.String(length=500), nullable=False)
+    op.create_unique_constraint('uq_articles_user_canonical_url', 'articles', ['user_id', 'canonical_url'])
+
+    # 回填SimHash（历史文章不做重复归并，只让新文章能匹配到它们）
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text(
+                "SELECT id, title, content FROM articles "
+                "WHERE id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BACKFILL_BATCH_SIZE}
+        ).fetchall()
+        if not rows:
+            break
+        conn.execute(
+            sa.text(
+                "UPDATE articles SET simhash = :simhash, simhash_b0 = :simhash_b0, simhash_b1 = :simhash_b1, "
+                "simhash_b2 = :simhash_b2, simhash_b3 = :simhash_b3 WHERE id = :id"
+            ),
+            [
+                {
+                    "id": row.id,
+                    **_simhash_fields(row.title, row.content),
+                }
+                for row in rows
+            ]
+        )
+        last_id = rows[-1].id
+
+    for band in range(SIMHASH_BANDS):
+        op.create_index(f'ix_articles_user_simhash_b{band}', 'articles', ['user_id', f'simhash_b{band}'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_articles_user_canonical_url', 'articles', type_='unique')
+    op.drop_column('articles', 'canonical_url')
+    for band in range(SIMHASH_BANDS):
+        op.drop_index(f'ix_articles_user_simhash_b{band}', table_name='articles')
+    op.drop_index(op.f('ix_articles_duplicate_of'), table_name='articles')
+    op.drop_constraint('articles_duplicate_of_fkey', 'articles', type_='foreignkey')
+    op.drop_column('articles', 'duplicate_of')
+    for band in range(SIMHASH_BANDS):
+        op.drop_column('articles', f'simhash_b{band}')
+    op.drop_column('articles', 'simhash')
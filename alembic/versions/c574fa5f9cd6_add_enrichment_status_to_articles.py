@@ -0,0 +1,32 @@
+"""add enrichment status to articles
+
+Revision ID: c574fa5f9cd6
+Revises: 798da4354e11
+Create Date: 2026-10-16 11:03:27.551920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c574fa5f9cd6'
+down_revision: Union[str, Sequence[str], None] = '798da4354e11'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 已有文章在抓取时已同步富化，标记为done
+    op.add_column('articles', sa.Column('enrichment_status', sa.String(length=20), nullable=True, server_default='done'))
+    op.alter_column('articles', 'enrichment_status', server_default=None)
+    op.create_index(op.f('ix_articles_enrichment_status'), 'articles', ['enrichment_status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_articles_enrichment_status'), table_name='articles')
+    op.drop_column('articles', 'enrichment_status')
@@ -0,0 +1,135 @@
+"""add shared documents
+
+Revision ID: d41a9e6c3f58
+Revises: b7e4f2a9c610
+Create Date: 2026-10-16 16:05:37.261904
+
+"""
+from typing import Sequence, Union
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41a9e6c3f58'
+down_revision: Union[str, Sequence[str], None] = 'b7e4f2a9c610'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'documents',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('url', sa.String(length=500), nullable=False, comment='规范化后的文章URL'),
+        sa.Column('title', sa.String(length=500), nullable=False),
+        sa.Column('content', sa.Text(), nullable=True, comment='抓取到的正文HTML'),
+        sa.Column('content_hash', sa.String(length=64), nullable=True, comment='正文SHA256'),
+        sa.Column('author', sa.String(length=100), nullable=True, comment='作者'),
+        sa.Column('published_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('images', sa.Text(), nullable=True, comment='图片URL列表（JSON格式）'),
+        sa.Column('summary', sa.Text(), nullable=True, comment='AI摘要'),
+        sa.Column('keywords', sa.Text(), nullable=True, comment='关键词JSON数组'),
+        sa.Column('category', sa.String(length=100), nullable=True, comment='文章分类'),
+        sa.Column('enrichment_status', sa.String(length=20), nullable=True, comment='AI富化状态：pending, done'),
+        sa.Column('crawled_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True, comment='最后抓取时间'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('url')
+    )
+    op.create_index(op.f('ix_documents_id'), 'documents', ['id'], unique=False)
+
+    op.add_column('articles', sa.Column('document_id', sa.Integer(), nullable=True, comment='共享文档ID'))
+    op.create_foreign_key(
+        'articles_document_id_fkey', 'articles', 'documents', ['document_id'], ['id'], ondelete='SET NULL'
+    )
+    op.create_index(op.f('ix_articles_document_id'), 'articles', ['document_id'], unique=False)
+
+    # 文章URL不再全局唯一（由 uq_articles_user_canonical_url 保证每个用户一行）；
+    # 内容源URL改为每个用户唯一（不同用户可以订阅同一个源）
+    op.drop_index(op.f('ix_articles_url'), table_name='articles')
+    op.execute('ALTER TABLE articles DROP CONSTRAINT IF EXISTS articles_url_key')
+    op.create_index(op.f('ix_articles_url'), 'articles', ['url'], unique=False)
+    op.execute('ALTER TABLE content_sources DROP CONSTRAINT IF EXISTS content_sources_url_key')
+    op.create_unique_constraint('uq_content_sources_user_url', 'content_sources', ['user_id', 'url'])
+
+    # 由已有正文的文章回填共享文档（按规范URL合并），并关联 document_id。
+    # 历史文章的正文可能是抓取失败时回退的RSS摘录，无法确认来自网页抓取，
+    # 因此 crawled_at 留空：其他用户复用前会先重新抓取一次，富化结果仍可直接共享
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text(
+                "SELECT id, canonical_url, title, content, author, published_at, images, summary, keywords, category, "
+                "enrichment_status FROM articles "
+                "WHERE id > :last_id AND content IS NOT NULL AND content != '' ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BACKFILL_BATCH_SIZE}
+        ).fetchall()
+        if not rows:
+            break
+
+        urls = {row.id: row.canonical_url for row in rows}
+        existing = dict(conn.execute(
+            sa.text("SELECT url, id FROM documents WHERE url IN :urls").bindparams(sa.bindparam('urls', expanding=True)),
+            {"urls": list(set(urls.values()))}
+        ).fetchall())
+        new_documents = {}
+        for row in rows:
+            url = urls[row.id]
+            if url in existing or url in new_documents:
+                continue
+            done = row.enrichment_status == 'done'
+            new_documents[url] = {
+                "url": url,
+                "title": row.title,
+                "content": row.content,
+                "content_hash": hashlib.sha256(row.content.encode()).hexdigest(),
+                "author": row.author,
+                "published_at": row.published_at,
+                "images": row.images,
+                "summary": row.summary if done else None,
+                "keywords": row.keywords if done else None,
+                "category": row.category if done else None,
+                "enrichment_status": 'done' if done else 'pending',
+                "crawled_at": None,
+            }
+        if new_documents:
+            conn.execute(
+                sa.text(
+                    "INSERT INTO documents (url, title, content, content_hash, author, published_at, images, "
+                    "summary, keywords, category, enrichment_status, crawled_at) VALUES (:url, :title, :content, "
+                    ":content_hash, :author, :published_at, :images, :summary, :keywords, :category, "
+                    ":enrichment_status, :crawled_at)"
+                ),
+                list(new_documents.values())
+            )
+            existing.update(conn.execute(
+                sa.text("SELECT url, id FROM documents WHERE url IN :urls").bindparams(sa.bindparam('urls', expanding=True)),
+                {"urls": list(new_documents)}
+            ).fetchall())
+        conn.execute(
+            sa.text("UPDATE articles SET document_id = :document_id WHERE id = :id"),
+            [{"id": row.id, "document_id": existing[urls[row.id]]} for row in rows]
+        )
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_content_sources_user_url', 'content_sources', type_='unique')
+    op.create_unique_constraint('content_sources_url_key', 'content_sources', ['url'])
+    op.drop_index(op.f('ix_articles_url'), table_name='articles')
+    op.create_index(op.f('ix_articles_url'), 'articles', ['url'], unique=True)
+    op.drop_index(op.f('ix_articles_document_id'), table_name='articles')
+    op.drop_constraint('articles_document_id_fkey', 'articles', type_='foreignkey')
+    op.drop_column('articles', 'document_id')
+    op.drop_index(op.f('ix_documents_id'), table_name='documents')
+    op.drop_table('documents')
@@ -0,0 +1,33 @@
+"""add article list pagination index
+
+Revision ID: e2a7c41b8d05
+Revises: 9b6e3f0d2c81
+Create Date: 2026-10-16 13:48:30.102554
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a7c41b8d05'
+down_revision: Union[str, Sequence[str], None] = '9b6e3f0d2c81'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_articles_user_created_id',
+        'articles',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_articles_user_created_id', table_name='articles')
@@ -9,6 +9,13 @@ class Settings(BaseSettings):
     db_host: str
     db_port: int
 
+    # 连接池配置（同步与异步引擎各自一个池，按此配置）
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+
     redis_url: str
 
     # OpenAI配置
@@ -19,6 +26,101 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
 
+    # 浏览器池配置
+    browser_headless: bool = True
+    browser_pool_size: int = 4
+    browser_context_max_pages: int = 50
+
+    # 抓取并发配置
+    crawl_max_concurrency: int = 8
+    crawl_per_domain_concurrency: int = 2
+
+    # 分层抓取配置（先HTTP静态解析，质量不足再用浏览器）
+    static_fetch_timeout: float = 15.0
+    static_min_score: float = 0.5
+
+    # 已入库文章的重新抓取策略：超过N天重新抓取全文，0表示只在RSS条目updated变化时重新抓取
+    article_refresh_days: int = 0
+
+    # 调度配置：按内容源fetch_frequency调度，无新文章时指数退避
+    scheduler_tick_seconds: int = 30
+    scheduler_sync_seconds: int = 300
+    scheduler_max_concurrency: int = 4
+    scheduler_max_backoff: int = 8
+
+    # 发布节奏学习：对最近N篇文章的发布间隔做EWMA，结果限制在[min, max]分钟内
+    cadence_history_size: int = 20
+    cadence_min_samples: int = 3
+    cadence_alpha: float = 0.3
+    cadence_min_minutes: float = 10
+    cadence_max_minutes: float = 1440
+
+    # AI响应缓存：memory（进程内LRU）、redis（使用redis_url）、none
+    ai_cache_backend: str = "memory"
+    ai_cache_ttl_seconds: int = 7 * 24 * 3600
+    ai_cache_max_entries: int = 10000
+
+    # 大模型输入预算（估算token）：超过摘要预算的长文分块摘要后再合并
+    ai_summary_token_budget: int = 6000
+    ai_analysis_token_budget: int = 2000
+    ai_chunk_tokens: int = 3000
+    ai_max_chunks: int = 12
+    ai_map_concurrency: int = 3
+
+    # 大模型客户端：限流（每分钟请求数/令牌数）、并发、重试与熔断
+    llm_requests_per_minute: int = 60
+    llm_tokens_per_minute: int = 120000
+    llm_output_token_reserve: int = 800
+    llm_max_concurrency: int = 4
+    llm_max_retries: int = 3
+    llm_backoff_base: float = 1.0
+    llm_backoff_max: float = 30.0
+    llm_timeout: float = 60.0
+    llm_breaker_failure_threshold: int = 5
+    llm_breaker_reset_seconds: float = 60.0
+
+    # 全文检索：每篇文章建索引的摘要+正文最大字符数；列表高亮只读取正文前若干字符
+    search_index_max_chars: int = 20000
+    search_snippet_source_chars: int = 4000
+
+    # 文章列表总数（X-Total-Count）缓存秒数
+    article_count_cache_seconds: int = 60
+
+    # 当前用户缓存：memory（进程内）、redis（多worker共享）、none；
+    # auth_trust_token_claims 开启后直接使用令牌中的 uid/adm，不再查询用户（禁用用户在令牌过期后才失效）
+    user_cache_backend: str = "memory"
+    user_cache_ttl_seconds: int = 60
+    auth_trust_token_claims: bool = False
+
+    # 内容推荐：哈希TF-IDF向量维数与每篇文章保留的词项数
+    recommend_hash_features: int = 2 ** 18
+    recommend_max_terms: int = 64
+    # 时间衰减半衰期（小时）、内容源分类偏好权重、用户画像取最近已读文章数
+    recommend_half_life_hours: float = 72.0
+    recommend_category_weight: float = 0.2
+    recommend_profile_size: int = 200
+    # 进程内缓存词频矩阵的用户数上限
+    recommend_cache_users: int = 64
+
+    # 近似重复检测：SimHash 海明距离阈值（不超过3时保证至少一个16位分段相同）与参与计算的最少词数
+    dedup_max_distance: int = 3
+    dedup_min_tokens: int = 30
+
+    # 相关文章向量索引：存储目录、向量维数、参与嵌入的正文字数
+    embedding_index_dir: str = "data/embeddings"
+    embedding_dim: int = 256
+    embedding_max_chars: int = 2000
+    # 分片有效行数达到阈值后训练IVF聚类；查询时探查的聚类数；同时打开的分片数上限
+    embedding_ivf_min_rows: int = 4096
+    embedding_ivf_nprobe: int = 8
+    embedding_open_shards: int = 64
+
+    # 解析线程池大小（RSS解析、HTML解析与文本提取）
+    parse_pool_size: int = 4
+
+    # AI富化队列并发数
+    enrichment_concurrency: int = 2
+
     # 应用配置
     app_name: str = "智能内容聚合平台"
     debug: bool = False
@@ -29,5 +131,9 @@ class Settings(BaseSettings):
     def database_url(self) -> str:
         return f"postgresql://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name}"
 
+    @property
+    def async_database_url(self) -> str:
+        return f"postgresql+asyncpg://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name}"
+
 
 settings = Settings()
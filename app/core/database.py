@@ -1,14 +1,30 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
 
-#数据库引擎
-engine = create_engine(settings.database_url)
+#连接池参数
+pool_options = dict(
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=settings.db_pool_pre_ping,
+)
+
+#数据库引擎（同步：调度器、富化队列、迁移等后台任务使用）
+engine = create_engine(settings.database_url, **pool_options)
+
+#异步数据库引擎（asyncpg：路由使用，等待数据库时不阻塞事件循环）
+async_engine = create_async_engine(settings.async_database_url, **pool_options)
 
 #会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+#异步会话工厂（提交后不过期对象，避免在响应序列化时触发隐式IO）
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 #基础模型类
 Base = declarative_base()
 
@@ -19,3 +35,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+#获取异步数据库会话
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
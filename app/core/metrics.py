@@ -0,0 +1,70 @@
+"""
+进程内指标收集 - 计数器与耗时统计
+"""
+from typing import Dict
+from threading import Lock
+import time
+
+
+class Metrics:
+    """简单的进程内指标：计数器 + 观测值（次数/总和/最大/最近一次）"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._counters: Dict[str, float] = {}
+        self._observations: Dict[str, Dict[str, float]] = {}
+
+    def incr(self, name: str, value: float = 1):
+        """累加计数器"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float):
+        """记录一次观测值（如耗时秒数）"""
+        with self._lock:
+            obs = self._observations.setdefault(name, {"count": 0, "sum": 0.0, "max": 0.0, "last": 0.0})
+            obs["count"] += 1
+            obs["sum"] += value
+            obs["max"] = max(obs["max"], value)
+            obs["last"] = value
+
+    def timer(self, name: str) -> "_Timer":
+        """耗时统计上下文管理器"""
+        return _Timer(self, name)
+
+    def counter(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> Dict:
+        """导出当前全部指标"""
+        with self._lock:
+            observations = {
+                name: {**obs, "avg": obs["sum"] / obs["count"] if obs["count"] else 0.0}
+                for name, obs in self._observations.items()
+            }
+            return {"counters": dict(self._counters), "observations": observations}
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._observations.clear()
+
+
+class _Timer:
+    def __init__(self, metrics: Metrics, name: str):
+        self.metrics = metrics
+        self.name = name
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self._start
+        self.metrics.observe(self.name, self.elapsed)
+        return False
+
+
+metrics = Metrics()
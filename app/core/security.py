@@ -1,6 +1,6 @@
 from datetime import datetime, timezone, timedelta
-from typing import Optional
-from jose import JWSError, jwt
+from typing import Any, Dict, Optional
+from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
@@ -26,15 +26,19 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
-def verify_token(token: str) -> Optional[str]:
-    """验证令牌"""
+def decode_token(token: str) -> Optional[Dict[str, Any]]:
+    """解码并验证令牌，签名无效或已过期时返回None"""
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        username: Optional[str] = payload.get("sub")
-        if username is None:
-            return None
-        return username
-    except JWSError:
+    except JWTError:
+        return None
+    if payload.get("sub") is None:
         return None
+    return payload
+
+def verify_token(token: str) -> Optional[str]:
+    """验证令牌"""
+    payload = decode_token(token)
+    return payload["sub"] if payload else None
 
 
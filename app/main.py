@@ -4,10 +4,15 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
-from app.core.database import engine
+from app.core.database import async_engine, engine
 from app.models import article, content_source, user
-from app.routers import admin, articles, auth, sources
+from app.routers import admin, articles, auth, recommendations, sources
+from app.services.browser_pool import browser_pool
+from app.services.crawler import close_http_client
+from app.services.embedding_index import embedding_index
+from app.services.enrichment_queue import enrichment_queue
 from app.services.scheduler import scheduler_service
+from app.services.worker_pool import parse_pool
 
 logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(name)s - %(message)s")
 
@@ -29,6 +34,7 @@ app.add_middleware(
 app.include_router(auth.router)
 app.include_router(sources.router)
 app.include_router(articles.router)
+app.include_router(recommendations.router)
 app.include_router(admin.router)
 
 
@@ -71,6 +77,13 @@ async def startup_event():
     except Exception as e:
         logger.error(f"定时任务调度器启动失败: {str(e)}")
 
+    # 启动AI富化队列
+    try:
+        await enrichment_queue.start()
+        logger.info("AI富化队列启动成功")
+    except Exception as e:
+        logger.error(f"AI富化队列启动失败: {str(e)}")
+
     logger.info("=" * 60)
     logger.info("应用启动完成！")
     logger.info("API文档: http://localhost:8000/docs")
@@ -91,5 +104,24 @@ async def shutdown_event():
     except Exception as e:
         logger.error(f"停止调度器失败: {str(e)}")
 
+    # 停止AI富化队列
+    try:
+        await enrichment_queue.stop()
+    except Exception as e:
+        logger.error(f"停止AI富化队列失败: {str(e)}")
+
+    # 关闭共享浏览器池与HTTP客户端
+    try:
+        await browser_pool.close()
+        await close_http_client()
+        parse_pool.shutdown()
+        embedding_index.close()
+    except Exception as e:
+        logger.error(f"关闭抓取资源失败: {str(e)}")
+
+    # 释放数据库连接池
+    await async_engine.dispose()
+    engine.dispose()
+
     logger.info("再见！")
     logger.info("=" * 60)
@@ -1,6 +1,8 @@
 from .user import User
 from .content_source import ContentSource
+from .document import Document
 from .article import Article
+from .article_keyword import ArticleKeyword
 
-__all__ = ["User", "ContentSource", "Article"]
+__all__ = ["User", "ContentSource", "Document", "Article", "ArticleKeyword"]
 
@@ -1,16 +1,65 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text
+from sqlalchemy import BigInteger, Column, Integer, String, DateTime, Boolean, Text, Index, UniqueConstraint, DDL, event, inspect
 from sqlalchemy.sql import func
 from sqlalchemy import ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
+from app.core.config import settings
 from app.core.database import Base
+from app.services.text_prep import SIMHASH_BANDS, article_search_fields, article_simhash_fields, article_term_vector
+from app.services.urls import canonicalize_url
+
+# 全文检索：PostgreSQL 用生成的 tsvector 列 + GIN 索引，SQLite 用 FTS5 外部内容表 + 触发器
+POSTGRES_SEARCH_DDL = [
+    """
+    ALTER TABLE articles ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(search_title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(search_body, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX ix_articles_search_vector ON articles USING GIN (search_vector)",
+]
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE articles_fts USING fts5(
+        search_title, search_body, content='articles', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER articles_fts_ai AFTER INSERT ON articles BEGIN
+        INSERT INTO articles_fts(rowid, search_title, search_body)
+        VALUES (new.id, new.search_title, new.search_body);
+    END
+    """,
+    """
+    CREATE TRIGGER articles_fts_ad AFTER DELETE ON articles BEGIN
+        INSERT INTO articles_fts(articles_fts, rowid, search_title, search_body)
+        VALUES ('delete', old.id, old.search_title, old.search_body);
+    END
+    """,
+    """
+    CREATE TRIGGER articles_fts_au AFTER UPDATE OF search_title, search_body ON articles BEGIN
+        INSERT INTO articles_fts(articles_fts, rowid, search_title, search_body)
+        VALUES ('delete', old.id, old.search_title, old.search_body);
+        INSERT INTO articles_fts(rowid, search_title, search_body)
+        VALUES (new.id, new.search_title, new.search_body);
+    END
+    """,
+]
 
 class Article(Base):
     __tablename__ = "articles"
+    __table_args__ = (
+        Index("ix_articles_user_category", "user_id", "category"),
+        # 同一篇文章（按规范URL）每个用户一行，抓取内容与富化结果通过 document_id 共享
+        UniqueConstraint("user_id", "canonical_url", name="uq_articles_user_canonical_url"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(500), nullable=False)
-    content = Column(Text, comment="文章内容")
-    url = Column(String(500), unique=True, nullable=False)
+    # 正文可能是整页HTML，默认延迟加载；需要正文时用 undefer(Article.content)
+    content = deferred(Column(Text, comment="文章内容"))
+    url = Column(String(500), nullable=False, index=True)
+    # 去除跟踪参数等之后的URL，只作为去重与查询的键；抓取与展示仍用原始链接 url
+    canonical_url = Column(String(500), nullable=False, comment="规范化后的URL（去重用）")
     author = Column(String(100), comment="作者")
     published_at = Column(DateTime(timezone=True))
     source_id = Column(Integer, ForeignKey("content_sources.id", ondelete="CASCADE"), nullable=False, comment="来源ID")
@@ -24,12 +73,68 @@ class Article(Base):
     word_count = Column(Integer, default=0, comment="字数统计")
     keywords = Column(Text, comment="关键词JSON数组")
     category = Column(String(100), comment="文章分类")
+    enrichment_status = Column(String(20), default="pending", index=True, comment="AI富化状态：pending, done, failed, duplicate")
+    search_title = deferred(Column(Text, comment="分词后的标题（全文检索用）"))
+    search_body = deferred(Column(Text, comment="分词后的摘要与正文（全文检索用）"))
+    term_vector = deferred(Column(Text, comment="哈希词频向量JSON（内容推荐用）"))
+    # 近似重复检测：SimHash 按16位分段建索引，海明距离不超过3的文章至少有一段相同
+    simhash = Column(BigInteger, comment="标题与正文的64位SimHash")
+    simhash_b0 = Column(Integer, comment="SimHash第0段（16位）")
+    simhash_b1 = Column(Integer, comment="SimHash第1段（16位）")
+    simhash_b2 = Column(Integer, comment="SimHash第2段（16位）")
+    simhash_b3 = Column(Integer, comment="SimHash第3段（16位）")
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="SET NULL"), index=True, comment="共享文档ID")
+    duplicate_of = Column(Integer, ForeignKey("articles.id", ondelete="SET NULL"), index=True, comment="近似重复时指向同簇最早的文章")
 
 
     source = relationship("ContentSource", back_populates="articles")
     user = relationship("User", back_populates="articles")
+    document = relationship("Document", back_populates="articles")
+    keyword_rows = relationship("ArticleKeyword", back_populates="article", cascade="all, delete-orphan", passive_deletes=True)
+
+
+# 文章列表的游标分页索引：WHERE user_id = ? ORDER BY created_at DESC, id DESC
+Index("ix_articles_user_created_id", Article.user_id, Article.created_at.desc(), Article.id.desc())
+
+# 近似重复候选查询：WHERE user_id = ? AND (simhash_b0 = ? OR ... OR simhash_b3 = ?)
+for band in range(SIMHASH_BANDS):
+    Index(f"ix_articles_user_simhash_b{band}", Article.user_id, getattr(Article, f"simhash_b{band}"))
+
 
+for statement in POSTGRES_SEARCH_DDL:
+    event.listen(Article.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(Article.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Article.__table__, "before_drop", DDL("DROP TABLE IF EXISTS articles_fts").execute_if(dialect="sqlite"))
 
 
+@event.listens_for(Article, "before_insert")
+@event.listens_for(Article, "before_update")
+def _refresh_canonical_url(mapper, connection, target):
+    """ORM写入时由原始链接计算规范URL（批量upsert在 normalize_article 中计算）"""
+    if target.url is not None:
+        target.canonical_url = canonicalize_url(target.url)
 
 
+@event.listens_for(Article, "before_insert")
+@event.listens_for(Article, "before_update")
+def _refresh_search_fields(mapper, connection, target):
+    """ORM写入时同步检索列、词频向量与SimHash（批量upsert在 normalize_article 中计算）"""
+    state = inspect(target)
+    if state.persistent and not any(
+            state.attrs[name].history.has_changes() for name in ("title", "summary", "content")
+    ):
+        return
+    fields = article_search_fields(
+        target.title, target.summary, target.content, settings.search_index_max_chars
+    )
+    target.search_title = fields["search_title"]
+    target.search_body = fields["search_body"]
+    target.term_vector = article_term_vector(
+        target.title, target.summary, target.content, settings.search_index_max_chars,
+        settings.recommend_hash_features, settings.recommend_max_terms
+    )
+    for column, value in article_simhash_fields(
+        target.title, target.content, settings.search_index_max_chars, settings.dedup_min_tokens
+    ).items():
+        setattr(target, column, value)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+
+class ArticleKeyword(Base):
+    __tablename__ = "article_keywords"
+    # (keyword, article_id) 唯一约束同时作为按关键词查文章的索引
+    __table_args__ = (
+        UniqueConstraint("keyword", "article_id", name="uq_article_keywords_keyword_article"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    article_id = Column(Integer, ForeignKey("articles.id", ondelete="CASCADE"), nullable=False, index=True, comment="文章ID")
+    keyword = Column(String(100), nullable=False, comment="归一化关键词（小写）")
+
+    article = relationship("Article", back_populates="keyword_rows")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy import ForeignKey
 from sqlalchemy.orm import relationship
@@ -6,10 +6,14 @@ from app.core.database import Base
 
 class ContentSource(Base):
     __tablename__ = "content_sources"
+    # 不同用户可以订阅同一个源，抓取时按 rss_url 合并
+    __table_args__ = (
+        UniqueConstraint("user_id", "url", name="uq_content_sources_user_url"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(200), nullable=False, comment="源名称")
-    url = Column(String(500), unique=True, nullable=False, comment="源URL")
+    url = Column(String(500), nullable=False, comment="源URL")
     type = Column(String(50), nullable=False, comment="源类型：rss, manual, api")
     rss_url = Column(String(500), comment="RSS URL (如果是RSS源)")
     description = Column(Text, comment="源描述")
@@ -18,6 +22,9 @@ class ContentSource(Base):
     fetch_frequency = Column(Integer, default=60, comment="抓取频率（分钟）")
     fetch_config = Column(Text, comment="抓取配置JSON")
     last_fetch = Column(DateTime(timezone=True))
+    feed_etag = Column(String(255), comment="RSS响应ETag")
+    feed_last_modified = Column(String(100), comment="RSS响应Last-Modified")
+    feed_content_hash = Column(String(64), comment="RSS响应内容SHA256")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy.sql import func
+from sqlalchemy.orm import deferred, relationship
+from app.core.database import Base
+
+class Document(Base):
+    """按规范URL共享的抓取内容与AI富化结果，多个用户订阅同一篇文章时只抓取、富化一次"""
+    __tablename__ = "documents"
+
+    id = Column(Integer, primary_key=True, index=True)
+    url = Column(String(500), unique=True, nullable=False, comment="规范化后的文章URL")
+    title = Column(String(500), nullable=False)
+    content = deferred(Column(Text, comment="抓取到的正文HTML"))
+    content_hash = Column(String(64), comment="正文SHA256")
+    author = Column(String(100), comment="作者")
+    published_at = Column(DateTime(timezone=True))
+    images = Column(Text, comment="图片URL列表（JSON格式）")
+    summary = Column(Text, comment="AI摘要")
+    keywords = Column(Text, comment="关键词JSON数组")
+    category = Column(String(100), comment="文章分类")
+    enrichment_status = Column(String(20), default="pending", comment="AI富化状态：pending, done")
+    crawled_at = Column(DateTime(timezone=True), server_default=func.now(), comment="最后抓取时间")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    articles = relationship("Article", back_populates="document", passive_deletes=True)
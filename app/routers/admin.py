@@ -2,9 +2,22 @@
 管理员路由 - 用于管理定时任务和系统配置
 """
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.core.metrics import metrics
+from app.models.article import Article
 from app.routers.auth import get_current_user
-from app.models.user import User
+from app.services.user_cache import UserPrincipal
+from app.services.ai_cache import ai_cache
+from app.services.browser_pool import browser_pool
+from app.services.embedding_index import embedding_index
+from app.services.enrichment_queue import enrichment_queue
+from app.services.crawler import get_tier_stats
+from app.services.llm_client import llm_client
+from app.services.recommender import recommender
 from app.services.scheduler import scheduler_service
+from app.services.worker_pool import parse_pool
 import logging
 
 router = APIRouter(prefix="/admin", tags=["管理"])
@@ -12,7 +25,7 @@ logger = logging.getLogger(__name__)
 
 
 @router.post("/scheduler/start")
-async def start_scheduler(current_user: User = Depends(get_current_user)):
+async def start_scheduler(current_user: UserPrincipal = Depends(get_current_user)):
     """
     启动定时任务调度器
 
@@ -31,7 +44,7 @@ async def start_scheduler(current_user: User = Depends(get_current_user)):
 
 
 @router.post("/scheduler/stop")
-async def stop_scheduler(current_user: User = Depends(get_current_user)):
+async def stop_scheduler(current_user: UserPrincipal = Depends(get_current_user)):
     """
     停止定时任务调度器
 
@@ -49,7 +62,7 @@ async def stop_scheduler(current_user: User = Depends(get_current_user)):
 
 
 @router.get("/scheduler/status")
-async def get_scheduler_status(current_user: User = Depends(get_current_user)):
+async def get_scheduler_status(current_user: UserPrincipal = Depends(get_current_user)):
     """
     查看调度器状态
 
@@ -63,7 +76,7 @@ async def get_scheduler_status(current_user: User = Depends(get_current_user)):
 
 
 @router.post("/scheduler/jobs/{job_id}/pause")
-async def pause_job(job_id: str, current_user: User = Depends(get_current_user)):
+async def pause_job(job_id: str, current_user: UserPrincipal = Depends(get_current_user)):
     """
     暂停指定任务
 
@@ -81,7 +94,7 @@ async def pause_job(job_id: str, current_user: User = Depends(get_current_user))
 
 
 @router.post("/scheduler/jobs/{job_id}/resume")
-async def resume_job(job_id: str, current_user: User = Depends(get_current_user)):
+async def resume_job(job_id: str, current_user: UserPrincipal = Depends(get_current_user)):
     """
     恢复指定任务
 
@@ -99,7 +112,7 @@ async def resume_job(job_id: str, current_user: User = Depends(get_current_user)
 
 
 @router.post("/scheduler/trigger-now")
-async def trigger_fetch_now(current_user: User = Depends(get_current_user)):
+async def trigger_fetch_now(current_user: UserPrincipal = Depends(get_current_user)):
     """
     立即触发一次抓取任务（不等待定时）
 
@@ -119,6 +132,166 @@ async def trigger_fetch_now(current_user: User = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=f"触发失败: {str(e)}")
 
 
+@router.get("/browser-pool/status")
+async def get_browser_pool_status(current_user: UserPrincipal = Depends(get_current_user)):
+    """
+    查看浏览器池状态
+
+    返回浏览器连接状态、上下文复用与回收次数等信息
+    """
+    return {
+        "success": True,
+        "data": browser_pool.get_status()
+    }
+
+
+@router.get("/crawler/tiers")
+async def get_crawler_tiers(current_user: UserPrincipal = Depends(get_current_user)):
+    """
+    查看分层抓取统计
+
+    返回HTTP静态抓取与浏览器抓取各自服务的比例、升级次数与失败次数
+    """
+    return {
+        "success": True,
+        "data": get_tier_stats()
+    }
+
+
+@router.get("/ai-cache/status")
+async def get_ai_cache_status(current_user: UserPrincipal = Depends(get_current_user)):
+    """
+    查看AI响应缓存状态
+
+    返回缓存后端、条目数与命中率
+    """
+    return {
+        "success": True,
+        "data": await ai_cache.get_stats()
+    }
+
+
+@router.get("/llm/status")
+async def get_llm_status(current_user: UserPrincipal = Depends(get_current_user)):
+    """
+    查看大模型客户端状态
+
+    返回令牌桶余量、在途请求数与熔断器状态
+    """
+    return {
+        "success": True,
+        "data": llm_client.get_status()
+    }
+
+
+@router.get("/recommender/status")
+async def get_recommender_status(current_user: UserPrincipal = Depends(get_current_user)):
+    """
+    查看推荐服务状态
+
+    返回缓存的用户数与文章数、增量加载的行数与全量重建次数
+    """
+    return {
+        "success": True,
+        "data": recommender.get_status()
+    }
+
+
+@router.get("/dedup/status")
+async def get_dedup_status(
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserPrincipal = Depends(get_current_user)
+        ):
+    """
+    查看近似重复检测统计
+
+    返回本进程启动以来识别的重复文章数与因此省下的大模型调用数，以及库中当前用户的重复文章总数
+    """
+    duplicate_articles = await db.scalar(
+        select(func.count(Article.id)).where(
+            Article.user_id == current_user.id, Article.duplicate_of.isnot(None)
+        )
+    )
+    return {
+        "success": True,
+        "data": {
+            "duplicates_detected": metrics.counter("dedup.duplicates"),
+            "llm_calls_avoided": metrics.counter("dedup.llm_calls_avoided"),
+            "duplicate_articles": duplicate_articles or 0,
+        }
+    }
+
+
+@router.get("/embedding-index/status")
+async def get_embedding_index_status(current_user: UserPrincipal = Depends(get_current_user)):
+    """
+    查看相关文章向量索引状态
+
+    返回打开的分片数、已索引文章数与IVF训练次数
+    """
+    return {
+        "success": True,
+        "data": embedding_index.get_status()
+    }
+
+
+@router.get("/parse-pool/status")
+async def get_parse_pool_status(current_user: UserPrincipal = Depends(get_current_user)):
+    """
+    查看解析线程池状态
+
+    返回线程数、执行中与排队任务数以及利用率
+    """
+    return {
+        "success": True,
+        "data": parse_pool.get_status()
+    }
+
+
+@router.post("/ai-cache/flush")
+async def flush_ai_cache(current_user: UserPrincipal = Depends(get_current_user)):
+    """
+    清空AI响应缓存
+
+    修改模型或提示词后可用于强制重新生成
+    """
+    try:
+        removed = await ai_cache.flush()
+        return {
+            "success": True,
+            "message": f"已清空 {removed} 条缓存"
+        }
+    except Exception as e:
+        logger.error(f"清空AI缓存失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"清空失败: {str(e)}")
+
+
+@router.get("/enrichment/status")
+async def get_enrichment_status(current_user: UserPrincipal = Depends(get_current_user)):
+    """
+    查看AI富化队列状态
+
+    返回队列深度、工作协程数与处理数量；单篇耗时见 /admin/metrics 的 enrichment.* 指标
+    """
+    return {
+        "success": True,
+        "data": enrichment_queue.get_status()
+    }
+
+
+@router.get("/metrics")
+async def get_metrics(current_user: UserPrincipal = Depends(get_current_user)):
+    """
+    查看进程内运行指标
+
+    包括每个RSS源的抓取耗时（并发墙钟时间与逐条串行预计时间）等
+    """
+    return {
+        "success": True,
+        "data": metrics.snapshot()
+    }
+
+
 # TODO: 添加更多管理功能
 # - 查看系统统计信息
 # - 管理用户权限
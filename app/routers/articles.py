@@ -1,39 +1,85 @@
+import asyncio
 import logging
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_async_db
 from app.models.article import Article
+from app.models.article_keyword import ArticleKeyword
 from app.models.content_source import ContentSource
-from app.models.user import User
+from app.services.user_cache import UserPrincipal
 from app.routers.auth import get_current_user
+from app.services.article_store import normalize_keyword
+from app.services.dedup import mark_near_duplicates
+from app.services.embedding_index import EMBEDDING_TEXT_COLUMNS, embedding_index
+from app.services.enrichment_queue import enrichment_queue
+from app.services.pagination import InvalidCursorError, apply_cursor, article_count_cache, encode_cursor
+from app.services.search import apply_search, highlight
 from app.schemas.article import (
     ArticleCreate,
     ArticleListResponse,
     ArticleResponse,
     ArticleUpdate,
+    RelatedArticleResponse,
 )
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/articles", tags=["文章管理"])
 
+# 列表只查询 ArticleListResponse 需要的列，不加载正文
+ARTICLE_LIST_COLUMNS = (
+    Article.id,
+    Article.title,
+    Article.url,
+    Article.author,
+    Article.source_type,
+    Article.is_read,
+    Article.published_at,
+    Article.created_at,
+    Article.images,
+    Article.summary,
+    Article.word_count,
+    Article.keywords,
+    Article.category,
+    Article.duplicate_of,
+)
+
+
+async def _get_user_article(db: AsyncSession, article_id: int, user_id: int) -> Optional[Article]:
+    """按ID加载当前用户的文章（包含正文，刷新会话中已有的对象）"""
+    result = await db.execute(
+        select(Article)
+        .options(undefer(Article.content))
+        .where(Article.id == article_id, Article.user_id == user_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
+
+async def _index_article(db: AsyncSession, article_id: int, user_id: int):
+    """计算文章向量并写入相关文章索引"""
+    rows = (await db.execute(select(*EMBEDDING_TEXT_COLUMNS).where(Article.id == article_id))).all()
+    await asyncio.to_thread(embedding_index.add_articles, user_id, rows)
+
 
 @router.post("/", response_model=ArticleResponse)
-def create_article(
+async def create_article(
     article_data: ArticleCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_user),
 ):
     """创建新文章"""
-    source = (
-        db.query(ContentSource)
-        .filter(
+    source = await db.scalar(
+        select(ContentSource).where(
             ContentSource.id == article_data.source_id,
             ContentSource.user_id == current_user.id,
         )
-        .first()
     )
     if not source:
         raise HTTPException(
@@ -51,146 +97,211 @@ def create_article(
         user_id=current_user.id,
     )
     db.add(db_article)
-    db.commit()
-    db.refresh(db_article)
+    await db.flush()
+    duplicates = await db.run_sync(mark_near_duplicates, [db_article.id])
+    await db.commit()
+    article_count_cache.invalidate_user(current_user.id)
+
+    # 近似重复的文章复用同簇的富化结果，其余在响应返回后交给富化队列生成摘要、关键词与分类
+    if not duplicates:
+        await _index_article(db, db_article.id, current_user.id)
+        background_tasks.add_task(enrichment_queue.enqueue, [db_article.id])
 
-    return db_article
+    return await _get_user_article(db, db_article.id, current_user.id)
 
 
 @router.get("/{article_id}", response_model=ArticleResponse)
-def get_article(
+async def get_article(
     article_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_user),
 ):
     """获取单个文章详情"""
-    article = (
-        db.query(Article)
-        .filter(Article.id == article_id, Article.user_id == current_user.id)
-        .first()
-    )
+    article = await _get_user_article(db, article_id, current_user.id)
     if not article:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="文章不存在")
     return article
 
 
+@router.get("/{article_id}/related", response_model=List[RelatedArticleResponse])
+async def get_related_articles(
+    article_id: int,
+    limit: int = Query(10, ge=1, le=50, description="返回的记录数"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_user),
+):
+    """获取相关文章（按向量相似度近似最近邻检索）"""
+    if not await db.scalar(select(Article.id).where(Article.id == article_id, Article.user_id == current_user.id)):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="文章不存在")
+
+    await embedding_index.ensure_article(db, current_user.id, article_id)
+    related = await asyncio.to_thread(embedding_index.related, current_user.id, article_id, limit)
+    if not related:
+        return []
+
+    similarities = dict(related)
+    rows = (await db.execute(
+        select(*ARTICLE_LIST_COLUMNS).where(Article.id.in_(list(similarities)), Article.user_id == current_user.id)
+    )).all()
+    articles = {row.id: {**row._mapping, "similarity": similarities[row.id]} for row in rows}
+    return [articles[related_id] for related_id, _ in related if related_id in articles]
+
+
 @router.get("/", response_model=List[ArticleListResponse])
-def get_articles(
-    skip: int = Query(0, ge=0, description="跳过的记录数"),
+async def get_articles(
+    response: Response,
+    skip: int = Query(0, ge=0, description="跳过的记录数（偏移分页，兼容旧客户端）"),
     limit: int = Query(20, ge=1, le=100, description="返回的记录数"),
+    cursor: Optional[str] = Query(None, description="上一页响应头 X-Next-Cursor 的值（游标分页）"),
+    with_total: bool = Query(False, description="是否在响应头 X-Total-Count 返回近似总数"),
     source_id: Optional[int] = Query(None, description="按内容源筛选"),
     is_read: Optional[bool] = Query(None, description="按阅读状态筛选"),
-    category: Optional[str] = Query(None, description="按分类筛选"),
+    category: Optional[str] = Query(None, description="按内容源分类筛选"),
+    article_category: Optional[str] = Query(None, description="按文章分类（AI富化结果）筛选"),
+    keyword: Optional[str] = Query(None, description="按关键词筛选"),
     search: Optional[str] = Query(None, description="搜索标题或内容"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    hide_duplicates: bool = Query(False, description="是否隐藏近似重复的文章（只保留每簇最早的一篇）"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_user),
 ):
-    """获取文章列表，支持分页和筛选"""
+    """获取文章列表，支持分页和筛选
+
+    默认按 (created_at, id) 倒序；传入 cursor 时使用游标分页（忽略 skip），
+    下一页游标通过响应头 X-Next-Cursor 返回。检索结果按相关度排序，只支持偏移分页。
+    """
+    if search and cursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="检索结果不支持游标分页")
+
     try:
-        query = (
-            db.query(Article)
-            .join(ContentSource, Article.source_id == ContentSource.id)
-            .filter(Article.user_id == current_user.id)
-        )
+        dialect = db.get_bind().dialect.name
+
+        # 只取列表列（检索时额外取正文开头用于高亮），结果为行而非ORM对象
+        columns = ARTICLE_LIST_COLUMNS
+        if search:
+            columns += (func.substr(Article.content, 1, settings.search_snippet_source_chars).label("content_head"),)
+        stmt = select(*columns).where(Article.user_id == current_user.id)
 
         # 应用筛选条件
         if source_id is not None:
-            query = query.filter(Article.source_id == source_id)
+            stmt = stmt.where(Article.source_id == source_id)
 
         if is_read is not None:
-            query = query.filter(Article.is_read == is_read)
+            stmt = stmt.where(Article.is_read == is_read)
+
+        # 文章分类走 (user_id, category) 索引，关键词走 article_keywords 索引
+        if article_category:
+            stmt = stmt.where(Article.category == article_category)
 
         if category:
-            query = query.filter(ContentSource.category == category)
+            stmt = stmt.join(ContentSource, Article.source_id == ContentSource.id).where(
+                ContentSource.category == category
+            )
 
-        if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                (Article.title.ilike(search_term))
-                | (Article.content.ilike(search_term))
-                | (Article.summary.ilike(search_term))
+        if keyword:
+            keyword_articles = select(ArticleKeyword.article_id).where(
+                ArticleKeyword.keyword == normalize_keyword(keyword)
             )
+            stmt = stmt.where(Article.id.in_(keyword_articles))
 
-        # 按创建时间倒序排列
-        query = query.order_by(Article.created_at.desc())
+        if hide_duplicates:
+            stmt = stmt.where(Article.duplicate_of.is_(None))
 
-        # 应用分页
-        total = query.count()
-        articles = query.offset(skip).limit(limit).all()
+        rank = None
+        if search:
+            stmt, rank = apply_search(stmt, dialect, search)
+
+        if with_total:
+            total_key = (current_user.id, source_id, is_read, category, article_category, keyword, search, hide_duplicates)
+            response.headers["X-Total-Count"] = str(await article_count_cache.get_or_count(total_key, db, stmt))
+
+        # 有检索词时按相关度排序，其余按 (created_at, id) 倒序
+        if rank is not None:
+            stmt = stmt.order_by(rank.desc(), Article.created_at.desc(), Article.id.desc())
+        else:
+            stmt = apply_cursor(stmt, dialect, cursor)
+        if not cursor:
+            stmt = stmt.offset(skip)
+
+        # 多取一条用于判断是否还有下一页
+        rows = (await db.execute(stmt.limit(limit + 1))).all()
+        has_more = len(rows) > limit
+        articles = [dict(row._mapping) for row in rows[:limit]]
+        if has_more and rank is None:
+            last = articles[-1]
+            response.headers["X-Next-Cursor"] = encode_cursor(last["created_at"], last["id"])
+        if search:
+            for article in articles:
+                article["highlight"] = highlight(search, article["summary"], article.pop("content_head"))
 
         logger.info(
-            f"查询文章列表: 总数={total}, 返回={len(articles)}, 筛选条件: source_id={source_id}, is_read={is_read}, category={category}, search={search}"
+            f"查询文章列表: 返回={len(articles)}, 筛选条件: source_id={source_id}, is_read={is_read}, category={category}, article_category={article_category}, keyword={keyword}, search={search}"
         )
 
         return articles
 
+    except InvalidCursorError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="无效的分页游标")
     except Exception as e:
         logger.error(f"查询文章列表失败: {str(e)}")
         raise HTTPException(status_code=500, detail="查询文章列表失败")
 
 
 @router.put("/{article_id}", response_model=ArticleResponse)
-def update_article(
+async def update_article(
     article_id: int,
     article_data: ArticleUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_user),
 ):
     """更新文章"""
-    article = (
-        db.query(Article)
-        .filter(Article.id == article_id, Article.user_id == current_user.id)
-        .first()
-    )
+    article = await _get_user_article(db, article_id, current_user.id)
     if not article:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="文章不存在")
     update_data = article_data.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(article, field, value)
 
-    db.commit()
-    db.refresh(article)
+    await db.commit()
+    if update_data.keys() & {"title", "summary", "content"}:
+        await _index_article(db, article_id, current_user.id)
 
-    return article
+    return await _get_user_article(db, article_id, current_user.id)
 
 
 @router.delete("/{article_id}")
-def delete_article(
+async def delete_article(
     article_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_user),
 ):
     """删除文章"""
-    article = (
-        db.query(Article)
-        .filter(Article.id == article_id, Article.user_id == current_user.id)
-        .first()
+    article = await db.scalar(
+        select(Article).where(Article.id == article_id, Article.user_id == current_user.id)
     )
     if not article:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="文章不存在")
-    db.delete(article)
-    db.commit()
+    await db.delete(article)
+    await db.commit()
+    article_count_cache.invalidate_user(current_user.id)
+    await asyncio.to_thread(embedding_index.remove_articles, current_user.id, [article_id])
     return {"message": "文章删除成功"}
 
 
 @router.patch("/{article_id}/toggle-read")
-def toggle_article_read_status(
+async def toggle_article_read_status(
     article_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_user),
 ):
     """切换文章阅读状态"""
-    article = (
-        db.query(Article)
-        .filter(Article.id == article_id, Article.user_id == current_user.id)
-        .first()
+    article = await db.scalar(
+        select(Article).where(Article.id == article_id, Article.user_id == current_user.id)
     )
     if not article:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="文章不存在")
 
     article.is_read = not article.is_read
-    db.commit()
-    db.refresh(article)
+    await db.commit()
 
     status_text = "已读" if article.is_read else "未读"
 
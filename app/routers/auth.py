@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.core.database import get_db
-from app.core.security import hash_password, verify_password, create_access_token, verify_token
+from app.core.security import hash_password, verify_password, create_access_token, decode_token
 from app.schemas.user import UserCreate, UserLogin, UserResponse, Token
 from app.models.user import User
+from app.services.user_cache import UserPrincipal, user_cache
 
 router = APIRouter(prefix="/auth", tags=["认证"])
 security = HTTPBearer()
@@ -12,23 +14,44 @@ security = HTTPBearer()
 def get_current_user(
         credentials: HTTPAuthorizationCredentials = Depends(security),
         db: Session = Depends(get_db)
-        ) -> User:
-    """获取当前用户"""
-    username = verify_token(credentials.credentials)
-    if username is None:
+        ) -> UserPrincipal:
+    """获取当前用户身份（优先令牌声明与缓存，未命中时查询数据库）"""
+    payload = decode_token(credentials.credentials)
+    if payload is None:
         raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="无效的认证",
                 headers={"WWW-Authenticate": "Bearer"}
                 )
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
+    username = payload["sub"]
+
+    if settings.auth_trust_token_claims and payload.get("uid") is not None:
+        return UserPrincipal(id=payload["uid"], username=username, is_admin=bool(payload.get("adm")))
+
+    principal = user_cache.get(username)
+    if principal is None:
+        row = (
+            db.query(User.id, User.username, User.is_active, User.is_admin)
+            .filter(User.username == username)
+            .first()
+        )
+        if row is None:
+            raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="用户不存在",
+                    headers={"WWW-Authenticate": "Bearer"}
+                    )
+        principal = UserPrincipal(
+                id=row.id, username=row.username, is_active=bool(row.is_active), is_admin=bool(row.is_admin)
+                )
+        user_cache.set(principal)
+
+    if not principal.is_active:
         raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="用户不存在",
-                headers={"WWW-Authenticate": "Bearer"}
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="用户已被禁用"
                 )
-    return user
+    return principal
 
 @router.post("/register", response_model=UserResponse)
 
@@ -68,13 +91,24 @@ def login(user_data: UserLogin, db: Session = Depends(get_db)):
                 detail="用户名或密码错误",
                 headers={"WWW-Authenticate": "Bearer"}
                 )
-    access_token = create_access_token(data={"sub": user.username})
+    # uid/adm 声明供 auth_trust_token_claims 模式免查询使用
+    access_token = create_access_token(data={"sub": user.username, "uid": user.id, "adm": bool(user.is_admin)})
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user_info(current_user: User = Depends(get_current_user)):
+def get_current_user_info(
+        current_user: UserPrincipal = Depends(get_current_user),
+        db: Session = Depends(get_db)
+        ):
     """获取当前用户信息"""
-    return current_user
+    user = db.query(User).filter(User.id == current_user.id).first()
+    if user is None:
+        raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="用户不存在",
+                headers={"WWW-Authenticate": "Bearer"}
+                )
+    return user
 
 
 
@@ -0,0 +1,47 @@
+import logging
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_db
+from app.models.article import Article
+from app.routers.articles import ARTICLE_LIST_COLUMNS
+from app.routers.auth import get_current_user
+from app.schemas.article import RecommendationResponse
+from app.services.recommender import recommender
+from app.services.user_cache import UserPrincipal
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/recommendations", tags=["内容推荐"])
+
+
+@router.get("/", response_model=List[RecommendationResponse])
+async def get_recommendations(
+    limit: int = Query(20, ge=1, le=100, description="返回的记录数"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_user),
+):
+    """获取推荐文章
+
+    按与已读文章的内容相似度（TF-IDF余弦）和内容源分类偏好打分，并随发布时间衰减；
+    只返回未读文章。没有阅读记录时按时间倒序返回。
+    """
+    try:
+        ranked = await recommender.recommend(db, current_user.id, limit)
+        if not ranked:
+            return []
+
+        scores = dict(ranked)
+        rows = (await db.execute(
+            select(*ARTICLE_LIST_COLUMNS).where(Article.id.in_(list(scores)), Article.user_id == current_user.id)
+        )).all()
+        articles = {row.id: {**row._mapping, "score": scores[row.id]} for row in rows}
+
+        logger.info(f"推荐文章: 用户={current_user.id}, 返回={len(articles)}")
+        return [articles[article_id] for article_id, _ in ranked if article_id in articles]
+
+    except Exception as e:
+        logger.error(f"获取推荐文章失败: {str(e)}")
+        raise HTTPException(status_code=500, detail="获取推荐文章失败")
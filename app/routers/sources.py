@@ -1,24 +1,31 @@
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
-from app.core.database import get_db
+from app.core.database import get_async_db, get_db
 from app.schemas.source import SourceCreate, SourceUpdate, SourceResponse, SourceListResponse
+from app.models.article import Article
 from app.models.content_source import ContentSource
 from app.routers.auth import get_current_user
-from app.models.user import User
+from app.services.user_cache import UserPrincipal
+from app.services.embedding_index import embedding_index
 from app.services.fetch_service import FetchService
 
 
 router = APIRouter(prefix="/sources", tags=["内容源管理"])
 
 @router.post("/", response_model=SourceResponse)
-def content_source(
+async def content_source(
         source_data: SourceCreate,
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserPrincipal = Depends(get_current_user)
         ):
     """创建新的内容源"""
-    if db.query(ContentSource).filter(ContentSource.url == str(source_data.url)).first():
+    if await db.scalar(select(ContentSource.id).where(
+            ContentSource.user_id == current_user.id, ContentSource.url == str(source_data.url)
+            )):
         raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="URL已存在"
@@ -37,30 +44,30 @@ def content_source(
             user_id=current_user.id
             )
     db.add(db_source)
-    db.commit()
-    db.refresh(db_source)
+    await db.commit()
+    await db.refresh(db_source)
 
     return db_source
 
 @router.get("/", response_model=List[SourceListResponse])
-def get_sources(
+async def get_sources(
         skip: int = 0,
         limit: int = 100,
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserPrincipal = Depends(get_current_user)
         ):
     """获取内容源列表"""
-    sources = db.query(ContentSource).offset(skip).limit(limit).all()
-    return sources
+    result = await db.execute(select(ContentSource).offset(skip).limit(limit))
+    return result.scalars().all()
 
 @router.get("/{source_id}", response_model=SourceResponse)
-def get_source(
+async def get_source(
         source_id: int,
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserPrincipal = Depends(get_current_user)
         ):
     """获取单个内容源详情"""
-    source = db.query(ContentSource).filter(ContentSource.id == source_id).first()
+    source = await db.get(ContentSource, source_id)
     if not source:
         raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -69,14 +76,14 @@ def get_source(
     return source
 
 @router.put("/{source_id}", response_model=SourceResponse)
-def update_source(
+async def update_source(
         source_id: int,
         source_data: SourceUpdate,
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserPrincipal = Depends(get_current_user)
         ):
     """更新内容源"""
-    source = db.query(ContentSource).filter(ContentSource.id == source_id).first()
+    source = await db.get(ContentSource, source_id)
     if not source:
         raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -88,75 +95,85 @@ def update_source(
             value = str(value)
         elif field == "rss_url" and value:
             value = str(value)
+        if field == "rss_url" and value != source.rss_url:
+            # 订阅地址变化后旧的条件请求校验信息失效
+            source.feed_etag = None # type: ignore[assignment]
+            source.feed_last_modified = None # type: ignore[assignment]
+            source.feed_content_hash = None # type: ignore[assignment]
         setattr(source, field, value)
-    db.commit()
-    db.refresh(source)
+    await db.commit()
+    await db.refresh(source)
 
     return source
 
 @router.delete("/{source_id}")
-def delete_source(
+async def delete_source(
         source_id: int,
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserPrincipal = Depends(get_current_user)
         ):
     """删除内容源"""
-    source = db.query(ContentSource).filter(ContentSource.id == source_id).first()
+    source = await db.get(ContentSource, source_id)
     if not source:
         raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="内容源不存在"
                 )
-    db.delete(source)
-    db.commit()
+    # 文章随内容源级联删除，先记下ID以便同步清理相关文章索引
+    article_ids = (await db.scalars(select(Article.id).where(Article.source_id == source_id))).all()
+    user_id = source.user_id
+    await db.delete(source)
+    await db.commit()
+    await asyncio.to_thread(embedding_index.remove_articles, user_id, article_ids)
 
     return {"message": "内容源删除成功"}
 
 @router.patch("/{source_id}/toggle")
-def toggle_source_status(
+async def toggle_source_status(
         source_id: int,
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        db: AsyncSession = Depends(get_async_db),
+        current_user: UserPrincipal = Depends(get_current_user)
         ):
     """切换内容源状态（启用/禁用）"""
-    source = db.query(ContentSource).filter(ContentSource.id == source_id).first()
+    source = await db.get(ContentSource, source_id)
     if not source:
         raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="内容源不存在"
                 )
     source.is_active = not bool(source.is_active) # type: ignore
-    db.commit()
-    db.refresh(source)
+    await db.commit()
     return {"message": f"内容源已{'启用' if source.is_active else '禁用'}"} #type: ignore
 
 
 @router.post("/{source_id}/fetch")
 async def fetch_service_content(
         source_id: int,
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        db: AsyncSession = Depends(get_async_db),
+        sync_db: Session = Depends(get_db),
+        current_user: UserPrincipal = Depends(get_current_user)
         ):
     """手动抓取指定内容"""
     # 验证用户是否拥有该内容源
-    source = db.query(ContentSource).filter(
+    source = await db.scalar(select(ContentSource).where(
             ContentSource.id == source_id,
             ContentSource.user_id == current_user.id
-    ).first()
+    ))
     if not source:
         raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="内容源不存在"
                 )
 
+    # 抓取流程使用同步会话（与调度器共用），其数据库操作在线程中执行，不阻塞事件循环
     fetch_service = FetchService()
-    result = await fetch_service.fetch_source(source_id, db)
+    result = await fetch_service.fetch_source(source_id, sync_db)
     return result
 
 @router.post("/fetch-all")
 async def fetch_all_source(
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: UserPrincipal = Depends(get_current_user)
         ):
     """抓取所有启用的内容源"""
     fetch_service = FetchService()
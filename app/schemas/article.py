@@ -47,6 +47,20 @@ class ArticleResponse(ArticleBase):
     is_read: bool
     created_at: datetime
     updated_at: Optional[datetime] = None
+    enrichment_status: Optional[str] = None
+    keywords: Optional[List[str]] = None
+    category: Optional[str] = None
+    duplicate_of: Optional[int] = None
+
+    @validator("keywords", pre=True)
+    def parse_keywords(cls, v):
+        if isinstance(v, str):
+            try:
+                return json.loads(v)
+            except Exception:
+                return []
+        return v
+
     class Config:
         from_attributes = True
 
@@ -62,8 +76,12 @@ class ArticleListResponse(BaseModel):
     images: Optional[List[str]] = None
     summary: Optional[str] = None
     word_count: int = 0
+    keywords: Optional[List[str]] = None
+    category: Optional[str] = None
+    duplicate_of: Optional[int] = None
+    highlight: Optional[str] = None
 
-    @validator("images", pre=True)
+    @validator("images", "keywords", pre=True)
     def parse_image(cls, v):
         if v is None:
             return None
@@ -79,3 +97,9 @@ class ArticleListResponse(BaseModel):
     class Config:
         from_attributes = True
 
+
+class RecommendationResponse(ArticleListResponse):
+    score: float
+
+class RelatedArticleResponse(ArticleListResponse):
+    similarity: float
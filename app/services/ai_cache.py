@@ -0,0 +1,163 @@
+"""
+AI响应缓存 - 以内容哈希为键，避免对相同内容重复调用大模型
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import json
+import logging
+import re
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCacheBackend:
+    """进程内LRU缓存，支持TTL与条目数上限"""
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[str]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def clear(self) -> int:
+        count = len(self._data)
+        self._data.clear()
+        return count
+
+    async def size(self) -> int:
+        return len(self._data)
+
+
+class RedisCacheBackend:
+    """Redis缓存，多进程共享；过期依赖TTL，容量由Redis的maxmemory策略控制"""
+
+    prefix = "ai_cache:"
+
+    def __init__(self, redis_url: str, ttl: int):
+        from redis import asyncio as aioredis
+
+        self.ttl = ttl
+        self._client = aioredis.from_url(redis_url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._client.get(self.prefix + key)
+
+    async def set(self, key: str, value: str):
+        await self._client.set(self.prefix + key, value, ex=self.ttl)
+
+    async def clear(self) -> int:
+        count = 0
+        async for key in self._client.scan_iter(match=self.prefix + "*", count=500):
+            await self._client.delete(key)
+            count += 1
+        return count
+
+    async def size(self) -> int:
+        count = 0
+        async for _ in self._client.scan_iter(match=self.prefix + "*", count=500):
+            count += 1
+        return count
+
+
+class AICache:
+    """内容寻址缓存：键 = sha256(任务 + 提示词版本 + 模型 + 参数 + 归一化文本)"""
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @staticmethod
+    def make_key(task: str, prompt_version: str, model: str, text: str, **params) -> str:
+        normalized = re.sub(r'\s+', ' ', text or '').strip()
+        payload = json.dumps(
+            [task, prompt_version, model, sorted(params.items()), normalized],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    async def get(self, key: str) -> Optional[Any]:
+        if self.backend is None:
+            return None
+        try:
+            raw = await self.backend.get(key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"读取AI缓存失败: {str(e)}")
+            return None
+
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    async def set(self, key: str, value: Any):
+        if self.backend is None:
+            return
+        try:
+            await self.backend.set(key, json.dumps(value, ensure_ascii=False))
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"写入AI缓存失败: {str(e)}")
+
+    async def flush(self) -> int:
+        """清空缓存，返回删除的条目数"""
+        if self.backend is None:
+            return 0
+        count = await self.backend.clear()
+        logger.info(f"AI缓存已清空，删除 {count} 条")
+        return count
+
+    async def get_stats(self) -> Dict:
+        total = self.hits + self.misses
+        size = None
+        if self.backend is not None:
+            try:
+                size = await self.backend.size()
+            except Exception as e:
+                logger.warning(f"获取AI缓存大小失败: {str(e)}")
+        return {
+            "backend": settings.ai_cache_backend,
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+
+def create_ai_cache() -> AICache:
+    """根据配置创建缓存：memory（默认）、redis、none"""
+    backend_name = settings.ai_cache_backend
+    if backend_name == "memory":
+        return AICache(MemoryCacheBackend(settings.ai_cache_max_entries, settings.ai_cache_ttl_seconds))
+    if backend_name == "redis":
+        return AICache(RedisCacheBackend(settings.redis_url, settings.ai_cache_ttl_seconds))
+    if backend_name != "none":
+        logger.warning(f"未知的AI缓存后端 {backend_name}，已禁用缓存")
+    return AICache(None)
+
+
+ai_cache = create_ai_cache()
@@ -1,33 +1,44 @@
+import asyncio
 import logging
-from typing import Dict, List
+from typing import Any, Dict, List, Optional
 import json
-import os
+import re
 from bs4 import BeautifulSoup
-from openai import AsyncOpenAI
-from dotenv import load_dotenv
-
-load_dotenv()
+from pydantic import TypeAdapter, ValidationError
+from app.core.config import settings
+from app.services.ai_cache import AICache, ai_cache
+from app.services.llm_client import LLMClient, llm_client
+from app.services.text_prep import chunk_text, estimate_tokens, html_to_text, truncate_to_tokens
 
 logger = logging.getLogger(__name__)
 
+# 提示词版本：修改提示词时递增，使旧的缓存结果失效
+PROMPT_VERSIONS = {
+    "summary": "v1",
+    "classify": "v1",
+    "keywords": "v1",
+    "enrich": "v1",
+    "chunk_summary": "v1",
+}
+
+# 合并富化结果中各字段的校验规则
+ENRICH_FIELD_SCHEMAS = {
+    "summary": TypeAdapter(str),
+    "category": TypeAdapter(Dict[str, float]),
+    "keywords": TypeAdapter(List[str]),
+}
+
 class AIService:
     """AI服务"""
 
-    def __init__(self):
-        self.api_key = os.getenv('OPENAI_API_KEY')
-        self.base_url = "https://api.moonshot.cn/v1"
-        
-        if not self.api_key:
-            logger.warning("未配置OPENAI_API_KEY，AI功能无法使用")
-            self.client = None
-        else:
-            self.client = AsyncOpenAI(
-                    api_key=self.api_key,
-                    base_url=self.base_url
-                                      )
-            logger.info("AI模型客户端初始化成功")
-
+    def __init__(self, cache: Optional[AICache] = None, llm: Optional[LLMClient] = None):
+        self.llm = llm or llm_client
+        self.client = self.llm.client
+        self.model = self.llm.model
+        self.cache = cache or ai_cache
 
+        if not self.client:
+            logger.warning("未配置OPENAI_API_KEY，AI功能无法使用")
 
     async def generate_summary(self, content: str, max_length: int = 500) -> str:
         """AI生成摘要"""
@@ -38,6 +49,16 @@ class AIService:
                 logger.error("AI client 未初始化")
                 return self._fallback_summary(content, max_length)
 
+            text = html_to_text(content)
+            cache_key = self.cache.make_key(
+                    "summary", PROMPT_VERSIONS["summary"], self.model, text, max_length=max_length
+                    )
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            if estimate_tokens(text) > settings.ai_summary_token_budget:
+                text = await self._condense(text)
 
             prompt = f"""
             请为以下文章生成一个简洁的中文摘要，要求：
@@ -47,11 +68,10 @@ class AIService:
             4. 只返回摘要内容，不要其他说明
             
             文章内容：
-            {content}
+            {text}
             """
 
-            response = await self.client.chat.completions.create(
-                 model="kimi-k2-0711-preview",
+            response = await self.llm.chat(
                  messages=[{"role": "user", "content": prompt}],
                  temperature=0.7 
                 )
@@ -59,6 +79,7 @@ class AIService:
             if  response.choices and response.choices[0].message.content:
                 text = response.choices[0].message.content.strip()
                 logger.info(f"AI生成摘要成功，长度为：{len(text)}")
+                await self.cache.set(cache_key, text)
                 return text
             else:
                 logger.warning("AI返回结果为空")
@@ -76,6 +97,13 @@ class AIService:
             if not self.client:
                 return self._fallback_classification(title, content)
 
+            text = truncate_to_tokens(html_to_text(content), settings.ai_analysis_token_budget)
+            cache_key = self.cache.make_key(
+                    "classify", PROMPT_VERSIONS["classify"], self.model, f"{title}\n{text}"
+                    )
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                return cached
 
             prompt = f"""
             请分析以下文章，将其分类到以下类别中，并给出每个类别的置信度（0-1之间）：
@@ -85,13 +113,12 @@ class AIService:
             {{"科技": 0.8, "生活": 0.2}}
             
             文章标题：{title}
-            文章内容：{content}...
+            文章内容：{text}...
             
             只返回JSON格式，不要其他说明。
             """
 
-            response = await self.client.chat.completions.create(
-                    model="kimi-k2-0711-preview",
+            response = await self.llm.chat(
                     messages=[{"role": "user", "content": prompt}],
                     temperature=0.3
                     )
@@ -100,6 +127,7 @@ class AIService:
                 try:
                     categories = json.loads(text)
                     logger.info(f"AI分类成功：{categories}")
+                    await self.cache.set(cache_key, categories)
                     return categories
                 except json.JSONDecodeError:
                     logger.warning(f"AI返回的不是有效的JSON: {text}")
@@ -117,6 +145,14 @@ class AIService:
             return self._fallback_keywords(content, max_keywords)
 
         try:
+            text = truncate_to_tokens(html_to_text(content), settings.ai_analysis_token_budget)
+            cache_key = self.cache.make_key(
+                    "keywords", PROMPT_VERSIONS["keywords"], self.model, text, max_keywords=max_keywords
+                    )
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
             prompt = f"""
             请从以下文章中提取{max_keywords}个最重要的关键词，要求：
             1. 关键词要准确反映文章主题
@@ -125,11 +161,10 @@ class AIService:
             4. 只返回关键词，用逗号分隔，不要其他说明
             
             文章内容：
-            {content}
+            {text}
             """
 
-            response = await self.client.chat.completions.create(
-                    model="kimi-k2-0711-preview",
+            response = await self.llm.chat(
                     messages=[{"role": "user", "content": prompt}],
                     temperature=0.3
                     )
@@ -139,6 +174,7 @@ class AIService:
 
                 keywords = [kw for kw in keywords if len(kw) <= 10 and not kw.startswith("请")]
                 logger.info(f"AI关键词提取成功: {keywords}")
+                await self.cache.set(cache_key, keywords[:max_keywords])
                 return keywords[:max_keywords]
             else:
                 logger.warning("AI返回内容为空")
@@ -147,6 +183,167 @@ class AIService:
             logger.error(f"AI关键词提取失败: {str(e)}")
             return self._fallback_keywords(content, max_keywords)
 
+    async def enrich_article(
+            self,
+            title: str,
+            content: str,
+            max_summary_length: int = 500,
+            max_keywords: int = 5
+            ) -> Dict[str, Any]:
+        """一次请求同时生成摘要、分类与关键词
+
+        模型返回JSON，逐字段校验；缺失或不合法的字段分别回退到对应的 _fallback_* 方法。
+        返回 {"summary": str, "category": Dict[str, float], "keywords": List[str]}
+        """
+        fields: Dict[str, Any] = {}
+        try:
+            if not self.client:
+                logger.error("AI client 未初始化")
+                return self._fill_enrichment_fallbacks(fields, title, content, max_summary_length, max_keywords)
+
+            text = html_to_text(content)
+            cache_key = self.cache.make_key(
+                    "enrich", PROMPT_VERSIONS["enrich"], self.model, f"{title}\n{text}",
+                    max_summary_length=max_summary_length, max_keywords=max_keywords
+                    )
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            # 长文先分块摘要（map），再由合并请求生成最终结果（reduce）
+            if estimate_tokens(text) > settings.ai_summary_token_budget:
+                text = await self._condense(text)
+
+            prompt = f"""
+            请分析以下文章，并以JSON对象返回以下三个字段：
+            1. "summary": 简洁的中文摘要，长度控制在{max_summary_length}字以内，保留核心信息和关键观点
+            2. "category": 文章在以下类别上的置信度（0-1之间）：科技、生活、财经、教育、娱乐、体育、其他，
+               例如 {{"科技": 0.8, "生活": 0.2}}
+            3. "keywords": {max_keywords}个最重要的关键词数组，每个关键词1-4个字，按重要性排序
+
+            文章标题：{title}
+            文章内容：
+            {text}
+
+            只返回JSON对象，不要其他说明。
+            """
+
+            response = await self.llm.chat(
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.3,
+                    response_format={"type": "json_object"}
+                    )
+
+            if response.choices and response.choices[0].message.content:
+                fields = self._parse_enrichment(response.choices[0].message.content, max_keywords)
+                logger.info(f"AI合并富化成功，有效字段: {list(fields)}")
+            else:
+                logger.warning("AI返回内容为空")
+
+            result = self._fill_enrichment_fallbacks(fields, title, content, max_summary_length, max_keywords)
+            if len(fields) == len(ENRICH_FIELD_SCHEMAS):
+                await self.cache.set(cache_key, result)
+            return result
+
+        except Exception as e:
+            logger.error(f"AI合并富化失败: {str(e)}")
+            return self._fill_enrichment_fallbacks(fields, title, content, max_summary_length, max_keywords)
+
+    async def _condense(self, text: str) -> str:
+        """长文的map步骤：分块并行摘要，拼接为不超过摘要预算的中间文本"""
+        chunks = chunk_text(text, settings.ai_chunk_tokens)
+        if len(chunks) > settings.ai_max_chunks:
+            logger.warning(f"文章分块数 {len(chunks)} 超过上限，只处理前 {settings.ai_max_chunks} 块")
+            chunks = chunks[:settings.ai_max_chunks]
+
+        semaphore = asyncio.Semaphore(settings.ai_map_concurrency)
+
+        async def summarize(chunk: str) -> str:
+            async with semaphore:
+                return await self._summarize_chunk(chunk)
+
+        partials = await asyncio.gather(*(summarize(chunk) for chunk in chunks))
+        logger.info(f"长文分块摘要完成，分块数: {len(chunks)}")
+        return truncate_to_tokens("\n".join(p for p in partials if p), settings.ai_summary_token_budget)
+
+    async def _summarize_chunk(self, chunk: str) -> str:
+        """单个分块的摘要，失败时用截断文本代替"""
+        fallback = self._fallback_summary(chunk, 300)
+        if not self.client:
+            return fallback
+
+        cache_key = self.cache.make_key("chunk_summary", PROMPT_VERSIONS["chunk_summary"], self.model, chunk)
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        prompt = f"""
+        以下是一篇长文章的一部分，请用中文概括这一部分的要点，不超过300字，只返回概括内容：
+
+        {chunk}
+        """
+        try:
+            response = await self.llm.chat(
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.3
+                    )
+            if response.choices and response.choices[0].message.content:
+                text = response.choices[0].message.content.strip()
+                await self.cache.set(cache_key, text)
+                return text
+        except Exception as e:
+            logger.warning(f"分块摘要失败: {str(e)}")
+        return fallback
+
+    def _parse_enrichment(self, text: str, max_keywords: int) -> Dict[str, Any]:
+        """解析并逐字段校验模型返回的JSON，只保留合法字段"""
+        text = re.sub(r'^```(?:json)?\s*|\s*```$', '', text.strip())
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            logger.warning(f"AI返回的不是有效的JSON: {text}")
+            return {}
+        if not isinstance(data, dict):
+            return {}
+
+        fields: Dict[str, Any] = {}
+        for name, schema in ENRICH_FIELD_SCHEMAS.items():
+            if name not in data:
+                continue
+            try:
+                fields[name] = schema.validate_python(data[name])
+            except ValidationError:
+                logger.warning(f"AI返回的字段 {name} 不合法: {data[name]}")
+
+        if "summary" in fields and not fields["summary"].strip():
+            del fields["summary"]
+        if "category" in fields and not fields["category"]:
+            del fields["category"]
+        if "keywords" in fields:
+            keywords = [kw.strip() for kw in fields["keywords"] if kw.strip()]
+            keywords = [kw for kw in keywords if len(kw) <= 10 and not kw.startswith("请")][:max_keywords]
+            if keywords:
+                fields["keywords"] = keywords
+            else:
+                del fields["keywords"]
+        return fields
+
+    def _fill_enrichment_fallbacks(
+            self,
+            fields: Dict[str, Any],
+            title: str,
+            content: str,
+            max_summary_length: int,
+            max_keywords: int
+            ) -> Dict[str, Any]:
+        """缺失字段使用简单算法补齐"""
+        return {
+            "summary": fields["summary"].strip() if "summary" in fields
+            else self._fallback_summary(content, max_summary_length),
+            "category": fields.get("category") or self._fallback_classification(title, content),
+            "keywords": fields.get("keywords") or self._fallback_keywords(content, max_keywords),
+        }
+
     def _fallback_classification(self, title: str, content: str) -> Dict[str, float]:
         """简单分类"""
         try:
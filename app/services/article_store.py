@@ -0,0 +1,242 @@
+"""
+文章持久化 - 共享文档与用户文章的批量 upsert、关键词索引
+"""
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import re
+
+from bs4 import BeautifulSoup
+from sqlalchemy import and_, case, func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.article import Article
+from app.models.article_keyword import ArticleKeyword
+from app.models.content_source import ContentSource
+from app.models.document import Document
+from app.services.text_prep import article_search_fields, article_simhash_fields, article_term_vector
+from app.services.urls import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+# 单条INSERT语句的最大行数，避免超出数据库参数个数上限
+BATCH_SIZE = 500
+
+SIMHASH_COLUMNS = ("simhash", "simhash_b0", "simhash_b1", "simhash_b2", "simhash_b3")
+
+# 与 article_keywords.keyword 列长度一致
+MAX_KEYWORD_LENGTH = 100
+
+
+def count_words(html: str) -> int:
+    """字数统计：去除HTML标签与空白后的字符数"""
+    if not html:
+        return 0
+    text = BeautifulSoup(html, 'html.parser').get_text(separator='', strip=True)
+    return len(re.sub(r'\s+', '', text))
+
+
+def normalize_article(article_data: Dict, source: ContentSource, document_id: Optional[int] = None) -> Dict:
+    """把抓取结果转换为 articles 表的一行（字数与图片JSON只计算一次）"""
+    html = article_data.get('content', '') or ''
+    images = article_data.get('images') or []
+    title = article_data.get('title') or "无标题"
+    summary = article_data.get('summary') or ''
+    url = (article_data.get('url') or '').strip()
+    return {
+        "title": title,
+        "content": html,
+        "url": url,
+        "canonical_url": canonicalize_url(url),
+        "author": article_data.get('author') or '未知作者',
+        "published_at": article_data.get('published_at'),
+        "source_id": source.id,
+        "user_id": source.user_id,
+        "document_id": document_id,
+        "source_type": source.type,
+        "is_read": False,
+        "images": json.dumps(images) if images else None,
+        "summary": summary,
+        "word_count": count_words(html),
+        "enrichment_status": "pending",
+        **article_search_fields(title, summary, html, settings.search_index_max_chars),
+        "term_vector": article_term_vector(
+            title, summary, html, settings.search_index_max_chars,
+            settings.recommend_hash_features, settings.recommend_max_terms
+        ),
+        **article_simhash_fields(title, html, settings.search_index_max_chars, settings.dedup_min_tokens),
+    }
+
+
+def normalize_keyword(keyword: str) -> str:
+    """关键词归一化：去除首尾空白、压缩空白并转小写，作为查询与存储的统一形式"""
+    return re.sub(r'\s+', ' ', keyword or '').strip().lower()[:MAX_KEYWORD_LENGTH]
+
+
+def replace_article_keywords(db: Session, article_id: int, keywords: List[str]):
+    """用新的关键词列表替换文章在 article_keywords 中的行（不提交）"""
+    normalized = list(dict.fromkeys(k for k in (normalize_keyword(k) for k in keywords) if k))
+    db.query(ArticleKeyword).filter(ArticleKeyword.article_id == article_id).delete(synchronize_session=False)
+    if normalized:
+        db.bulk_insert_mappings(
+            ArticleKeyword,  # type: ignore[arg-type]
+            [{"article_id": article_id, "keyword": keyword} for keyword in normalized]
+        )
+
+
+def _insert_for(db: Session):
+    """按数据库方言选择支持 ON CONFLICT 的 insert"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"不支持批量upsert的数据库: {dialect}")
+    return insert
+
+
+def upsert_documents(db: Session, articles: List[Dict]) -> Dict[str, int]:
+    """抓取到的全文写入共享文档表：INSERT ... ON CONFLICT (url) DO UPDATE
+
+    只写入有正文的条目，并刷新抓取时间；正文变化的文档重新标记为待富化。
+    不在此处提交。返回 规范URL -> 文档ID。
+    """
+    rows: Dict[str, Dict] = {}
+    for article_data in articles:
+        url = canonicalize_url(article_data.get('url', ''))
+        html = article_data.get('content') or ''
+        if not url or not html:
+            continue
+        images = article_data.get('images') or []
+        rows[url] = {
+            "url": url,
+            "title": article_data.get('title') or "无标题",
+            "content": html,
+            "content_hash": hashlib.sha256(html.encode()).hexdigest(),
+            "author": article_data.get('author') or '未知作者',
+            "published_at": article_data.get('published_at'),
+            "images": json.dumps(images) if images else None,
+            "enrichment_status": "pending",
+        }
+    if not rows:
+        return {}
+
+    insert = _insert_for(db)
+    values = list(rows.values())
+    for i in range(0, len(values), BATCH_SIZE):
+        stmt = insert(Document).values(values[i:i + BATCH_SIZE])
+        excluded = stmt.excluded
+        content_changed = excluded.content_hash != func.coalesce(Document.content_hash, '')
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Document.url],
+            set_={
+                "title": excluded.title,
+                "content": excluded.content,
+                "content_hash": excluded.content_hash,
+                "images": func.coalesce(excluded.images, Document.images),
+                "enrichment_status": case((content_changed, 'pending'), else_=Document.enrichment_status),
+                "crawled_at": func.now(),
+                "updated_at": func.now(),
+            }
+        )
+        db.execute(stmt)
+
+    return {url: document_id for url, document_id in db.query(Document.url, Document.id).filter(Document.url.in_(list(rows))).all()}
+
+
+def bulk_upsert_articles(
+        db: Session,
+        source_articles: List[Tuple[ContentSource, List[Dict]]],
+        document_ids: Optional[Dict[str, int]] = None
+        ) -> Dict[int, Dict]:
+    """把若干内容源的文章合并批量写入：INSERT ... ON CONFLICT (user_id, canonical_url) DO UPDATE
+
+    已存在的文章按原有回填规则更新：有新正文才覆盖正文与字数，图片只在为空时回填，
+    摘要只接受长度在 (50, 500) 之间的新摘要；正文变化的文章重新标记为待富化。
+    同一用户的多个内容源出现同一篇文章（规范URL相同）时只写一行，计入排在前面的源；已存在的文章保留原有链接。
+    不在此处提交，由调用方控制事务。
+    document_ids 为 规范URL -> 共享文档ID，文章与对应文档关联后富化结果可跨用户复用。
+    返回 source_id -> inserted / updated 数量，以及待富化的文章ID pending_ids。
+    """
+    document_ids = document_ids or {}
+    counts: Dict[int, Dict] = {}
+    rows: Dict[Tuple[int, str], Dict] = {}
+    owners: Dict[Tuple[int, str], int] = {}
+    # 同一条目分发给多个内容源时只解析一次正文（字数、检索字段、词频向量、SimHash）
+    normalized: Dict[str, Dict] = {}
+    for source, articles in source_articles:
+        counts[source.id] = {"inserted": 0, "updated": 0, "pending_ids": []}  # type: ignore[index]
+        for article_data in articles:
+            url = canonicalize_url(article_data.get('url', ''))
+            if url not in normalized:
+                normalized[url] = normalize_article(article_data, source, document_ids.get(url))
+            row = {**normalized[url], "source_id": source.id, "user_id": source.user_id, "source_type": source.type}
+            key = (row["user_id"], url)
+            if url and owners.get(key, source.id) == source.id:
+                rows[key] = row
+                owners[key] = source.id  # type: ignore[assignment]
+    if not rows:
+        return counts
+
+    user_ids = list({user_id for user_id, _ in rows})
+    urls = list({url for _, url in rows})
+    existing = rows.keys() & {
+        (user_id, url) for user_id, url in
+        db.query(Article.user_id, Article.canonical_url)
+        .filter(Article.user_id.in_(user_ids), Article.canonical_url.in_(urls)).all()
+    }
+
+    insert = _insert_for(db)
+    values = list(rows.values())
+    for i in range(0, len(values), BATCH_SIZE):
+        stmt = insert(Article).values(values[i:i + BATCH_SIZE])
+        excluded = stmt.excluded
+        has_content = func.length(func.coalesce(excluded.content, '')) > 0
+        summary_length = func.length(func.coalesce(excluded.summary, ''))
+        content_changed = and_(has_content, excluded.content != func.coalesce(Article.content, ''))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Article.user_id, Article.canonical_url],
+            set_={
+                "document_id": func.coalesce(excluded.document_id, Article.document_id),
+                "content": case((has_content, excluded.content), else_=Article.content),
+                "word_count": case((has_content, excluded.word_count), else_=Article.word_count),
+                "images": case(
+                    (func.coalesce(Article.images, '') == '', excluded.images),
+                    else_=Article.images
+                ),
+                "summary": case(
+                    (and_(summary_length > 50, summary_length < 500), excluded.summary),
+                    else_=Article.summary
+                ),
+                "enrichment_status": case((content_changed, 'pending'), else_=Article.enrichment_status),
+                "search_body": case((has_content, excluded.search_body), else_=Article.search_body),
+                "term_vector": case((has_content, excluded.term_vector), else_=Article.term_vector),
+                **{
+                    column: case((has_content, getattr(excluded, column)), else_=getattr(Article, column))
+                    for column in SIMHASH_COLUMNS
+                },
+                # 正文变化后重新参与近似重复判断
+                "duplicate_of": case((content_changed, None), else_=Article.duplicate_of),
+                "updated_at": func.now(),
+            }
+        )
+        db.execute(stmt)
+
+    for key, source_id in owners.items():
+        counts[source_id]["updated" if key in existing else "inserted"] += 1
+    for article_id, user_id, url in db.query(Article.id, Article.user_id, Article.canonical_url).filter(
+            Article.user_id.in_(user_ids), Article.canonical_url.in_(urls), Article.enrichment_status == "pending"
+            ).all():
+        source_id = owners.get((user_id, url))
+        if source_id is not None:
+            counts[source_id]["pending_ids"].append(article_id)
+
+    inserted = len(rows) - len(existing)
+    pending = sum(len(source_counts["pending_ids"]) for source_counts in counts.values())
+    logger.info(
+        f"批量保存文章: 内容源 {len(counts)} 个，新增 {inserted}，更新 {len(existing)}，待富化 {pending}"
+    )
+    return counts
@@ -0,0 +1,191 @@
+"""
+浏览器池 - 进程内共享的Chromium实例与可复用的BrowserContext
+"""
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+import asyncio
+import logging
+
+from playwright.async_api import (
+    Browser,
+    BrowserContext,
+    Error as PlaywrightError,
+    Page,
+    Playwright,
+    TimeoutError as PlaywrightTimeoutError,
+    async_playwright,
+)
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+
+class _PooledContext:
+    """池中的浏览器上下文及其使用计数"""
+
+    def __init__(self, context: BrowserContext, generation: int):
+        self.context = context
+        self.generation = generation
+        self.pages_served = 0
+
+
+class BrowserPool:
+    """共享浏览器池
+
+    - 每个进程只启动一个Chromium，崩溃或断开后自动重启
+    - BrowserContext 数量受 max_contexts 限制，用完后放回空闲列表复用
+    - 单个上下文服务 max_pages_per_context 个页面后回收，避免内存膨胀
+    """
+
+    def __init__(self, headless: bool = True, max_contexts: int = 4, max_pages_per_context: int = 50):
+        self.headless = headless
+        self.max_contexts = max_contexts
+        self.max_pages_per_context = max_pages_per_context
+
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._generation = 0
+        self._idle: List[_PooledContext] = []
+        self._in_use = 0
+        self._semaphore = asyncio.Semaphore(max_contexts)
+        self._lock = asyncio.Lock()
+        self._closed = False
+
+        self._stats: Dict[str, int] = {
+            "browser_launches": 0,
+            "contexts_created": 0,
+            "contexts_recycled": 0,
+            "pages_served": 0,
+            "crashes": 0,
+        }
+
+    def _browser_healthy(self) -> bool:
+        """健康检查：浏览器存在且仍连接"""
+        return self._browser is not None and self._browser.is_connected()
+
+    async def _ensure_browser(self) -> Browser:
+        """确保浏览器可用，不可用时（首次/崩溃）重新启动"""
+        async with self._lock:
+            if self._closed:
+                raise RuntimeError("浏览器池已关闭")
+
+            if self._browser_healthy():
+                return self._browser  # type: ignore[return-value]
+
+            if self._browser is not None:
+                logger.warning("浏览器已断开，正在重启Chromium")
+                self._stats["crashes"] += 1
+                await self._discard_browser()
+
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+
+            self._browser = await self._playwright.chromium.launch(
+                    headless=self.headless,
+                    args=['--no-sandbox', '--disable-dev-shm-usage']
+                    )
+            self._generation += 1
+            self._stats["browser_launches"] += 1
+            logger.info(f"Chromium已启动（第{self._generation}代）")
+            return self._browser
+
+    async def _discard_browser(self):
+        """丢弃当前浏览器及其全部空闲上下文"""
+        idle, self._idle = self._idle, []
+        for pooled in idle:
+            await self._close_context(pooled)
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception as e:
+                logger.debug(f"关闭浏览器失败: {str(e)}")
+            self._browser = None
+
+    async def _close_context(self, pooled: _PooledContext):
+        try:
+            await pooled.context.close()
+        except Exception as e:
+            logger.debug(f"关闭浏览器上下文失败: {str(e)}")
+        self._stats["contexts_recycled"] += 1
+
+    async def _acquire_context(self) -> _PooledContext:
+        browser = await self._ensure_browser()
+        while self._idle:
+            pooled = self._idle.pop()
+            if pooled.generation == self._generation:
+                return pooled
+            await self._close_context(pooled)
+
+        context = await browser.new_context(
+                viewport={"width": 1920, "height": 1080},
+                user_agent=USER_AGENT
+                )
+        self._stats["contexts_created"] += 1
+        return _PooledContext(context, self._generation)
+
+    async def _release_context(self, pooled: _PooledContext, broken: bool):
+        stale = pooled.generation != self._generation or not self._browser_healthy()
+        exhausted = pooled.pages_served >= self.max_pages_per_context
+        if broken or stale or exhausted or self._closed:
+            await self._close_context(pooled)
+        else:
+            self._idle.append(pooled)
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """借出一个页面，使用完毕后自动关闭页面并归还上下文"""
+        async with self._semaphore:
+            pooled = await self._acquire_context()
+            self._in_use += 1
+            broken = False
+            page = None
+            try:
+                page = await pooled.context.new_page()
+                yield page
+            except PlaywrightTimeoutError:
+                raise
+            except PlaywrightError:
+                # 页面/上下文崩溃，回收该上下文
+                broken = True
+                raise
+            finally:
+                self._in_use -= 1
+                pooled.pages_served += 1
+                self._stats["pages_served"] += 1
+                if page is not None:
+                    try:
+                        await page.close()
+                    except Exception:
+                        broken = True
+                await self._release_context(pooled, broken)
+
+    async def close(self):
+        """关闭浏览器池（应用关闭时调用）"""
+        async with self._lock:
+            self._closed = True
+            await self._discard_browser()
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+        logger.info("浏览器池已关闭")
+
+    def get_status(self) -> Dict:
+        """浏览器池状态"""
+        return {
+            "browser_connected": self._browser_healthy(),
+            "generation": self._generation,
+            "max_contexts": self.max_contexts,
+            "in_use": self._in_use,
+            "idle": len(self._idle),
+            **self._stats
+        }
+
+
+browser_pool = BrowserPool(
+        headless=settings.browser_headless,
+        max_contexts=settings.browser_pool_size,
+        max_pages_per_context=settings.browser_context_max_pages
+        )
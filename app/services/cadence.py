@@ -0,0 +1,86 @@
+"""
+发布节奏估计 - 根据已入库文章的 published_at 学习每个源的轮询间隔
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+import logging
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.article import Article
+
+logger = logging.getLogger(__name__)
+
+
+def ewma_interval(timestamps: List[datetime], alpha: float) -> Optional[float]:
+    """发布间隔的指数加权移动平均（分钟），越新的间隔权重越大"""
+    ordered = sorted(timestamps)
+    gaps = [
+        (later - earlier).total_seconds() / 60
+        for earlier, later in zip(ordered, ordered[1:])
+        if later > earlier
+    ]
+    if not gaps:
+        return None
+
+    estimate = gaps[0]
+    for gap in gaps[1:]:
+        estimate = alpha * gap + (1 - alpha) * estimate
+    return estimate
+
+
+def estimate_cadence(timestamps: List[datetime]) -> Optional[Dict]:
+    """估计单个源的轮询间隔，样本不足时返回None（使用fetch_frequency）"""
+    if len(timestamps) < settings.cadence_min_samples:
+        return None
+
+    interval = ewma_interval(timestamps, settings.cadence_alpha)
+    if interval is None:
+        return None
+
+    interval = max(settings.cadence_min_minutes, min(interval, settings.cadence_max_minutes))
+    last_published = max(timestamps)
+    return {
+        "interval_minutes": interval,
+        "samples": len(timestamps),
+        "last_published": last_published,
+        "predicted_next": last_published + timedelta(minutes=interval),
+    }
+
+
+def learn_cadences(db: Session, source_ids: Iterable[int]) -> Dict[int, Dict]:
+    """批量学习多个源的发布节奏（每个源取最近 cadence_history_size 篇文章）"""
+    source_ids = list(source_ids)
+    if not source_ids:
+        return {}
+
+    ranked = (
+        db.query(
+            Article.source_id.label("source_id"),
+            Article.published_at.label("published_at"),
+            func.row_number().over(
+                partition_by=Article.source_id,
+                order_by=Article.published_at.desc()
+            ).label("rn"),
+        )
+        .filter(Article.source_id.in_(source_ids), Article.published_at.isnot(None))
+        .subquery()
+    )
+    rows = (
+        db.query(ranked.c.source_id, ranked.c.published_at)
+        .filter(ranked.c.rn <= settings.cadence_history_size)
+        .all()
+    )
+
+    history: Dict[int, List[datetime]] = {}
+    for source_id, published_at in rows:
+        history.setdefault(source_id, []).append(published_at)
+
+    cadences = {}
+    for source_id, timestamps in history.items():
+        estimate = estimate_cadence(timestamps)
+        if estimate is not None:
+            cadences[source_id] = estimate
+    return cadences
@@ -1,13 +1,18 @@
-from playwright.async_api import async_playwright
 import feedparser
+import httpx
 from bs4 import BeautifulSoup
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
 from datetime import datetime
+import hashlib
 import logging
 from urllib.parse import urlparse
 import bleach
 import re
+from app.core.config import settings
+from app.core.metrics import metrics
 from app.services.ai_service import AIService
+from app.services.browser_pool import USER_AGENT, BrowserPool, browser_pool
+from app.services.worker_pool import parse_pool
 
 logger = logging.getLogger(__name__)
 
@@ -20,44 +25,216 @@ ALLOWED_ATTRS = {
     "a": ["herf", "title", "rel", "target"]
         }
 
+# 提取选择器：浏览器抓取与静态HTML抓取共用
+TITLE_SELECTORS = [
+    'h1',
+    'meta[property="og:title"]',
+    'meta[name="twitter:title"]',
+    '.article-title',
+    '.post-title',
+    '.entry-title',
+    '.headline',
+    'title'
+]
+
+CONTENT_SELECTORS = [
+    'article',
+    '.article-content',
+    '.post-content',
+    '.entry-content',
+    '.content',
+    '.post',
+    '.story-content',
+    '.main-content',
+    '.post',
+    '.entry',
+    '.blog-post',
+    '.blog-entry',
+    '.post-text',
+    '.entry-text',
+    '.post-body',
+    '.entry-body'
+]
+
+CONTENT_NOISE_SELECTORS = ['script', 'style', 'nav', '.advertisement', '.sidebar', '.comments']
+
+AUTHOR_META_SELECTORS = [
+    'meta[name="author"]',
+    'meta[property="article:author"]',
+    'meta[property="og:author"]',
+    'meta[name="twitter:creator"]'
+]
+
+AUTHOR_SELECTORS = [
+    '.author',
+    '.byline',
+    '.post-author',
+    '.article-author',
+    '.entry-author',
+    '[rel="author"]',
+    '.author-name',
+    '.writer',
+    '.contributor',
+    'dc:creator'
+]
+
+DATE_SELECTORS = [
+    'meta[property="article:published_time"]',
+    'meta[name="publish_date"]',
+    'time',
+    '.publish-date',
+    '.post-date',
+    '.article-date',
+    '.entry-date'
+]
+
+CONTENT_IMAGE_SELECTOR = 'article img, .content img, .post-content img, .article-content img'
+FALLBACK_IMAGE_SELECTOR = 'img[src*="cover"], img[src*="hero"], img[src*="banner"]'
+
+# 典型的前端渲染页面特征（空挂载点、要求开启JS）
+JS_SHELL_PATTERNS = [
+    re.compile(r'<div[^>]+id=["\'](root|app|__next|__nuxt)["\'][^>]*>\s*</div>', re.IGNORECASE),
+    re.compile(r'<noscript[^>]*>[^<]*(enable|启用|开启)[^<]*javascript', re.IGNORECASE),
+]
+
+FETCH_TIERS = ("auto", "http", "browser")
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """共享的HTTP客户端（复用连接池）"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=settings.static_fetch_timeout,
+                headers={'User-Agent': USER_AGENT}
+                )
+    return _http_client
+
+
+async def close_http_client():
+    """关闭共享HTTP客户端（应用关闭时调用）"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def get_tier_stats() -> Dict:
+    """各抓取层级服务的比例"""
+    served = {tier: metrics.counter(f"crawler.tier.{tier}") for tier in ("http", "browser")}
+    total = sum(served.values())
+    return {
+        "served": served,
+        "fractions": {tier: (count / total if total else 0.0) for tier, count in served.items()},
+        "escalated": metrics.counter("crawler.tier.escalated"),
+        "failed": metrics.counter("crawler.tier.failed"),
+    }
+
 
 
 class ModernWebCrawler:
     """网页内容抓取器 --使用PlayWeight"""
 
-    def __init__(self, headless: bool = True, timeout: int = 30000):
+    def __init__(self, timeout: int = 30000, pool: Optional[BrowserPool] = None):
         self.timeout = timeout
-        self.headless = headless
+        self.pool = pool or browser_pool
         self.ai_service = AIService()
 
 
     async def crawl_webpage(self, url: str, config: Optional[Dict] = None) -> Optional[Dict]:
-        """异步抓取网页内容"""
-        try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(
-                        headless=self.headless,
-                        args=['--no-sandbox', '--disable-dev-shm-usage']
-                        )
-                page = await browser.new_page()
-
-                await page.set_viewport_size({"width": 1920, "height": 1080})
-                await page.set_extra_http_headers({
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                    })
+        """异步抓取网页内容
+
+        分层抓取：先用普通HTTP请求+静态解析，质量不足（如前端渲染页面）时再升级到浏览器。
+        fetch_config 中可用 fetch_tier 覆盖：auto（默认）、http（只用HTTP）、browser（只用浏览器），
+        static_min_score 覆盖静态结果的质量阈值。
+        """
+        config = config or {}
+        tier = config.get('fetch_tier', 'auto')
+        if tier not in FETCH_TIERS:
+            logger.warning(f"未知的抓取层级 {tier}，使用auto")
+            tier = 'auto'
+
+        article_data = None
+        if tier in ('auto', 'http'):
+            article_data = await self._crawl_static(url, config, accept_any=(tier == 'http'))
+            if article_data is not None:
+                metrics.incr("crawler.tier.http")
+            elif tier == 'auto':
+                metrics.incr("crawler.tier.escalated")
+
+        if article_data is None and tier in ('auto', 'browser'):
+            article_data = await self._crawl_browser(url, config)
+            if article_data:
+                metrics.incr("crawler.tier.browser")
+
+        if not article_data:
+            metrics.incr("crawler.tier.failed")
+            return None
 
+        # AI富化由入库后的富化队列异步完成
+        return article_data
+
+    async def _crawl_browser(self, url: str, config: Dict) -> Optional[Dict]:
+        """使用浏览器池中的页面抓取"""
+        try:
+            async with self.pool.page() as page:
                 await page.goto(url, wait_until='networkidle', timeout=self.timeout)
 
                 await page.wait_for_load_state('domcontentloaded')
 
                 await self._wait_for_content(page, config)
 
-                article_data = await self._extract_article_data(page, url, config)
-
-                await browser.close()
-                return article_data
+                return await self._extract_article_data(page, url, config)
         except Exception as e:
             logger.error(f"抓取网页失败{url}:{str(e)}")
+            return None
+
+    async def _crawl_static(self, url: str, config: Dict, accept_any: bool = False) -> Optional[Dict]:
+        """普通HTTP请求+静态解析；质量分低于阈值时返回None交给浏览器"""
+        try:
+            response = await get_http_client().get(url)
+            content_type = response.headers.get('content-type', '')
+            if response.status_code != 200 or 'html' not in content_type:
+                logger.info(f"静态抓取不可用({response.status_code}, {content_type}): {url}")
+                return None
+            html = response.text
+        except Exception as e:
+            logger.info(f"静态抓取失败{url}: {str(e)}")
+            return None
+
+        # HTML解析与打分是CPU密集的同步操作，放到解析线程池执行
+        article_data, score = await parse_pool.run(self._extract_and_score, html, url)
+        min_score = float(config.get('static_min_score', settings.static_min_score))
+        metrics.observe("crawler.static_score", score)
+
+        if accept_any or score >= min_score:
+            logger.info(f"静态抓取成功（质量分 {score:.2f}）: {url}")
+            return article_data
+
+        logger.info(f"静态抓取质量不足（质量分 {score:.2f} < {min_score}），升级到浏览器: {url}")
+        return None
+
+    def _extract_and_score(self, html: str, url: str) -> Tuple[Dict, float]:
+        soup = BeautifulSoup(html, 'html.parser')
+        article_data = self._extract_static_article_data(soup, url)
+        return article_data, self._score_static_extraction(html, article_data)
+
+    def _score_static_extraction(self, html: str, article_data: Dict) -> float:
+        """静态抽取质量分（0-1）：正文长度为主，前端渲染特征大幅降权"""
+        content = article_data.get('content') or ''
+        if not content:
+            return 0.0
+
+        length_score = min(len(content) / 1000, 1.0)
+        has_title = 0.0 if article_data.get('title') in (None, '', '无标题') else 1.0
+        score = 0.8 * length_score + 0.2 * has_title
+
+        if any(pattern.search(html) for pattern in JS_SHELL_PATTERNS):
+            score *= 0.3
+        return score
 
     async def _wait_for_content(self, page, config: Optional[Dict] = None):
         """加载内容"""
@@ -116,37 +293,116 @@ class ModernWebCrawler:
 
             images = await self._extract_images(page, config)
 
-            summary = await self.ai_service.generate_summary(
-                    content=content,
-                    max_length=500
-                    )
-
-            category = await self.ai_service.classify_article(
-                    title=title,
-                    content=content
-                    )
-
-            keyword = await self.ai_service.extract_keywords(
-                    content=content,
-                    max_keywords=5
-                    )
-
             return {
                     'title': title,
                     'content': content,
                     'author': author or '未知作者',
-                    'keyword': keyword,
-                    'category': category,
                     'published_at': published_at,
                     'url': url,
                     'images': images,
                     'domain': urlparse(url).netloc,
-                    'summary': summary
                     }
         except Exception as e:
             logger.error(f"提取文章内容失败：{str(e)}")
             return {}
 
+    def _extract_static_article_data(self, soup: BeautifulSoup, url: str) -> Dict:
+        """从静态HTML中提取文章数据（与浏览器提取使用相同的选择器）"""
+        return {
+                'title': self._static_title(soup),
+                'content': self._static_content(soup),
+                'author': self._static_author(soup) or '未知作者',
+                'published_at': self._static_publish_date(soup),
+                'url': url,
+                'images': self._static_images(soup),
+                'domain': urlparse(url).netloc,
+                }
+
+    def _static_select_one(self, soup: BeautifulSoup, selector: str):
+        try:
+            return soup.select_one(selector)
+        except Exception:
+            logger.debug(f"静态选择器不受支持: {selector}")
+            return None
+
+    def _static_title(self, soup: BeautifulSoup) -> str:
+        for selector in TITLE_SELECTORS:
+            element = self._static_select_one(soup, selector)
+            if element is None:
+                continue
+            title = element.get('content') if selector.startswith('meta') else element.get_text()
+            if isinstance(title, str) and title.strip():
+                return title.strip()
+        return "无标题"
+
+    def _static_content(self, soup: BeautifulSoup) -> str:
+        for selector in CONTENT_SELECTORS:
+            element = self._static_select_one(soup, selector)
+            if element is None:
+                continue
+            for noise in element.select(', '.join(CONTENT_NOISE_SELECTORS)):
+                noise.decompose()
+            content = element.get_text()
+            if content and len(content.strip()) > 100:
+                return content.strip()
+        return ""
+
+    def _static_author(self, soup: BeautifulSoup) -> Optional[str]:
+        for selector in AUTHOR_META_SELECTORS:
+            element = self._static_select_one(soup, selector)
+            author = element.get('content') if element is not None else None
+            if isinstance(author, str) and author.strip():
+                return author.strip()
+
+        for selector in AUTHOR_SELECTORS:
+            element = self._static_select_one(soup, selector)
+            if element is None:
+                continue
+            cleaned_author = self._clean_author_text(element.get_text().strip())
+            if cleaned_author:
+                return cleaned_author
+        return None
+
+    def _static_publish_date(self, soup: BeautifulSoup) -> Optional[datetime]:
+        for selector in DATE_SELECTORS:
+            element = self._static_select_one(soup, selector)
+            if element is None:
+                continue
+            date_str = element.get('content') if selector.startswith('meta') else element.get_text()
+            if isinstance(date_str, str) and date_str.strip():
+                return self._parse_date(date_str)
+        return None
+
+    def _static_images(self, soup: BeautifulSoup) -> List[str]:
+        images: List[str] = []
+        for selector in ('meta[property="og:image"]', 'meta[name="twitter:image"]'):
+            element = self._static_select_one(soup, selector)
+            src = element.get('content') if element is not None else None
+            if isinstance(src, str) and src and not src.startswith('data:'):
+                images.append(src)
+
+        for img in soup.select(CONTENT_IMAGE_SELECTOR):
+            src = img.get('src')
+            if not isinstance(src, str) or not src or src.startswith('data:'):
+                continue
+            try:
+                width, height = img.get('width'), img.get('height')
+                if width and height and not (int(width) > 200 and int(height) > 200):  # type: ignore[arg-type]
+                    continue
+            except (TypeError, ValueError):
+                pass
+            images.append(src)
+            if len(images) >= 10:
+                break
+
+        if not images:
+            for img in soup.select(FALLBACK_IMAGE_SELECTOR):
+                src = img.get('src')
+                if isinstance(src, str) and src and not src.startswith('data:'):
+                    images.append(src)
+
+        return list(dict.fromkeys(images))[:10]
+
     async def _generate_summary(self, content: str) -> str:
         """AI生成文章摘要"""
         try:
@@ -189,18 +445,7 @@ class ModernWebCrawler:
 
     async def _extract_title(self, page, config: Optional[Dict] = None) -> str:
         """提取标题"""
-        title_selectors = [
-            'h1',
-            'meta[property="og:title"]',
-            'meta[name="twitter:title"]',
-            '.article-title',
-            '.post-title',
-            '.entry-title',
-            '.headline',
-            'title'
-        ]
-
-        for selector in title_selectors:
+        for selector in TITLE_SELECTORS:
             try:
                 if selector.startswith('meta'):
                     element = await page.query_selector(selector)
@@ -222,39 +467,18 @@ class ModernWebCrawler:
 
     async def _extract_content(self, page, config: Optional[Dict] = None) -> str:
         """提取内容"""
-        content_selectors = [
-            'article',
-            '.article-content',
-            '.post-content',
-            '.entry-content',
-            '.content',
-            '.post',
-            '.story-content',
-            '.main-content',
-            '.post',
-            '.entry',
-            '.blog-post',
-            '.blog-entry',
-            '.post-text',
-            '.entry-text',
-            '.post-body',
-            '.entry-body'
-        ]
-
-
-        for selector in content_selectors:
+        for selector in CONTENT_SELECTORS:
             try:
                 element = await page.query_selector(selector)
                 if element:
                     await page.evaluate("""
-                                        (element) => {
-                                            const selectors = ['script', 'style', 'nav', '.advertisement', '.sidebar', '.comments'];
+                                        ([element, selectors]) => {
                                             selectors.forEach(sel => {
                                                 const elements = element.querySelectorAll(sel);
                                                 elements.forEach(el => el.remove());
                                                 });
                                             }
-                                        """, element)
+                                        """, [element, CONTENT_NOISE_SELECTORS])
                     content = await element.text_content()
 
                     if content and len(content.strip()) > 100:
@@ -270,14 +494,7 @@ class ModernWebCrawler:
         """提取作者信息 - 从多个位置寻找"""
         try:
             # 1. 先尝试从meta标签获取作者
-            meta_selectors = [
-                'meta[name="author"]',
-                'meta[property="article:author"]',
-                'meta[property="og:author"]',
-                'meta[name="twitter:creator"]'
-            ]
-
-            for selector in meta_selectors:
+            for selector in AUTHOR_META_SELECTORS:
                 element = await page.query_selector(selector)
                 if element:
                     author = await element.get_attribute('content')
@@ -286,20 +503,7 @@ class ModernWebCrawler:
                         return author.strip()
 
             # 2. 从页面元素获取作者
-            author_selectors = [
-                '.author',
-                '.byline',
-                '.post-author',
-                '.article-author',
-                '.entry-author',
-                '[rel="author"]',
-                '.author-name',
-                '.writer',
-                '.contributor',
-                'dc:creator'
-            ]
-
-            for selector in author_selectors:
+            for selector in AUTHOR_SELECTORS:
                 try:
                     element = await page.query_selector(selector)
                     if element:
@@ -677,16 +881,7 @@ class ModernWebCrawler:
 
     async def _extract_publish_date(self, page, config: Optional[Dict] = None) -> Optional[datetime]:
         """提取发布时间"""
-        date_selectors = [
-            'meta[property="article:published_time"]',
-            'meta[name="publish_date"]',
-            'time',
-            '.publish-date',
-            '.post-date',
-            '.article-date',
-            '.entry-date'
-        ]
-        for selector in date_selectors:
+        for selector in DATE_SELECTORS:
             try:
                 if selector.startswith('meta'):
                     element = await page.query_selector(selector)
@@ -724,7 +919,7 @@ class ModernWebCrawler:
                     images.append(twitter_src)
 
             # 2. 从内容中提取图片
-            content_images = await page.query_selector_all('article img, .content img, .post-content img, .article-content img')
+            content_images = await page.query_selector_all(CONTENT_IMAGE_SELECTOR)
             for img in content_images:
                 src = await img.get_attribute('src')
                 if src and not src.startswith('data:') and src not in images:
@@ -745,7 +940,7 @@ class ModernWebCrawler:
 
             # 3. 如果没有找到图片，尝试备用选择器
             if not images:
-                fallback_images = await page.query_selector_all('img[src*="cover"], img[src*="hero"], img[src*="banner"]')
+                fallback_images = await page.query_selector_all(FALLBACK_IMAGE_SELECTOR)
                 for img in fallback_images:
                     src = await img.get_attribute('src')
                     if src and not src.startswith('data:') and src not in images:
@@ -846,54 +1041,109 @@ class RSSCrawler:
         return list(dict.fromkeys(urls))
 
 
-    def crawl_rss(self, rss_url: str) -> List[Dict]:
-        """抓取RSS内容"""
+    async def crawl_rss(self, rss_url: str) -> List[Dict]:
+        """抓取RSS内容（无条件请求）"""
+        return (await self.fetch_feed(rss_url))["articles"]
+
+    async def fetch_feed(
+            self,
+            rss_url: str,
+            etag: Optional[str] = None,
+            last_modified: Optional[str] = None,
+            content_hash: Optional[str] = None
+            ) -> Dict:
+        """条件请求抓取RSS
+
+        携带上次的 ETag / Last-Modified 请求；304 或响应体哈希未变时直接返回，不再解析。
+        返回 status: ok / not_modified / unchanged / error，以及新的校验信息。
+        """
+        result: Dict = {
+                "status": "error",
+                "articles": [],
+                "etag": etag,
+                "last_modified": last_modified,
+                "content_hash": content_hash
+                }
         try:
             logger.info(f"开始抓取RSS: {rss_url}")
-            feed = feedparser.parse(rss_url)
-
-            logger.info(f"RSS解析结果 - 状态: {feed.get('status', 'unknown')}, 条目数: {len(feed.entries)}")
+            headers = {'User-Agent': USER_AGENT}
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+
+            response = await get_http_client().get(rss_url, headers=headers, timeout=self.timeout)
+
+            if response.status_code == 304:
+                logger.info(f"RSS未更新(304): {rss_url}")
+                result["status"] = "not_modified"
+                return result
+            response.raise_for_status()
+
+            result["etag"] = response.headers.get('etag')
+            result["last_modified"] = response.headers.get('last-modified')
+            result["content_hash"] = hashlib.sha256(response.content).hexdigest()
+            if content_hash and result["content_hash"] == content_hash:
+                logger.info(f"RSS内容未变化: {rss_url}")
+                result["status"] = "unchanged"
+                return result
+
+            # 解析与HTML净化放到解析线程池，不阻塞事件循环
+            result["articles"] = await parse_pool.run(
+                    self._parse_document, response.content, dict(response.headers), rss_url
+                    )
+            result["status"] = "ok"
+            return result
 
-            if not feed.entries:
-                logger.warning(f"RSS源没有条目: {rss_url}")
-                return []
+        except Exception as e:
+            logger.error(f"抓取RSS失败{rss_url}: {str(e)}")
+            return result
 
-            articles = []
-            for entry in feed.entries:
-                link = entry.get('link', '')
-                if isinstance(link, list) and link:
-                    if isinstance(link[0], dict):
-                        link = link[0].get('herf','')
-                    else:
-                        link = str(link[0])
-                elif not isinstance(link, str):
-                    link = str(link) if link else ''
-
-                html = self._rss_entry_html(entry)
-                sanitized = self._santize_html(html)
-
-                images = self._rss_entry_images(entry)
-
-                article_data = {
-                        'title': entry.get('title', '无标题'),
-                        'content': sanitized,
-                        'url': link,
-                        'author': entry.get('author', '未知作者'),
-                        'published_at': self._parse_date(entry.get('published', '')), #type: ignore
-                        'domain': urlparse(link).netloc if link else '', #type: ignore
-                        'images': images,
-                        'summary': ""#占位
-                        }
-                articles.append(article_data)
-                logger.debug(f"解析文章: {article_data['title']}")
+    def _parse_document(self, content: bytes, headers: Dict[str, str], rss_url: str) -> List[Dict]:
+        feed = feedparser.parse(content, response_headers=headers)
+        return self._parse_entries(feed, rss_url)
 
-            logger.info(f"成功解析 {len(articles)} 篇文章")
-            return articles
+    def _parse_entries(self, feed, rss_url: str) -> List[Dict]:
+        """解析RSS条目"""
+        logger.info(f"RSS解析结果 - 条目数: {len(feed.entries)}")
 
-        except Exception as e:
-            logger.error(f"抓取RSS失败{rss_url}: {str(e)}")
+        if not feed.entries:
+            logger.warning(f"RSS源没有条目: {rss_url}")
             return []
 
+        articles = []
+        for entry in feed.entries:
+            link = entry.get('link', '')
+            if isinstance(link, list) and link:
+                if isinstance(link[0], dict):
+                    link = link[0].get('herf','')
+                else:
+                    link = str(link[0])
+            elif not isinstance(link, str):
+                link = str(link) if link else ''
+
+            html = self._rss_entry_html(entry)
+            sanitized = self._santize_html(html)
+
+            images = self._rss_entry_images(entry)
+
+            article_data = {
+                    'title': entry.get('title', '无标题'),
+                    'content': sanitized,
+                    'url': link,
+                    'author': entry.get('author', '未知作者'),
+                    'published_at': self._parse_date(entry.get('published', '')), #type: ignore
+                    'updated_at': self._parse_date(entry.get('updated', '')), #type: ignore
+                    'domain': urlparse(link).netloc if link else '', #type: ignore
+                    'images': images,
+                    'summary': ""#占位
+                    }
+            articles.append(article_data)
+            logger.debug(f"解析文章: {article_data['title']}")
+
+        logger.info(f"成功解析 {len(articles)} 篇文章")
+        return articles
+
     def _parse_date(self, date_str: str) -> Optional[datetime]:
         """"解析RSS日期"""
         try:
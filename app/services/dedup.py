@@ -0,0 +1,119 @@
+"""
+近似重复检测 - 按SimHash分段索引查找同一用户的近似重复文章，重复文章归入同簇最早的一篇并跳过AI富化
+"""
+from collections import defaultdict
+from typing import Dict, List, Tuple
+import json
+import logging
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.article import Article
+from app.services.article_store import replace_article_keywords
+from app.services.text_prep import SIMHASH_BANDS
+
+logger = logging.getLogger(__name__)
+
+BAND_COLUMNS = [getattr(Article, f"simhash_b{band}") for band in range(SIMHASH_BANDS)]
+SIMHASH_MASK = (1 << 64) - 1
+# 每批查询候选的文章数，控制 IN 列表长度
+CANDIDATE_BATCH = 500
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin((a ^ b) & SIMHASH_MASK).count("1")
+
+
+def mark_near_duplicates(db: Session, article_ids: List[int], max_distance: int = settings.dedup_max_distance) -> List[int]:
+    """把近似重复的文章归入同簇最早的一篇（duplicate_of），状态设为 duplicate（不提交）
+
+    候选为同一用户、ID更小且至少一个SimHash分段相同的文章，取海明距离最小的一篇所在的簇；
+    簇首已富化时直接复用其摘要、关键词与分类。返回被标记为重复的文章ID。
+    每 CANDIDATE_BATCH 篇文章只查询一次候选（各分段列 IN 该批的分段值）和一次簇首。
+    """
+    if not article_ids:
+        return []
+    rows = (
+        db.query(Article.id, Article.user_id, Article.simhash, *BAND_COLUMNS)
+        .filter(Article.id.in_(article_ids), Article.simhash.isnot(None), Article.duplicate_of.is_(None))
+        .order_by(Article.id)
+        .all()
+    )
+
+    # 本次标记的 文章ID -> 簇首ID，后面的文章按更新后的簇归并
+    assigned: Dict[int, int] = {}
+    for i in range(0, len(rows), CANDIDATE_BATCH):
+        batch = rows[i:i + CANDIDATE_BATCH]
+        candidates = (
+            db.query(Article.id, Article.user_id, Article.simhash, Article.duplicate_of, *BAND_COLUMNS)
+            .filter(
+                Article.user_id.in_({row.user_id for row in batch}),
+                Article.id < batch[-1].id,
+                Article.simhash.isnot(None),
+                or_(*(column.in_({getattr(row, column.key) for row in batch}) for column in BAND_COLUMNS)),
+            )
+            .all()
+        )
+        by_band: Dict[Tuple[int, int, int], list] = defaultdict(list)
+        for candidate in candidates:
+            for band, column in enumerate(BAND_COLUMNS):
+                by_band[(candidate.user_id, band, getattr(candidate, column.key))].append(candidate)
+
+        matched: Dict[int, int] = {}
+        for row in batch:
+            seen = set()
+            matches = []
+            for band, column in enumerate(BAND_COLUMNS):
+                for candidate in by_band.get((row.user_id, band, getattr(row, column.key)), ()):
+                    if candidate.id >= row.id or candidate.id in seen:
+                        continue
+                    seen.add(candidate.id)
+                    distance = hamming_distance(candidate.simhash, row.simhash)
+                    if distance <= max_distance:
+                        cluster = assigned.get(candidate.id) or candidate.duplicate_of or candidate.id
+                        matches.append((distance, cluster))
+            if matches:
+                matched[row.id] = assigned[row.id] = min(matches)[1]
+        if not matched:
+            continue
+
+        canonicals = {
+            canonical.id: canonical for canonical in
+            db.query(Article.id, Article.enrichment_status, Article.summary, Article.keywords, Article.category)
+            .filter(Article.id.in_(set(matched.values()))).all()
+        }
+        for article_id, canonical_id in matched.items():
+            values = {"duplicate_of": canonical_id, "enrichment_status": "duplicate"}
+            canonical = canonicals.get(canonical_id)
+            if canonical is not None and canonical.enrichment_status == "done":
+                values.update(summary=canonical.summary, keywords=canonical.keywords, category=canonical.category)
+                replace_article_keywords(db, article_id, json.loads(canonical.keywords or "[]"))
+            db.query(Article).filter(Article.id == article_id).update(values, synchronize_session=False)
+
+    duplicates = list(assigned)
+    if duplicates:
+        # 每篇被跳过的文章至少省下一次富化调用
+        metrics.incr("dedup.duplicates", len(duplicates))
+        metrics.incr("dedup.llm_calls_avoided", len(duplicates))
+        logger.info(f"近似重复文章: {len(duplicates)} 篇，跳过AI富化")
+    return duplicates
+
+
+def propagate_enrichment(db: Session, article: Article):
+    """簇首富化完成后，把摘要、关键词与分类复制给同簇的重复文章（不提交）"""
+    duplicate_ids = [
+        article_id for (article_id,) in
+        db.query(Article.id).filter(Article.duplicate_of == article.id).all()
+    ]
+    if not duplicate_ids:
+        return
+    db.query(Article).filter(Article.id.in_(duplicate_ids)).update(
+        {"summary": article.summary, "keywords": article.keywords, "category": article.category},
+        synchronize_session=False
+    )
+    keywords = json.loads(article.keywords or "[]")  # type: ignore[arg-type]
+    for duplicate_id in duplicate_ids:
+        replace_article_keywords(db, duplicate_id, keywords)
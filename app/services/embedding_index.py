@@ -0,0 +1,421 @@
+"""
+相关文章向量索引 - 哈希字符n-gram嵌入，按用户分片存为内存映射文件，IVF倒排近似最近邻检索
+
+每个用户一个目录：
+    vectors.f32    float32 向量矩阵（容量 × 维数，容量不足时倍增）
+    ids.i64        行对应的文章ID
+    lists.i32      行所属的IVF聚类（-1 已删除，-2 尚未训练聚类）
+    centroids.npy  IVF聚类中心（有效行数达到 embedding_ivf_min_rows 后训练，行数翻倍时重训）
+    meta.json      行数、容量、维数、训练时的行数与是否已回填历史文章
+倒排表与 文章ID→行 映射在打开分片时由 ids/lists 重建，启动时不需要重新计算向量。
+"""
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import asyncio
+import itertools
+import json
+import logging
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.article import Article
+from app.services.text_prep import html_to_text
+
+logger = logging.getLogger(__name__)
+
+DELETED = -1
+UNTRAINED = -2
+NGRAM_SIZES = (1, 2, 3)
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 64
+ASSIGN_BATCH = 65536
+LOAD_BATCH = 500
+
+# 计算嵌入需要的列
+EMBEDDING_TEXT_COLUMNS = (Article.id, Article.title, Article.summary, Article.content)
+
+
+def embed_text(text: str, dim: int) -> np.ndarray:
+    """哈希字符n-gram嵌入：1~3字符的n-gram按crc32散列到dim维并带符号累加，再L2归一化
+
+    不依赖分词与模型，中文的二、三字片段和英文的字符三元组都能覆盖到
+    """
+    text = re.sub(r'\s+', ' ', (text or '').lower()).strip()
+    hashes = np.fromiter(
+        (zlib.crc32(text[i:i + n].encode()) for n in NGRAM_SIZES for i in range(len(text) - n + 1)),
+        dtype=np.uint32,
+    )
+    vector = np.zeros(dim, dtype=np.float32)
+    if hashes.size:
+        signs = np.where(hashes & 0x80000000, 1.0, -1.0).astype(np.float32)
+        np.add.at(vector, (hashes % dim).astype(np.int64), signs)
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+    return vector
+
+
+def embed_article(title: str, summary: str, content: str, dim: int, max_chars: int) -> np.ndarray:
+    """文章嵌入：标题计两次，加摘要与正文前max_chars字"""
+    body = f"{summary or ''} {html_to_text(content or '')}"[:max_chars]
+    return embed_text(f"{title or ''} {title or ''} {body}", dim)
+
+
+class EmbeddingShard:
+    """单个用户的向量分片（读写都在 lock 内进行）"""
+
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, path: Path, dim: int, ivf_min_rows: int, nprobe: int):
+        self.path = path
+        self.dim = dim
+        self.ivf_min_rows = ivf_min_rows
+        self.nprobe = nprobe
+        self.lock = threading.RLock()
+
+        path.mkdir(parents=True, exist_ok=True)
+        meta_path = path / "meta.json"
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text())
+            if meta["dim"] != dim:
+                raise ValueError(f"向量分片维数不一致: {meta['dim']} != {dim}")
+            self.count, self.capacity, self.trained_count = meta["count"], meta["capacity"], meta["trained_count"]
+            self.backfilled = meta.get("backfilled", False)
+        else:
+            self.count, self.capacity, self.trained_count = 0, self.INITIAL_CAPACITY, 0
+            self.backfilled = False
+        self._open_files()
+
+        centroids_path = path / "centroids.npy"
+        self.centroids: Optional[np.ndarray] = (
+            np.load(centroids_path) if self.trained_count and centroids_path.exists() else None
+        )
+        self._rebuild_lookup()
+        if not meta_path.exists():
+            self._save_meta()
+
+    def _memmap(self, name: str, dtype, shape: Tuple[int, ...]) -> np.memmap:
+        file = self.path / name
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        with open(file, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        return np.memmap(file, dtype=dtype, mode="r+", shape=shape)
+
+    def _open_files(self):
+        self.vectors = self._memmap("vectors.f32", np.float32, (self.capacity, self.dim))
+        self.ids = self._memmap("ids.i64", np.int64, (self.capacity,))
+        self.lists = self._memmap("lists.i32", np.int32, (self.capacity,))
+
+    def _ensure_capacity(self, needed: int):
+        if needed <= self.capacity:
+            return
+        self.flush()
+        self.capacity = max(self.capacity * 2, needed)
+        self._open_files()
+
+    def _rebuild_lookup(self):
+        """由 ids/lists 重建 文章ID→行 映射与IVF倒排表"""
+        live = np.flatnonzero(self.lists[:self.count] != DELETED)
+        self.row_of: Dict[int, int] = dict(zip(self.ids[live].tolist(), live.tolist()))
+        self.deleted = self.count - live.size
+        self.inverted: Dict[int, List[int]] = {}
+        if self.centroids is not None and live.size:
+            assigned = np.asarray(self.lists[live])
+            order = np.argsort(assigned, kind="stable")
+            boundaries = np.flatnonzero(np.diff(assigned[order])) + 1
+            for group in np.split(live[order], boundaries):
+                self.inverted[int(self.lists[group[0]])] = group.tolist()
+
+    def __len__(self) -> int:
+        return self.count - self.deleted
+
+    def __contains__(self, article_id: int) -> bool:
+        return article_id in self.row_of
+
+    def add(self, ids: Sequence[int], vectors: np.ndarray):
+        """写入向量；已存在的文章ID先删除旧行（同一批中重复的ID以最后一个为准）"""
+        with self.lock:
+            last = {int(article_id): i for i, article_id in enumerate(ids)}
+            if len(last) < len(ids):
+                keep = sorted(last.values())
+                ids, vectors = [int(ids[i]) for i in keep], vectors[keep]
+            self._remove_rows(ids)
+
+            n = len(ids)
+            start, end = self.count, self.count + n
+            self._ensure_capacity(end)
+            self.vectors[start:end] = vectors
+            self.ids[start:end] = ids
+            if self.centroids is not None:
+                assigned = np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+            else:
+                assigned = np.full(n, UNTRAINED, dtype=np.int32)
+            self.lists[start:end] = assigned
+            for article_id, row, cluster in zip(ids, range(start, end), assigned.tolist()):
+                self.row_of[int(article_id)] = row
+                if cluster >= 0:
+                    self.inverted.setdefault(cluster, []).append(row)
+            self.count = end
+
+            live = len(self)
+            if live >= self.ivf_min_rows and (self.centroids is None or live >= 2 * self.trained_count):
+                self._train()
+            self.flush()
+
+    def remove(self, ids: Iterable[int]):
+        """标记删除；删除行超过一半时压缩"""
+        with self.lock:
+            self._remove_rows(ids)
+            if self.deleted > self.count // 2 and self.count >= self.INITIAL_CAPACITY:
+                self._compact()
+            self.flush()
+
+    def _remove_rows(self, ids: Iterable[int]):
+        for article_id in ids:
+            row = self.row_of.pop(int(article_id), None)
+            if row is not None:
+                self.lists[row] = DELETED
+                self.deleted += 1
+
+    def _compact(self):
+        """去掉已删除的行，剩余行前移"""
+        live = np.flatnonzero(self.lists[:self.count] != DELETED)
+        if live.size == self.count:
+            return
+        n = live.size
+        self.vectors[:n] = self.vectors[live]
+        self.ids[:n] = self.ids[live]
+        self.lists[:n] = self.lists[live]
+        self.count = n
+        self._rebuild_lookup()
+
+    def _train(self):
+        """球面k-means训练IVF聚类中心（抽样训练，全量分批分配）"""
+        self._compact()
+        rng = np.random.default_rng(0)
+        nlist = int(min(max(np.sqrt(self.count), 16), 4096))
+        sample_rows = np.sort(rng.choice(self.count, size=min(self.count, nlist * KMEANS_SAMPLE_PER_LIST), replace=False))
+        sample = np.asarray(self.vectors[sample_rows])
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            assigned = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assigned, sample)
+            nonempty = np.bincount(assigned, minlength=nlist) > 0
+            centroids[nonempty] = sums[nonempty]
+            centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+
+        for start in range(0, self.count, ASSIGN_BATCH):
+            block = np.asarray(self.vectors[start:start + ASSIGN_BATCH])
+            self.lists[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        self.centroids = centroids.astype(np.float32)
+        self.trained_count = self.count
+        tmp_path = self.path / "centroids.tmp.npy"
+        np.save(tmp_path, self.centroids)
+        os.replace(tmp_path, self.path / "centroids.npy")
+        self._rebuild_lookup()
+        metrics.incr("embedding.trainings")
+        logger.info(f"向量分片训练完成 {self.path.name}: 行数 {self.count}，聚类数 {nlist}")
+
+    def vector(self, article_id: int) -> Optional[np.ndarray]:
+        with self.lock:
+            row = self.row_of.get(article_id)
+            return None if row is None else np.array(self.vectors[row])
+
+    def search(self, vector: np.ndarray, k: int, exclude: Iterable[int] = ()) -> List[Tuple[int, float]]:
+        """返回与 vector 内积（余弦）最高的 k 个 (文章ID, 相似度)；已训练时只扫描 nprobe 个最近的聚类"""
+        with self.lock:
+            if self.centroids is not None:
+                probe = np.argsort(-(self.centroids @ vector))[:self.nprobe]
+                rows = np.fromiter(
+                    itertools.chain.from_iterable(self.inverted.get(int(cluster), ()) for cluster in probe),
+                    dtype=np.int64,
+                )
+            else:
+                rows = np.arange(self.count)
+            rows = rows[self.lists[rows] != DELETED]
+            ids = np.asarray(self.ids[rows])
+            keep = ~np.isin(ids, list(exclude))
+            rows, ids = rows[keep], ids[keep]
+            if rows.size == 0:
+                return []
+            scores = self.vectors[rows] @ vector
+            k = min(k, rows.size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [(int(ids[i]), float(scores[i])) for i in top]
+
+    def flush(self):
+        self.vectors.flush()
+        self.ids.flush()
+        self.lists.flush()
+        self._save_meta()
+
+    def _save_meta(self):
+        meta = {
+            "count": self.count,
+            "capacity": self.capacity,
+            "dim": self.dim,
+            "trained_count": self.trained_count,
+            "backfilled": self.backfilled,
+        }
+        tmp_path = self.path / "meta.json.tmp"
+        tmp_path.write_text(json.dumps(meta))
+        os.replace(tmp_path, self.path / "meta.json")
+
+
+class EmbeddingIndex:
+    """按用户分片的相关文章索引，打开的分片按LRU保留
+
+    同一组分片文件只能有一个 EmbeddingShard 对象读写，否则各自的行数与 meta.json 会互相覆盖；
+    因此正在使用中（被线程持有）的分片不会被LRU关闭。
+    """
+
+    def __init__(self, base_dir: str, dim: int, max_chars: int, ivf_min_rows: int, nprobe: int, max_open_shards: int):
+        self.base_dir = Path(base_dir)
+        self.dim = dim
+        self.max_chars = max_chars
+        self.ivf_min_rows = ivf_min_rows
+        self.nprobe = nprobe
+        self.max_open_shards = max_open_shards
+        self._shards: "OrderedDict[int, EmbeddingShard]" = OrderedDict()
+        # 各分片当前的使用者数
+        self._refs: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._backfill_locks: Dict[int, asyncio.Lock] = {}
+
+    @contextmanager
+    def shard(self, user_id: int) -> Iterator[EmbeddingShard]:
+        """打开（或复用）用户的分片，使用期间该分片不会被LRU关闭"""
+        with self._lock:
+            shard = self._shards.get(user_id)
+            if shard is None:
+                shard = EmbeddingShard(self.base_dir / f"user_{user_id}", self.dim, self.ivf_min_rows, self.nprobe)
+                self._shards[user_id] = shard
+            self._shards.move_to_end(user_id)
+            self._refs[user_id] = self._refs.get(user_id, 0) + 1
+        try:
+            yield shard
+        finally:
+            with self._lock:
+                self._refs[user_id] -= 1
+                if not self._refs[user_id]:
+                    del self._refs[user_id]
+                self._evict()
+
+    def _evict(self):
+        """关闭超出上限的最久未用分片，跳过仍在使用中的（调用方持有 _lock）"""
+        for user_id in list(self._shards):
+            if len(self._shards) <= self.max_open_shards:
+                break
+            if user_id not in self._refs:
+                self._shards.pop(user_id).flush()
+
+    def add_articles(self, user_id: int, rows: Sequence):
+        """计算并写入文章向量（rows 需包含 EMBEDDING_TEXT_COLUMNS 各列）"""
+        if not rows:
+            return
+        vectors = np.vstack([
+            embed_article(row.title, row.summary, row.content, self.dim, self.max_chars) for row in rows
+        ])
+        with self.shard(user_id) as shard:
+            shard.add([row.id for row in rows], vectors)
+        metrics.incr("embedding.indexed", len(rows))
+
+    def index_articles(self, db: Session, user_id: int, article_ids: Sequence[int]):
+        """从数据库加载文章并写入索引（同步执行，抓取流程在线程中调用）"""
+        article_ids = list(article_ids)
+        for i in range(0, len(article_ids), LOAD_BATCH):
+            rows = db.execute(
+                select(*EMBEDDING_TEXT_COLUMNS).where(Article.id.in_(article_ids[i:i + LOAD_BATCH]))
+            ).all()
+            self.add_articles(user_id, rows)
+
+    async def ensure_article(self, db: AsyncSession, user_id: int, article_id: int):
+        """确保文章已在索引中；分片尚未回填时先按主键分批回填该用户的全部历史文章
+
+        抓取与新建文章只写入新增的行，分片可能在回填之前就已创建，因此先检查回填标记
+        """
+        with self.shard(user_id) as shard:
+            if not shard.backfilled:
+                async with self._backfill_locks.setdefault(user_id, asyncio.Lock()):
+                    if not shard.backfilled:
+                        await self._backfill(db, user_id, shard)
+                return
+            if article_id in shard:
+                return
+            rows = (await db.execute(
+                select(*EMBEDDING_TEXT_COLUMNS).where(Article.id == article_id, Article.user_id == user_id)
+            )).all()
+            await asyncio.to_thread(self.add_articles, user_id, rows)
+
+    async def _backfill(self, db: AsyncSession, user_id: int, shard: EmbeddingShard):
+        logger.info(f"回填用户 {user_id} 的相关文章索引")
+        last_id = 0
+        while True:
+            rows = (await db.execute(
+                select(*EMBEDDING_TEXT_COLUMNS)
+                .where(Article.user_id == user_id, Article.id > last_id)
+                .order_by(Article.id).limit(LOAD_BATCH)
+            )).all()
+            if not rows:
+                break
+            await asyncio.to_thread(self.add_articles, user_id, rows)
+            last_id = rows[-1].id
+        with shard.lock:
+            shard.backfilled = True
+            shard.flush()
+
+    def remove_articles(self, user_id: int, article_ids: Iterable[int]):
+        with self.shard(user_id) as shard:
+            shard.remove(article_ids)
+        metrics.incr("embedding.removed")
+
+    def related(self, user_id: int, article_id: int, k: int) -> List[Tuple[int, float]]:
+        """与文章最相近的 k 篇文章 [(文章ID, 相似度)]；文章不在索引中时返回空列表"""
+        with self.shard(user_id) as shard:
+            vector = shard.vector(article_id)
+            if vector is None:
+                return []
+            return shard.search(vector, k, exclude=(article_id,))
+
+    def close(self):
+        """落盘并关闭所有打开的分片"""
+        with self._lock:
+            for shard in self._shards.values():
+                shard.flush()
+            self._shards.clear()
+            self._backfill_locks.clear()
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            shards = list(self._shards.values())
+        return {
+            "open_shards": len(shards),
+            "indexed_articles": sum(len(shard) for shard in shards),
+            "trained_shards": sum(1 for shard in shards if shard.centroids is not None),
+            "indexed_total": metrics.counter("embedding.indexed"),
+            "trainings": metrics.counter("embedding.trainings"),
+        }
+
+
+embedding_index = EmbeddingIndex(
+    base_dir=settings.embedding_index_dir,
+    dim=settings.embedding_dim,
+    max_chars=settings.embedding_max_chars,
+    ivf_min_rows=settings.embedding_ivf_min_rows,
+    nprobe=settings.embedding_ivf_nprobe,
+    max_open_shards=settings.embedding_open_shards,
+)
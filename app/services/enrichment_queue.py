@@ -0,0 +1,238 @@
+"""
+AI富化队列 - 文章先入库，再由后台工作协程异步补全摘要、关键词与分类
+"""
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import time
+
+from sqlalchemy.orm import Session, undefer
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import metrics
+from app.models.article import Article
+from app.models.document import Document
+from app.services.ai_service import AIService
+from app.services.article_store import replace_article_keywords
+from app.services.dedup import propagate_enrichment
+
+logger = logging.getLogger(__name__)
+
+# 队列元素：(文章ID, 入队时间)
+QueueItem = Tuple[int, float]
+
+
+class InMemoryBroker:
+    """进程内消息代理（单进程部署与测试使用）"""
+
+    def __init__(self):
+        self._queue: "asyncio.Queue[QueueItem]" = asyncio.Queue()
+
+    async def put(self, item: QueueItem):
+        await self._queue.put(item)
+
+    async def get(self) -> QueueItem:
+        return await self._queue.get()
+
+    def get_nowait(self) -> Optional[QueueItem]:
+        try:
+            return self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return None
+
+    def task_done(self):
+        self._queue.task_done()
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+
+class EnrichmentQueue:
+    """AI富化队列：有并发上限的工作协程从代理中取文章ID并写回富化结果"""
+
+    def __init__(
+            self,
+            broker: Optional[InMemoryBroker] = None,
+            concurrency: int = 2,
+            session_factory: Callable[[], Session] = SessionLocal,
+            ai_service: Optional[AIService] = None
+            ):
+        self.broker = broker or InMemoryBroker()
+        self.concurrency = concurrency
+        self.session_factory = session_factory
+        self.ai_service = ai_service or AIService()
+        self._workers: List[asyncio.Task] = []
+        self._pending: set = set()
+        # 同一共享文档的文章串行处理，后处理的直接复用先完成的富化结果；
+        # 锁按持有与等待者计数，计数归零时才移除
+        self._document_locks: Dict[int, asyncio.Lock] = {}
+        self._document_refs: Dict[int, int] = {}
+
+    async def enqueue(self, article_ids: Iterable[int]):
+        """文章ID入队（重复入队的ID会被忽略）"""
+        now = time.perf_counter()
+        for article_id in article_ids:
+            if article_id in self._pending:
+                continue
+            self._pending.add(article_id)
+            await self.broker.put((article_id, now))
+            metrics.incr("enrichment.enqueued")
+
+    async def start(self):
+        """启动工作协程，并把数据库中遗留的pending文章重新入队"""
+        if self._workers:
+            return
+        pending_ids = await asyncio.to_thread(self._load_pending_ids)
+        await self.enqueue(pending_ids)
+
+        self._workers = [
+            asyncio.create_task(self._worker(i)) for i in range(self.concurrency)
+        ]
+        logger.info(f"AI富化队列已启动，工作协程: {self.concurrency}，待处理: {len(pending_ids)}")
+
+    def _load_pending_ids(self) -> List[int]:
+        db = self.session_factory()
+        try:
+            return [
+                article_id for (article_id,) in
+                db.query(Article.id).filter(Article.enrichment_status == "pending").all()
+            ]
+        finally:
+            db.close()
+
+    async def stop(self):
+        """停止工作协程（未处理的文章保持pending，下次启动时恢复）"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info("AI富化队列已停止")
+
+    async def drain(self):
+        """在当前协程中处理完队列中的全部文章（测试与一次性任务使用）"""
+        while True:
+            item = self.broker.get_nowait()
+            if item is None:
+                return
+            try:
+                await self._process(item)
+            finally:
+                self.broker.task_done()
+
+    async def _worker(self, index: int):
+        while True:
+            item = await self.broker.get()
+            try:
+                await self._process(item)
+            except Exception as e:
+                logger.error(f"富化工作协程{index}异常: {str(e)}")
+            finally:
+                self.broker.task_done()
+
+    async def _process(self, item: QueueItem):
+        """同步会话的数据库操作放到线程中执行，避免阻塞事件循环"""
+        article_id, enqueued_at = item
+        self._pending.discard(article_id)
+        metrics.observe("enrichment.queue_wait_seconds", time.perf_counter() - enqueued_at)
+
+        db = self.session_factory()
+        start = time.perf_counter()
+        try:
+            article = await asyncio.to_thread(
+                    lambda: db.query(Article).options(undefer(Article.content)).filter(Article.id == article_id).first()
+                    )
+            if article is None or article.enrichment_status != "pending":
+                return
+
+            async with self._document_lock(article.document_id):  # type: ignore[arg-type]
+                keywords = await self._enrich(db, article)
+            await asyncio.to_thread(self._save, db, article, keywords)
+            metrics.incr("enrichment.processed")
+        except Exception as e:
+            logger.error(f"文章富化失败 {article_id}: {str(e)}")
+            await asyncio.to_thread(self._mark_failed, db, article_id)
+            metrics.incr("enrichment.failed")
+        finally:
+            metrics.observe("enrichment.process_seconds", time.perf_counter() - start)
+            metrics.observe("enrichment.latency_seconds", time.perf_counter() - enqueued_at)
+            await asyncio.to_thread(db.close)
+
+    @asynccontextmanager
+    async def _document_lock(self, document_id: Optional[int]) -> AsyncIterator[None]:
+        """同一共享文档的文章串行处理，没有文档的文章不加锁"""
+        if not document_id:
+            yield
+            return
+        lock = self._document_locks.setdefault(document_id, asyncio.Lock())
+        self._document_refs[document_id] = self._document_refs.get(document_id, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._document_refs[document_id] -= 1
+            if not self._document_refs[document_id]:
+                del self._document_refs[document_id]
+                del self._document_locks[document_id]
+
+    def _save(self, db: Session, article: Article, keywords: List[str]):
+        """写回富化结果与关键词索引（同步执行，由调用方放到线程中）"""
+        article.enrichment_status = "done"  # type: ignore[assignment]
+        replace_article_keywords(db, article.id, keywords)  # type: ignore[arg-type]
+        # 同簇的近似重复文章直接复用富化结果
+        propagate_enrichment(db, article)
+        db.commit()
+
+    def _mark_failed(self, db: Session, article_id: int):
+        db.rollback()
+        db.query(Article).filter(Article.id == article_id).update({"enrichment_status": "failed"})
+        db.commit()
+
+    async def _enrich(self, db: Session, article: Article) -> List[str]:
+        """写入文章的摘要、关键词与分类并返回关键词；共享文档已富化时直接复用，否则调用大模型并回写文档"""
+        document = None
+        if article.document_id:
+            document = await asyncio.to_thread(
+                    lambda: db.query(Document).filter(Document.id == article.document_id)
+                    .execution_options(populate_existing=True).first()
+                    )
+        if document is not None and document.enrichment_status == "done":
+            metrics.incr("enrichment.shared")
+            article.summary = document.summary  # type: ignore[assignment]
+            article.keywords = document.keywords  # type: ignore[assignment]
+            article.category = document.category  # type: ignore[assignment]
+            return json.loads(document.keywords or "[]")  # type: ignore[arg-type]
+
+        enrichment = await self.ai_service.enrich_article(
+                title=article.title or "",  # type: ignore[arg-type]
+                content=article.content or "",  # type: ignore[arg-type]
+                max_summary_length=500,
+                max_keywords=5
+                )
+        category = enrichment["category"]
+        article.summary = enrichment["summary"]  # type: ignore[assignment]
+        article.keywords = json.dumps(enrichment["keywords"], ensure_ascii=False)  # type: ignore[assignment]
+        article.category = max(category, key=category.get) if category else None  # type: ignore[assignment]
+        if document is not None:
+            document.summary = article.summary
+            document.keywords = article.keywords
+            document.category = article.category
+            document.enrichment_status = "done"  # type: ignore[assignment]
+            # 先提交文档的富化结果，等待同一文档锁的其他文章可以立即复用
+            await asyncio.to_thread(db.commit)
+        return enrichment["keywords"]
+
+    def get_status(self) -> Dict:
+        """队列状态"""
+        return {
+            "queue_depth": self.broker.qsize(),
+            "workers": len(self._workers),
+            "processed": metrics.counter("enrichment.processed"),
+            "failed": metrics.counter("enrichment.failed"),
+            "shared": metrics.counter("enrichment.shared"),
+        }
+
+
+enrichment_queue = EnrichmentQueue(concurrency=settings.enrichment_concurrency)
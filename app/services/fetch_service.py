@@ -1,17 +1,63 @@
-from typing import Dict, List, Optional, cast, Any
-from sqlalchemy.orm import Session
+from typing import AsyncIterator, Dict, List, Optional, Tuple, cast, Any
+from contextlib import asynccontextmanager
+from sqlalchemy.orm import Session, undefer
+from app.core.config import settings
+from app.core.metrics import metrics
 from app.models.content_source import ContentSource
 from app.models.article import Article
+from app.models.document import Document
+from app.services.article_store import bulk_upsert_articles, upsert_documents
+from app.services.dedup import mark_near_duplicates
+from app.services.embedding_index import embedding_index
 from app.services.crawler import ModernWebCrawler, RSSCrawler
+from app.services.enrichment_queue import enrichment_queue
+from app.services.urls import canonicalize_url
+from urllib.parse import urlparse
+import asyncio
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import json
-from bs4 import BeautifulSoup
-import re
+import time
 
 
 logger = logging.getLogger(__name__)
 
+
+class CrawlLimiter:
+    """全文抓取并发限制：进程级全局上限 + 单域名上限"""
+
+    def __init__(self, global_limit: int, per_domain_limit: int):
+        self._global = asyncio.Semaphore(global_limit)
+        self._per_domain_limit = per_domain_limit
+        self._domains: Dict[str, asyncio.Semaphore] = {}
+
+    @asynccontextmanager
+    async def slot(self, domain: str) -> AsyncIterator[None]:
+        """先占用域名名额再占用全局名额，避免等待单域名时占着全局名额"""
+        domain_sem = self._domains.setdefault(domain, asyncio.Semaphore(self._per_domain_limit))
+        async with domain_sem:
+            async with self._global:
+                yield
+
+
+def as_utc(value: datetime) -> datetime:
+    """统一为UTC时间，无时区信息的按UTC处理"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def feed_key(source: ContentSource) -> Optional[str]:
+    """RSS内容源按规范化后的订阅地址分组，其他类型的源返回None"""
+    rss_url = cast(Optional[str], getattr(source, "rss_url"))
+    if cast(str, getattr(source, "type")) != "rss" or not rss_url:
+        return None
+    return canonicalize_url(rss_url)
+
+
+crawl_limiter = CrawlLimiter(settings.crawl_max_concurrency, settings.crawl_per_domain_concurrency)
+
+
 class FetchService:
     """抓取任务服务"""
     def __init__(self):
@@ -21,7 +67,10 @@ class FetchService:
     async def fetch_source(self, source_id: int, db: Session) -> Dict:
         """抓取指定内容源"""
         try:
-            source = db.query(ContentSource).filter(ContentSource.id == source_id).first()
+            # 同步会话的数据库操作放到线程中执行，避免阻塞事件循环
+            source = await asyncio.to_thread(
+                    lambda: db.query(ContentSource).filter(ContentSource.id == source_id).first()
+                    )
             if not source:
                 return {"success": False, "error": "内容源不存在"}
 
@@ -41,84 +90,334 @@ class FetchService:
             return {"success": False, "error": str(e)}
 
 
+    async def fetch_sources(self, source_ids: List[int], db: Session) -> Dict[int, Dict]:
+        """抓取一批内容源：RSS地址相同的源合并为一组，每个订阅源只下载、解析一次"""
+        sources = await asyncio.to_thread(
+                lambda: db.query(ContentSource).filter(ContentSource.id.in_(source_ids)).all()
+                )
+        results: Dict[int, Dict] = {
+            source_id: {"success": False, "error": "内容源不存在"}
+            for source_id in set(source_ids) - {cast(int, source.id) for source in sources}
+        }
+        groups: Dict[str, List[ContentSource]] = {}
+        for source in sources:
+            key = feed_key(source)
+            if key is None or not bool(getattr(source, "is_active")):
+                results[cast(int, source.id)] = await self.fetch_source(cast(int, source.id), db)
+            else:
+                groups.setdefault(key, []).append(source)
+        for group in groups.values():
+            results.update(await self._fetch_rss_group(group, db))
+        return results
+
     async def _fetch_rss_source(self, source: ContentSource, db: Session) -> Dict:
         """抓取RSS源 - 获取全文内容"""
-        try:
-            rss_url_val = cast(Optional[str], getattr(source, "rss_url"))
-            if not rss_url_val:
-                return {"success": False, "error": "RSS URL 不存在"}
+        if not cast(Optional[str], getattr(source, "rss_url")):
+            return {"success": False, "error": "RSS URL 不存在"}
+        return (await self._fetch_rss_group([source], db))[cast(int, source.id)]
 
-            rss_articles = self.rss_crawler.crawl_rss(rss_url_val)
-            if not rss_articles:
-                return {"success": False, "error": "RSS 抓取失败或无内容"}
+    async def _fetch_rss_group(self, sources: List[ContentSource], db: Session) -> Dict[int, Dict]:
+        """抓取订阅同一RSS地址的一组内容源，返回 source_id -> 抓取结果
 
-            saved_count = 0
-            total_found = len(rss_articles)
+        订阅源只请求、解析一次；每个条目的全文也只抓取一次（使用第一个需要它的内容源的抓取配置），
+        再按各内容源所属用户的已入库情况分发，所有内容源的文章在同一个事务中批量写入。
+        """
+        source_ids = [cast(int, source.id) for source in sources]
+        try:
+            # 各内容源的条件请求校验信息一致时才带上，否则完整拉取（例如刚有新用户订阅）
+            validators = {
+                (source.feed_etag, source.feed_last_modified, source.feed_content_hash) for source in sources
+            }
+            etag, last_modified, content_hash = validators.pop() if len(validators) == 1 else (None, None, None)
+            feed = await self.rss_crawler.fetch_feed(
+                    cast(str, getattr(sources[0], "rss_url")),
+                    etag=cast(Optional[str], etag),
+                    last_modified=cast(Optional[str], last_modified),
+                    content_hash=cast(Optional[str], content_hash)
+                    )
+            metrics.incr("fetch.feeds_fetched")
+            metrics.incr("fetch.feed_fetches_saved", len(sources) - 1)
+
+            if feed["status"] in ("not_modified", "unchanged"):
+                # 源未更新，跳过整个抓取流程
+                metrics.incr(f"fetch.feed_{feed['status']}")
+                now = datetime.now(timezone.utc)
+                for source in sources:
+                    source.last_fetch = now # type: ignore[assignment]
+                await asyncio.to_thread(db.commit)
+                return {
+                    source_id: {
+                        "success": True,
+                        "message": "RSS源未更新",
+                        "not_modified": True,
+                        "total_found": 0,
+                        "saved_count": 0
+                    }
+                    for source_id in source_ids
+                }
 
+            rss_articles = feed["articles"]
+            if not rss_articles:
+                return {source_id: {"success": False, "error": "RSS 抓取失败或无内容"} for source_id in source_ids}
+            # 按规范URL去重与查询，带跟踪参数的链接与已入库文章视为同一篇；抓取与入库仍用原始链接
+            entries_by_key: Dict[str, Dict] = {}
             for rss_article in rss_articles:
-                article_url = rss_article.get('url', '')
-                if not article_url:
+                if rss_article.get('url'):
+                    entries_by_key.setdefault(canonicalize_url(rss_article['url']), rss_article)
+                else:
                     logger.warning(f"跳过无URL的文章: {rss_article.get('title', '')}")
 
+            total_found = len(feed["articles"])
+            feed_start = time.perf_counter()
+            crawl_seconds = 0.0
 
-                try:
-                    full_article_data = await self.web_crawler.crawl_webpage(article_url)
+            # 预查询：一次性查出各用户已入库的条目，只抓取新文章或过期文章
+            known = await asyncio.to_thread(
+                    self._lookup_existing_articles,
+                    list(entries_by_key),
+                    [cast(int, source.user_id) for source in sources],
+                    db
+                    )
 
+            wanted: Dict[int, List[str]] = {}
+            skipped: Dict[int, int] = {}
+            entries: Dict[str, Tuple[Dict, Dict, int]] = {}
+            for source in sources:
+                source_id = cast(int, source.id)
+                fetch_config = self._load_fetch_config(source)
+                refresh_days = int(fetch_config.get('refresh_after_days', settings.article_refresh_days))
+                wanted[source_id] = []
+                skipped[source_id] = 0
+                for key, rss_article in entries_by_key.items():
+                    stored_at = known.get((cast(int, source.user_id), key))
+                    if not self._needs_crawl(rss_article, stored_at, refresh_days):
+                        skipped[source_id] += 1
+                        continue
+                    wanted[source_id].append(key)
+                    entries.setdefault(key, (rss_article, fetch_config, refresh_days))
+
+            # 其他用户已抓取且未过期的共享文档直接复用，同一URL只抓取一次；
+            # 没有抓取时间的文档（迁移时由历史文章回填，正文可能只是RSS摘录）视为需要重新抓取
+            documents = await asyncio.to_thread(self._lookup_documents, list(entries), db)
+            prepared: Dict[str, Dict] = {}
+            tasks = []
+            for key, (rss_article, fetch_config, refresh_days) in entries.items():
+                document = documents.get(key)
+                if document is not None and not self._needs_crawl(rss_article, document.crawled_at, refresh_days):
+                    prepared[key] = self._document_article(rss_article, document)
+                    continue
+                tasks.append(asyncio.create_task(self._crawl_entry(rss_article, fetch_config)))
+            shared_count = len(prepared)
+            metrics.incr("fetch.entries_shared", shared_count)
+
+            # 按完成顺序收集结果，最后一次性批量写入
+            try:
+                for finished in asyncio.as_completed(tasks):
+                    rss_article, full_article_data, elapsed = await finished
+                    crawl_seconds += elapsed
+
+                    key = canonicalize_url(rss_article['url'])
                     if full_article_data and full_article_data.get('content'):
-                        merged_article = {
-                            'title': full_article_data.get('title') or rss_article.get('title', '无标题'),
-                            'content': full_article_data.get('content', ''),  # 使用网页的完整内容
-                            'url': article_url,
-                            'author': full_article_data.get('author') or rss_article.get('author', '未知作者'),
-                            'published_at': full_article_data.get('published_at') or rss_article.get('published_at'),
-                            'images': full_article_data.get('images') or rss_article.get('images', []),
-                            'summary': full_article_data.get('summary') ,
-                            'domain': full_article_data.get('domain') or rss_article.get('domain', '')
-                        }
-
-                        if await self._save_article(merged_article, source, db):
-                            saved_count += 1
-                        else:
-                            logger.info(f"文章已存在或保存失败: {merged_article['title']}")
+                        prepared[key] = self._merge_article(rss_article, full_article_data)
                     else:
-                        logger.warning(f"网页抓取失败，使用RSS数据: {article_url}")
-                        if await self._save_article(rss_article, source, db):
-                            saved_count += 1
-                            logger.info(f"使用RSS数据保存文章: {rss_article['title']}")
-
-                except Exception as e:
-                    logger.error(f"处理文章失败 {article_url}: {str(e)}")
-                    if await self._save_article(rss_article, source, db):
-                        saved_count += 1
-                        logger.info(f"使用RSS数据保存文章(异常回退): {rss_article['title']}")
-
-            # 更新最后抓取时间
-            source.last_fetch = datetime.now() # type: ignore[assignment]
-            db.commit()
+                        logger.warning(f"网页抓取失败，使用RSS数据: {rss_article['url']}")
+                        prepared[key] = rss_article
+            finally:
+                # 出现异常时取消尚未完成的抓取
+                for task in tasks:
+                    task.cancel()
+
+            feed_seconds = time.perf_counter() - feed_start
+            metrics.observe("fetch.feed_seconds", feed_seconds)
+            metrics.observe("fetch.feed_sequential_seconds", crawl_seconds)
+            metrics.incr("fetch.entries_skipped", sum(skipped.values()))
+            logger.info(
+                f"RSS源抓取耗时: {feed_seconds:.2f}s（逐条串行预计 {crawl_seconds:.2f}s），订阅内容源: {len(sources)}，"
+                f"抓取条目: {len(tasks)}，复用共享文档: {shared_count}，跳过已入库: {sum(skipped.values())}"
+            )
+
+            articles = {source_id: [prepared[key] for key in keys] for source_id, keys in wanted.items()}
+            counts = await asyncio.to_thread(self._persist_feed, db, sources, articles, feed)
+
+            # 入库后再交给富化队列，抓取流程不等待大模型
+            await enrichment_queue.enqueue(
+                [article_id for source_counts in counts.values() for article_id in source_counts["pending_ids"]]
+            )
 
             return {
-                "success": True,
-                "message": f"成功抓取{saved_count} 篇文章(包含全文内容)",
-                "total_found": total_found,
-                "saved_count": saved_count
+                source_id: {
+                    "success": True,
+                    "message": f"成功抓取{source_counts['inserted'] + source_counts['updated']} 篇文章(包含全文内容)",
+                    "total_found": total_found,
+                    "saved_count": source_counts["inserted"] + source_counts["updated"],
+                    "inserted_count": source_counts["inserted"],
+                    "updated_count": source_counts["updated"],
+                    "pending_enrichment": len(source_counts["pending_ids"]),
+                    "duplicate_count": source_counts["duplicates"],
+                    "skipped_count": skipped[source_id],
+                    "shared_count": shared_count,
+                    "subscriber_count": len(sources),
+                    "elapsed_seconds": round(feed_seconds, 3),
+                    "sequential_seconds": round(crawl_seconds, 3)
+                }
+                for source_id, source_counts in counts.items()
             }
 
         except Exception as e:
             logger.error(f"RSS 抓取失败: {str(e)}")
-            return {"success": False, "error": str(e)}
+            await asyncio.to_thread(db.rollback)
+            return {source_id: {"success": False, "error": str(e)} for source_id in source_ids}
+
+    def _persist_feed(
+            self,
+            db: Session,
+            sources: List[ContentSource],
+            articles: Dict[int, List[Dict]],
+            feed: Dict
+            ) -> Dict[int, Dict]:
+        """批量写入各内容源的文章并更新源的抓取状态（同步执行，由调用方放到线程中）"""
+        counts = self._upsert_and_dedup(db, [(source, articles[cast(int, source.id)]) for source in sources])
+
+        # 更新最后抓取时间；处理完成后才记录校验信息，失败的抓取下次会重新解析
+        # 与文章写入同属一个事务
+        now = datetime.now(timezone.utc)
+        for source in sources:
+            source.last_fetch = now # type: ignore[assignment]
+            source.feed_etag = feed["etag"] # type: ignore[assignment]
+            source.feed_last_modified = feed["last_modified"] # type: ignore[assignment]
+            source.feed_content_hash = feed["content_hash"] # type: ignore[assignment]
+        db.commit()
+        for source in sources:
+            self._index_articles(db, source, counts[cast(int, source.id)]["pending_ids"])
+        return counts
+
+    def _upsert_and_dedup(self, db: Session, source_articles: List[Tuple[ContentSource, List[Dict]]]) -> Dict[int, Dict]:
+        """批量写入共享文档与各内容源的文章，近似重复的文章从待富化列表中剔除（不提交）
+
+        只有成功抓取到网页全文的条目（带 crawled 标记）写入共享文档表；抓取失败时回退的RSS条目只有摘录，
+        写入文档会被其他订阅者当作已抓取的正文复用。复用共享文档的条目已带 document_id，不刷新文档的抓取时间
+        """
+        articles = [article for _, batch in source_articles for article in batch]
+        document_ids = upsert_documents(db, [a for a in articles if a.get('crawled')])
+        document_ids.update({canonicalize_url(a['url']): a['document_id'] for a in articles if 'document_id' in a})
+        counts = bulk_upsert_articles(db, source_articles, document_ids)
+        duplicates = set(mark_near_duplicates(
+            db, [article_id for source_counts in counts.values() for article_id in source_counts["pending_ids"]]
+        ))
+        for source_counts in counts.values():
+            pending_ids = source_counts["pending_ids"]
+            source_counts["pending_ids"] = [article_id for article_id in pending_ids if article_id not in duplicates]
+            source_counts["duplicates"] = len(pending_ids) - len(source_counts["pending_ids"])
+        return counts
+
+    def _index_articles(self, db: Session, source: ContentSource, article_ids: List[int]):
+        """新增或正文变化的文章写入相关文章索引（索引失败不影响抓取结果）"""
+        try:
+            embedding_index.index_articles(db, cast(int, source.user_id), article_ids)
+        except Exception as e:
+            logger.error(f"写入相关文章索引失败: {str(e)}")
+
+
+
+    def _lookup_existing_articles(self, urls: List[str], user_ids: List[int], db: Session) -> Dict[Tuple[int, str], datetime]:
+        """按规范URL批量查询各用户已入库的文章，返回 (user_id, 规范URL) -> 最后更新时间"""
+        if not urls:
+            return {}
+        rows = (
+            db.query(Article.user_id, Article.canonical_url, Article.created_at, Article.updated_at)
+            .filter(Article.user_id.in_(set(user_ids)), Article.canonical_url.in_(set(urls)))
+            .all()
+        )
+        return {(row.user_id, row.canonical_url): row.updated_at or row.created_at for row in rows}
+
+    def _lookup_documents(self, urls: List[str], db: Session) -> Dict[str, Document]:
+        """按规范URL批量查询已有正文的共享文档，返回 规范URL -> 文档（包含正文）"""
+        if not urls:
+            return {}
+        documents = (
+            db.query(Document).options(undefer(Document.content))
+            .filter(Document.url.in_(set(urls)), Document.content_hash.isnot(None))
+            .all()
+        )
+        return {document.url: document for document in documents}
+
+    def _document_article(self, rss_article: Dict, document: Document) -> Dict:
+        """由共享文档构造文章数据（正文与图片来自文档，摘要仍用RSS条目的）"""
+        return {
+            'title': document.title or rss_article.get('title', '无标题'),
+            'content': document.content or '',
+            'url': rss_article['url'],
+            'author': document.author or rss_article.get('author', '未知作者'),
+            'published_at': document.published_at or rss_article.get('published_at'),
+            'images': json.loads(document.images) if document.images else rss_article.get('images', []),
+            'summary': rss_article.get('summary'),
+            'document_id': document.id,
+        }
+
+    def _needs_crawl(self, rss_article: Dict, stored_at: Optional[datetime], refresh_days: int) -> bool:
+        """刷新策略：新文章、RSS条目updated晚于入库时间、或超过refresh_days天的文章需要抓取"""
+        if stored_at is None:
+            return True
+        stored_at = as_utc(stored_at)
 
+        entry_updated = rss_article.get('updated_at')
+        if entry_updated and as_utc(entry_updated) > stored_at:
+            return True
 
+        if refresh_days > 0 and datetime.now(timezone.utc) - stored_at > timedelta(days=refresh_days):
+            return True
+        return False
+
+    def _load_fetch_config(self, source: ContentSource) -> Dict:
+        """解析内容源的fetch_config（JSON），无效时返回空配置"""
+        raw = cast(Optional[str], getattr(source, "fetch_config"))
+        if not raw:
+            return {}
+        try:
+            config = json.loads(raw)
+            return config if isinstance(config, dict) else {}
+        except (TypeError, ValueError):
+            logger.warning(f"内容源fetch_config不是有效JSON: {source.id}")
+            return {}
+
+    async def _crawl_entry(self, rss_article: Dict, fetch_config: Optional[Dict] = None) -> Tuple[Dict, Optional[Dict], float]:
+        """在并发限制内抓取单个条目的全文，失败时返回None以回退到RSS数据"""
+        article_url = rss_article['url']
+        async with crawl_limiter.slot(urlparse(article_url).netloc):
+            start = time.perf_counter()
+            try:
+                full_article_data = await self.web_crawler.crawl_webpage(article_url, fetch_config)
+            except Exception as e:
+                logger.error(f"处理文章失败 {article_url}: {str(e)}")
+                full_article_data = None
+            elapsed = time.perf_counter() - start
+        metrics.observe("fetch.entry_seconds", elapsed)
+        return rss_article, full_article_data, elapsed
+
+    def _merge_article(self, rss_article: Dict, full_article_data: Dict) -> Dict:
+        """合并网页全文与RSS条目数据，网页数据优先"""
+        return {
+            'title': full_article_data.get('title') or rss_article.get('title', '无标题'),
+            'content': full_article_data.get('content', ''),  # 使用网页的完整内容
+            'url': rss_article['url'],
+            'author': full_article_data.get('author') or rss_article.get('author', '未知作者'),
+            'published_at': full_article_data.get('published_at') or rss_article.get('published_at'),
+            'images': full_article_data.get('images') or rss_article.get('images', []),
+            'summary': full_article_data.get('summary'),
+            'domain': full_article_data.get('domain') or rss_article.get('domain', ''),
+            'crawled': True
+        }
 
     async def _fetch_webpage_source(self, source: ContentSource, db: Session) -> Dict:
         """抓取网页源"""
         try:
             source_url = cast(str, getattr(source, "url"))
-            article_data = await self.web_crawler.crawl_webpage(source_url)
+            article_data = await self.web_crawler.crawl_webpage(source_url, self._load_fetch_config(source))
 
             if not article_data:
                 return {"success": False, "error": "网页抓取失败"}
 
-            processed = await self._save_article(article_data, source, db)
+            processed = await self._save_article({**article_data, 'crawled': True}, source, db)
 
             #source.last_fetch = datetime.now()
             # db.commit()
@@ -138,109 +437,41 @@ class FetchService:
             return {"success": False, "error": str(e)}
 
     async def _save_article(self, article_data: Dict, source: ContentSource, db: Session) -> bool:
-        """保存文章到数据库(已存在则按需回填 images/summary/word_count/content)"""
-        try:
-
-            html = article_data.get('content', '') or ''
-            text = BeautifulSoup(html, 'html.parser').get_text(separator='', strip=True)
-            clean_text = re.sub(r'\s+', '', text)
-            word_count_new = len(clean_text)
-            images_list = article_data.get("images") or []
-
-            existing_article = db.query(Article).filter(Article.url == article_data.get('url', '')).first()
-            if existing_article:
-                logger.info(f"文章已存在：{article_data.get('title', '')}")
-
-                updated = False
-
-                # 现有值
-                word_count_val = cast(Optional[int], getattr(existing_article, 'word_count'))
-
-                # 纯文本
-                text = BeautifulSoup(html, 'html.parser').get_text(separator=' ', strip=True)
-
-                # 与已存不同则更新
-                if text and (word_count_val != len(text)):
-                    setattr(existing_article, 'word_count', len(text))  # type: ignore[assignment]
-                    updated = True
-
-                if (not existing_article.images) and images_list:# type: ignore[assignment]
-                    existing_article.images = json.dumps(images_list) # type: ignore[assignment]
-                    updated = True
-                if (existing_article.word_count or 0) == 0 and text: # type: ignore[assignment]
-                    existing_article.word_count = len(text) # type: ignore[assignment]
-                    updated = True
-
-                new_summary = article_data.get('summary', '')
-                if new_summary and new_summary != existing_article.summary:
-                # 如果新摘要是AI生成的,就更新
-                    if len(new_summary) > 50 and len(new_summary) < 500:
-                        existing_article.summary = new_summary
-                        updated = True
-                        logger.info(f"更新AI摘要: {new_summary}")
-
-                if  html: # type: ignore[assignment]
-                    existing_article.content = html
-                    updated = True
-
-                if updated:
-                    # 同时更新源的last_fetch
-                    source.last_fetch = datetime.now() # type: ignore[assignment]
-                    db.commit()
-                    db.refresh(existing_article)
-                    logger.info(f"已回填文章字段：{existing_article.title}")
-                    return True
-                else:
-                    logger.info(f"文章已存在且无需更新:{existing_article.title}")
-                return True
-
-
-            db_article = Article(
-                    title=article_data.get('title', "无标题"),
-                    content=html,
-                    url=article_data.get('url', ''),
-                    author=article_data.get('author', '未知作者'),
-                    published_at=article_data.get('published_at'),
-                    source_id=source.id,
-                    user_id=source.user_id,
-                    source_type=source.type,
-                    is_read=False,
-                    images=json.dumps(article_data.get('images', [])) if article_data.get('images') else None,
-                    summary=article_data.get('summary', ''),
-                    #word_count=len(text)
-                    word_count=word_count_new
-                    )
-
-            db.add(db_article)
-
-            # 同时更新源的last_fetch
-            source.last_fetch = datetime.now() # type: ignore[assignment]
-
+        """保存单篇文章（已存在则按需回填 images/summary/word_count/content）"""
+        def persist() -> Dict:
+            counts = self._upsert_and_dedup(db, [(source, [article_data])])[cast(int, source.id)]
+            source.last_fetch = datetime.now(timezone.utc) # type: ignore[assignment]
             db.commit()
-            db.refresh(db_article)
+            self._index_articles(db, source, counts["pending_ids"])
+            return counts
 
-            logger.info(f"成功保存文章: {db_article.title}")
+        try:
+            counts = await asyncio.to_thread(persist)
+            await enrichment_queue.enqueue(counts["pending_ids"])
+            logger.info(f"成功保存文章: {article_data.get('title', '')}")
             return True
         except Exception as e:
             logger.error(f"保存文章失败：{str(e)}")
-            db.rollback()
+            await asyncio.to_thread(db.rollback)
             return False
+
     async def fetch_all_active_sources(self, db: Session, user_id: int = None) -> Dict:
         """抓取所有活动的内容源"""
         try:
             query = db.query(ContentSource).filter(ContentSource.is_active == True)
             if user_id is not None:
                 query = query.filter(ContentSource.user_id == user_id)
-            active_sources = query.all()
+            active_sources = await asyncio.to_thread(query.all)
 
+            # 相同RSS地址的源合并抓取
+            fetch_results = await self.fetch_sources([cast(int, getattr(source, "id")) for source in active_sources], db)
             results: List[Dict[str, Any]] = []
             for source in active_sources:
                 source_id_val = cast(int, getattr(source, "id"))
-                fetch_result = await self.fetch_source(source_id_val, db)
                 results.append({
                     "source_id": source_id_val,
                     "source_name": source.name,
-                    "result": fetch_result
+                    "result": fetch_results[source_id_val]
                     })
             return {
                     "success": True,
@@ -0,0 +1,263 @@
+"""
+大模型客户端 - 在OpenAI兼容接口之上增加限流、并发控制、重试与熔断
+"""
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+import os
+import random
+import time
+
+from dotenv import load_dotenv
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    APITimeoutError,
+    AsyncOpenAI,
+    InternalServerError,
+    RateLimitError,
+)
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.text_prep import estimate_tokens
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://api.moonshot.cn/v1"
+
+# 可重试的错误：限流、超时、连接失败、服务端5xx
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+
+class LLMUnavailableError(Exception):
+    """大模型暂不可用（熔断打开或重试耗尽），调用方应使用降级方案"""
+    pass
+
+
+class TokenBucket:
+    """令牌桶：容量为每分钟额度，按时间连续补充"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """取出amount个令牌，不足时等待；返回等待的秒数"""
+        # 单次请求超过桶容量时按满桶处理，避免永远等待
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                delay = (amount - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+    def adjust(self, delta: float):
+        """按实际用量修正（delta>0 追加扣减，<0 退回）"""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens - delta)
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+
+class CircuitBreaker:
+    """熔断器：连续失败达到阈值后打开，冷却后放行一次探测请求"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_seconds:
+                return False
+            self.state = self.HALF_OPEN
+            self._probing = False
+        # 半开状态只放行一个探测请求
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info("大模型服务恢复，熔断器关闭")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"大模型服务连续失败 {self.failures} 次，熔断器打开")
+                metrics.incr("llm.breaker_opened")
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+    def get_status(self) -> Dict:
+        return {"state": self.state, "failures": self.failures}
+
+
+class LLMClient:
+    """带保护的大模型客户端：请求/令牌双令牌桶 + 并发上限 + 指数退避重试 + 熔断"""
+
+    def __init__(
+            self,
+            client: Optional[AsyncOpenAI],
+            model: str,
+            requests_per_minute: int = 60,
+            tokens_per_minute: int = 120000,
+            max_concurrency: int = 4,
+            max_retries: int = 3,
+            backoff_base: float = 1.0,
+            backoff_max: float = 30.0,
+            breaker: Optional[CircuitBreaker] = None
+            ):
+        self.client = client
+        self.model = model
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.breaker = breaker or CircuitBreaker(
+                settings.llm_breaker_failure_threshold, settings.llm_breaker_reset_seconds
+                )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self._in_flight = 0
+
+    @classmethod
+    def from_env(cls) -> "LLMClient":
+        """从环境变量创建；OPENAI_BASE_URL 可指向本地的OpenAI兼容服务"""
+        api_key = os.getenv('OPENAI_API_KEY')
+        model = os.getenv('OPENAI_MODEL', "kimi-k2-0711-preview")
+        client = None
+        if api_key:
+            client = AsyncOpenAI(
+                    api_key=api_key,
+                    base_url=os.getenv('OPENAI_BASE_URL', DEFAULT_BASE_URL),
+                    max_retries=0,  # 重试由本客户端统一控制
+                    timeout=settings.llm_timeout
+                    )
+        return cls(
+                client,
+                model,
+                requests_per_minute=settings.llm_requests_per_minute,
+                tokens_per_minute=settings.llm_tokens_per_minute,
+                max_concurrency=settings.llm_max_concurrency,
+                max_retries=settings.llm_max_retries,
+                backoff_base=settings.llm_backoff_base,
+                backoff_max=settings.llm_backoff_max
+                )
+
+    @property
+    def available(self) -> bool:
+        return self.client is not None
+
+    async def chat(self, messages: List[Dict[str, str]], **kwargs) -> Any:
+        """发送chat completion请求；熔断打开或重试耗尽时抛出 LLMUnavailableError"""
+        if self.client is None:
+            raise LLMUnavailableError("AI client 未初始化")
+
+        estimated = sum(estimate_tokens(m.get("content", "")) for m in messages) + settings.llm_output_token_reserve
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                metrics.incr("llm.short_circuited")
+                raise LLMUnavailableError("大模型服务熔断中")
+
+            waited = await self.request_bucket.acquire(1)
+            waited += await self.token_bucket.acquire(estimated)
+            metrics.observe("llm.throttle_wait_seconds", waited)
+
+            try:
+                async with self._semaphore:
+                    self._in_flight += 1
+                    start = time.perf_counter()
+                    try:
+                        response = await self.client.chat.completions.create(
+                                model=self.model, messages=messages, **kwargs
+                                )
+                    finally:
+                        self._in_flight -= 1
+                        metrics.observe("llm.request_seconds", time.perf_counter() - start)
+            except RETRYABLE_ERRORS as e:
+                self.breaker.record_failure()
+                metrics.incr("llm.retryable_errors")
+                if attempt >= self.max_retries:
+                    raise LLMUnavailableError(f"大模型请求重试{attempt}次后仍失败: {str(e)}") from e
+                delay = self._retry_delay(e, attempt)
+                attempt += 1
+                logger.warning(f"大模型请求失败({type(e).__name__})，{delay:.1f}秒后第{attempt}次重试")
+                await asyncio.sleep(delay)
+                continue
+            except APIStatusError:
+                # 4xx（如参数错误）不重试；服务本身可达，不计入熔断
+                self.breaker.record_success()
+                metrics.incr("llm.client_errors")
+                raise
+
+            self.breaker.record_success()
+            metrics.incr("llm.requests")
+            usage = getattr(response, "usage", None)
+            if usage is not None and getattr(usage, "total_tokens", None):
+                self.token_bucket.adjust(usage.total_tokens - estimated)
+            return response
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """优先使用服务端的Retry-After，否则为带抖动的指数退避"""
+        response = getattr(error, "response", None)
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.backoff_max)
+                except ValueError:
+                    pass
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def get_status(self) -> Dict:
+        return {
+            "available": self.available,
+            "model": self.model,
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "request_tokens_available": round(self.request_bucket.available, 1),
+            "llm_tokens_available": round(self.token_bucket.available, 1),
+            "breaker": self.breaker.get_status(),
+        }
+
+
+llm_client = LLMClient.from_env()
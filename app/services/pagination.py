@@ -0,0 +1,91 @@
+"""
+分页工具 - (created_at, id) 游标分页与列表总数缓存
+"""
+from datetime import datetime
+from typing import Dict, Hashable, Optional, Tuple
+import base64
+import json
+import time
+
+from sqlalchemy import Select, String, and_, func, or_, select, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.article import Article
+
+
+class InvalidCursorError(ValueError):
+    """游标无法解析"""
+    pass
+
+
+def encode_cursor(created_at: datetime, article_id: int) -> str:
+    """把最后一条记录的排序键编码为不透明的游标"""
+    payload = json.dumps([created_at.isoformat(), article_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, article_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(article_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(f"无效的游标: {cursor}") from e
+
+
+def datetime_param(dialect: str, value: datetime):
+    """绑定与数据库中时间列比较的时间参数
+
+    SQLite 中 server_default / onupdate 写入的是 CURRENT_TIMESTAMP 文本（无微秒），
+    而默认绑定格式带 .000000，按字符串比较会使相等判断失效，这里按存储格式绑定
+    """
+    if dialect == "sqlite":
+        fmt = "%Y-%m-%d %H:%M:%S.%f" if value.microsecond else "%Y-%m-%d %H:%M:%S"
+        return type_coerce(value.strftime(fmt), String)
+    return value
+
+
+def apply_cursor(stmt: Select, dialect: str, cursor: Optional[str]) -> Select:
+    """按 (created_at desc, id desc) 排序，并只取游标之后的记录"""
+    if cursor:
+        created_at, article_id = decode_cursor(cursor)
+        created_at_param = datetime_param(dialect, created_at)
+        stmt = stmt.where(
+            or_(
+                Article.created_at < created_at_param,
+                and_(Article.created_at == created_at_param, Article.id < article_id),
+            )
+        )
+    return stmt.order_by(Article.created_at.desc(), Article.id.desc())
+
+
+class CountCache:
+    """列表总数的短期缓存：总数只作近似展示，避免每次翻页都执行 COUNT(*)"""
+
+    def __init__(self, ttl: float, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data: Dict[Hashable, Tuple[float, int]] = {}
+
+    async def get_or_count(self, key: Hashable, db: AsyncSession, stmt: Select) -> int:
+        now = time.monotonic()
+        item = self._data.get(key)
+        if item is not None and item[0] > now:
+            return item[1]
+
+        total = await db.scalar(select(func.count()).select_from(stmt.order_by(None).subquery())) or 0
+        now = time.monotonic()
+        if len(self._data) >= self.max_entries:
+            self._data = {k: v for k, v in self._data.items() if v[0] > now}
+            if len(self._data) >= self.max_entries:
+                self._data.clear()
+        self._data[key] = (now + self.ttl, total)
+        return total
+
+    def invalidate_user(self, user_id: int):
+        """用户文章增删后清除其缓存（键的第一个元素为 user_id）"""
+        self._data = {k: v for k, v in self._data.items() if not (isinstance(k, tuple) and k[0] == user_id)}
+
+
+article_count_cache = CountCache(settings.article_count_cache_seconds)
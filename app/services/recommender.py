@@ -0,0 +1,264 @@
+"""
+内容推荐 - 基于哈希TF-IDF向量的余弦相似度、内容源分类偏好与时间衰减排序
+
+每篇文章的词频向量在入库时计算（articles.term_vector），这里按用户缓存稀疏词频矩阵，
+之后每次请求只增量加载新增或更新过的文章，整体打分用 NumPy/SciPy 向量化完成。
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+import asyncio
+import json
+import logging
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.article import Article
+from app.models.content_source import ContentSource
+from app.services.pagination import datetime_param
+
+logger = logging.getLogger(__name__)
+
+VECTOR_COLUMNS = (
+    Article.id,
+    Article.source_id,
+    Article.is_read,
+    Article.created_at,
+    Article.updated_at,
+    Article.term_vector,
+)
+
+
+@dataclass
+class UserMatrix:
+    """一个用户全部文章的词频矩阵，行与 ids 一一对应"""
+    ids: np.ndarray
+    source_ids: np.ndarray
+    is_read: np.ndarray
+    created: np.ndarray
+    tf: sp.csr_matrix
+    max_id: int = 0
+    # 上次同步时的数据库时间，更新时间不早于它的文章下次会重新加载
+    synced_at: Optional[datetime] = None
+    # 行归一化后的TF-IDF矩阵，首次打分时计算，矩阵变化后重新计算
+    weights: Optional[sp.csr_matrix] = None
+
+    @property
+    def size(self) -> int:
+        return self.tf.shape[0]
+
+
+def _epoch(value: Optional[datetime]) -> float:
+    if value is None:
+        return time.time()
+    if value.tzinfo is None:
+        # SQLite 的 CURRENT_TIMESTAMP 为 UTC
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def build_matrix(rows: Sequence, n_features: int) -> UserMatrix:
+    """把 VECTOR_COLUMNS 查询结果转换为稀疏词频矩阵"""
+    indptr = [0]
+    indices: List[int] = []
+    data: List[float] = []
+    for row in rows:
+        vector = json.loads(row.term_vector) if row.term_vector else {}
+        indices.extend(int(bucket) % n_features for bucket in vector)
+        data.extend(vector.values())
+        indptr.append(len(indices))
+    tf = sp.csr_matrix(
+        (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(rows), n_features),
+    )
+    tf.sum_duplicates()
+    return UserMatrix(
+        ids=np.fromiter((row.id for row in rows), dtype=np.int64, count=len(rows)),
+        source_ids=np.fromiter((row.source_id for row in rows), dtype=np.int64, count=len(rows)),
+        is_read=np.fromiter((bool(row.is_read) for row in rows), dtype=bool, count=len(rows)),
+        created=np.fromiter((_epoch(row.created_at) for row in rows), dtype=np.float64, count=len(rows)),
+        tf=tf,
+        max_id=max((row.id for row in rows), default=0),
+    )
+
+
+def merge_matrix(matrix: UserMatrix, block: UserMatrix) -> UserMatrix:
+    """用增量加载的行替换或追加到已有矩阵"""
+    keep = ~np.isin(matrix.ids, block.ids)
+    return UserMatrix(
+        ids=np.concatenate([matrix.ids[keep], block.ids]),
+        source_ids=np.concatenate([matrix.source_ids[keep], block.source_ids]),
+        is_read=np.concatenate([matrix.is_read[keep], block.is_read]),
+        created=np.concatenate([matrix.created[keep], block.created]),
+        tf=sp.vstack([matrix.tf[keep], block.tf], format="csr"),
+        max_id=max(matrix.max_id, block.max_id),
+    )
+
+
+def tfidf_weights(tf: sp.csr_matrix) -> sp.csr_matrix:
+    """次线性词频 × 平滑IDF，按行L2归一化（行间点积即余弦相似度）"""
+    n = tf.shape[0]
+    df = np.bincount(tf.indices, minlength=tf.shape[1])
+    idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+    weights = tf.copy()
+    weights.data = (1 + np.log(weights.data)) * idf[weights.indices]
+    norms = np.sqrt(np.asarray(weights.multiply(weights).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sp.csr_matrix(sp.diags((1 / norms).astype(np.float32)) @ weights)
+
+
+def rank(
+        matrix: UserMatrix,
+        source_categories: Dict[int, Optional[str]],
+        limit: int,
+        now: float,
+        half_life_hours: float,
+        category_weight: float,
+        profile_size: int
+        ) -> List[Tuple[int, float]]:
+    """为未读文章打分并返回得分最高的 (文章ID, 得分)
+
+    得分 = (与用户画像的余弦相似度 + category_weight × 所属内容源分类的已读占比) × 时间衰减；
+    用户画像为最近 profile_size 篇已读文章TF-IDF向量的均值。没有已读文章时只按时间衰减排序。
+    """
+    candidates = np.flatnonzero(~matrix.is_read)
+    k = min(limit, candidates.size)
+    if k == 0:
+        return []
+    if matrix.weights is None:
+        matrix.weights = tfidf_weights(matrix.tf)
+    weights = matrix.weights
+
+    age_hours = np.maximum(now - matrix.created, 0) / 3600
+    scores = np.power(0.5, age_hours / half_life_hours)
+
+    read_rows = np.flatnonzero(matrix.is_read)
+    if read_rows.size:
+        recent = read_rows[np.argsort(matrix.created[read_rows], kind="stable")[-profile_size:]]
+        profile = np.asarray(weights[recent].mean(axis=0)).ravel()
+        profile_norm = np.linalg.norm(profile)
+        similarity = weights @ (profile / profile_norm) if profile_norm else np.zeros(matrix.size)
+
+        # 内容源分类偏好：最近已读文章落在各分类中的占比
+        sources, inverse = np.unique(matrix.source_ids, return_inverse=True)
+        categories = [source_categories.get(int(source_id)) for source_id in sources]
+        category_reads: Dict[str, int] = {}
+        for category, count in zip(categories, np.bincount(inverse[recent], minlength=sources.size)):
+            if category:
+                category_reads[category] = category_reads.get(category, 0) + int(count)
+        affinity = np.array(
+            [category_reads.get(category, 0) / recent.size if category else 0.0 for category in categories]
+        )[inverse]
+        scores = (similarity + category_weight * affinity) * scores
+
+    scores = scores[candidates]
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return [(int(matrix.ids[candidates[i]]), float(scores[i])) for i in top]
+
+
+class Recommender:
+    """推荐服务：按用户缓存词频矩阵（LRU），每次请求增量同步后打分"""
+
+    def __init__(
+            self,
+            n_features: int,
+            half_life_hours: float,
+            category_weight: float,
+            profile_size: int,
+            max_users: int
+            ):
+        self.n_features = n_features
+        self.half_life_hours = half_life_hours
+        self.category_weight = category_weight
+        self.profile_size = profile_size
+        self.max_users = max_users
+        self._matrices: "OrderedDict[int, UserMatrix]" = OrderedDict()
+        self._locks: Dict[int, asyncio.Lock] = {}
+
+    async def recommend(self, db: AsyncSession, user_id: int, limit: int) -> List[Tuple[int, float]]:
+        """返回用户的推荐文章 [(文章ID, 得分)]，按得分降序"""
+        async with self._locks.setdefault(user_id, asyncio.Lock()):
+            matrix = await self._sync(db, user_id)
+
+        source_categories = dict(
+            (await db.execute(
+                select(ContentSource.id, ContentSource.category).where(ContentSource.user_id == user_id)
+            )).all()
+        )
+        start = time.perf_counter()
+        ranked = await asyncio.to_thread(
+            rank, matrix, source_categories, limit, time.time(),
+            self.half_life_hours, self.category_weight, self.profile_size
+        )
+        metrics.observe("recommend.rank_seconds", time.perf_counter() - start)
+        return ranked
+
+    async def _sync(self, db: AsyncSession, user_id: int) -> UserMatrix:
+        """增量同步：只加载ID大于已缓存最大ID或更新时间不早于上次同步的文章；总数对不上（有删除）时全量重建
+
+        同步水位取数据库当前时间而不是已加载行的 updated_at：新插入的文章 updated_at 为空，
+        否则首次标记已读等更新会早于水位被漏掉。updated_at 由数据库的 now() 写入，两者同一时钟
+        """
+        dialect = db.get_bind().dialect.name
+        matrix = self._matrices.get(user_id)
+        synced_at = await db.scalar(select(func.now()))
+        stmt = select(*VECTOR_COLUMNS).where(Article.user_id == user_id)
+        if matrix is not None:
+            stmt = stmt.where(or_(
+                Article.id > matrix.max_id,
+                Article.updated_at >= datetime_param(dialect, matrix.synced_at),
+            ))
+
+        rows = (await db.execute(stmt)).all()
+        total = await db.scalar(select(func.count(Article.id)).where(Article.user_id == user_id)) or 0
+        block = await asyncio.to_thread(build_matrix, rows, self.n_features)
+        metrics.incr("recommend.rows_loaded", len(rows))
+
+        if matrix is None:
+            matrix = block
+        else:
+            if rows:
+                matrix = await asyncio.to_thread(merge_matrix, matrix, block)
+            if matrix.size != total:
+                # 有文章被删除，全量重建
+                metrics.incr("recommend.rebuilds")
+                rows = (await db.execute(select(*VECTOR_COLUMNS).where(Article.user_id == user_id))).all()
+                matrix = await asyncio.to_thread(build_matrix, rows, self.n_features)
+
+        matrix.synced_at = synced_at
+        self._matrices[user_id] = matrix
+        self._matrices.move_to_end(user_id)
+        while len(self._matrices) > self.max_users:
+            self._matrices.popitem(last=False)
+        return matrix
+
+    def invalidate_user(self, user_id: int):
+        self._matrices.pop(user_id, None)
+
+    def clear(self):
+        self._matrices.clear()
+
+    def get_status(self) -> Dict:
+        return {
+            "cached_users": len(self._matrices),
+            "cached_articles": sum(matrix.size for matrix in self._matrices.values()),
+            "rows_loaded": metrics.counter("recommend.rows_loaded"),
+            "rebuilds": metrics.counter("recommend.rebuilds"),
+        }
+
+
+recommender = Recommender(
+    n_features=settings.recommend_hash_features,
+    half_life_hours=settings.recommend_half_life_hours,
+    category_weight=settings.recommend_category_weight,
+    profile_size=settings.recommend_profile_size,
+    max_users=settings.recommend_cache_users,
+)
@@ -1,8 +1,15 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
+from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.core.database import SessionLocal
 from app.models.content_source import ContentSource
-from app.services.fetch_service import FetchService
+from app.services.cadence import learn_cadences
+from app.core.metrics import metrics
+from app.services.fetch_service import FetchService, as_utc, feed_key
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+import heapq
 import logging
 import asyncio
 
@@ -10,71 +17,209 @@ logger = logging.getLogger(__name__)
 
 
 class SchedulerService:
-    """定时任务调度服务"""
+    """定时任务调度服务
+
+    按内容源各自的轮询间隔调度：优先队列按 last_fetch + 间隔 排序，
+    定时检查到期的源并交给有并发上限的工作协程抓取；
+    轮询间隔优先使用从文章发布历史学到的节奏，样本不足时使用 fetch_frequency；
+    连续没有新文章的源按指数退避拉长间隔。
+    订阅同一RSS地址的源（多个用户订阅同一订阅源）在其中任意一个到期时合并抓取，
+    订阅源每轮只下载、解析一次。
+    """
 
     def __init__(self):
         self.scheduler = AsyncIOScheduler()
         self.fetch_service = FetchService()
         self._is_running = False
 
-    async def fetch_all_active_sources(self):
-        """
-        定时任务: 抓取所有活跃的内容源
-        """
-        logger.info("=" * 60)
-        logger.info("开始执行定时抓取任务...")
+        # 到期队列：(到期时间, source_id)，过期条目惰性删除
+        self._queue: List[Tuple[datetime, int]] = []
+        self._due: Dict[int, datetime] = {}
+        self._in_flight: Set[int] = set()
+        self._empty_streak: Dict[int, int] = {}
+        self._base_minutes: Dict[int, float] = {}
+        self._cadence: Dict[int, Dict] = {}
+        self._polls_saved: Dict[int, float] = {}
+        # source_id -> 规范化的RSS地址，以及每个RSS地址的活跃订阅源
+        self._feed_keys: Dict[int, str] = {}
+        self._subscribers: Dict[str, Set[int]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._workers: Optional[asyncio.Semaphore] = None
+        self._last_sync: Optional[datetime] = None
 
-        db = SessionLocal()
-        try:
-            # 查询所有启用的内容源
-            sources = db.query(ContentSource).filter(
-                ContentSource.is_active == True
-            ).all()
-
-            if not sources:
-                logger.info("没有活跃的内容源需要抓取")
-                return
-
-            logger.info(f"发现 {len(sources)} 个活跃源，开始抓取...")
-
-            success_count = 0
-            error_count = 0
-
-            # 逐个抓取
-            for source in sources:
-                try:
-                    logger.info(f"正在抓取: {source.name} ({source.url})")
-
-                    # 调用抓取服务
-                    result = await self.fetch_service.fetch_from_source(
-                        source_id=source.id,
-                        db=db,
-                        use_ai=False  # 默认不使用AI，避免费用过高
-                    )
-
-                    if result:
-                        success_count += 1
-                        logger.info(f"抓取成功: {source.name}")
-                    else:
-                        error_count += 1
-                        logger.warning(f"抓取失败: {source.name}")
+    def _backoff(self, source_id: int) -> int:
+        """退避倍数：连续无新文章次数的2次幂，受上限约束"""
+        streak = self._empty_streak.get(source_id, 0)
+        return min(2 ** streak, settings.scheduler_max_backoff)
 
-                except Exception as e:
-                    error_count += 1
-                    logger.error(f"抓取异常 {source.name}: {str(e)}")
+    def _base_interval(self, source: ContentSource) -> float:
+        """基础间隔（分钟）：学习到的发布节奏，否则为 fetch_frequency"""
+        cadence = self._cadence.get(source.id)  # type: ignore[arg-type]
+        if cadence is not None:
+            return cadence["interval_minutes"]
+        return float(source.fetch_frequency or 60)  # type: ignore[arg-type]
 
-                # 避免请求过快，稍微延迟
-                await asyncio.sleep(2)
+    def _interval(self, source: ContentSource) -> timedelta:
+        return timedelta(minutes=self._base_interval(source) * self._backoff(source.id))  # type: ignore[arg-type]
 
-            logger.info(f"定时抓取任务完成！成功: {success_count}, 失败: {error_count}")
-            logger.info("=" * 60)
+    def _record_saved_polls(self, source: ContentSource, interval: timedelta):
+        """相比按 fetch_frequency 固定轮询，本次排期省下的轮询次数"""
+        frequency = float(source.fetch_frequency or 60)  # type: ignore[arg-type]
+        saved = interval.total_seconds() / 60 / frequency - 1
+        if saved > 0:
+            source_id: int = source.id  # type: ignore[assignment]
+            self._polls_saved[source_id] = self._polls_saved.get(source_id, 0.0) + saved
 
-        except Exception as e:
-            logger.error(f"定时任务执行失败: {str(e)}")
+    def _push(self, source_id: int, due_at: datetime):
+        if self._due.get(source_id) == due_at:
+            return
+        self._due[source_id] = due_at
+        heapq.heappush(self._queue, (due_at, source_id))
+
+    async def _sync_queue(self, force: bool = False):
+        """根据数据库中的活跃内容源同步队列（新增源入队、停用源出队、频率变更重算）"""
+        now = datetime.now(timezone.utc)
+        if not force and self._last_sync and now - self._last_sync < timedelta(seconds=settings.scheduler_sync_seconds):
+            return
+
+        # 同步会话的查询与节奏学习放到线程中执行，避免阻塞事件循环；队列状态只在事件循环中修改
+        sources, self._cadence = await asyncio.to_thread(self._load_active_sources)
+        active_ids = set()
+        self._feed_keys = {}
+        self._subscribers = {}
+        for source in sources:
+            source_id: int = source.id  # type: ignore[assignment]
+            active_ids.add(source_id)
+            key = feed_key(source)
+            if key is not None:
+                self._feed_keys[source_id] = key
+                self._subscribers.setdefault(key, set()).add(source_id)
+            base_minutes = self._base_interval(source)
+            # 已排期且间隔未变的源保持原到期时间（避免失败的源每次同步都立即重试）
+            if source_id in self._in_flight or (
+                    source_id in self._due and self._base_minutes.get(source_id) == base_minutes):
+                continue
+            self._base_minutes[source_id] = base_minutes
+            last_fetch = source.last_fetch
+            due_at = as_utc(last_fetch) + self._interval(source) if last_fetch else now  # type: ignore[arg-type]
+            self._push(source_id, due_at)
+
+        for source_id in list(self._due):
+            if source_id not in active_ids:
+                del self._due[source_id]
+        self._last_sync = now
 
+    def _load_active_sources(self) -> Tuple[List[ContentSource], Dict[int, Dict]]:
+        """查询活跃内容源并学习它们的发布节奏（同步执行，由调用方放到线程中）"""
+        db = SessionLocal()
+        try:
+            sources = db.query(ContentSource).filter(ContentSource.is_active == True).all()
+            return sources, learn_cadences(db, [source.id for source in sources])  # type: ignore[misc]
         finally:
             db.close()
 
+    async def dispatch_due_sources(self):
+        """
+        定时任务: 取出所有到期的内容源，交给工作协程抓取
+        """
+        try:
+            await self._sync_queue()
+        except Exception as e:
+            logger.error(f"同步调度队列失败: {str(e)}")
+
+        now = datetime.now(timezone.utc)
+        dispatched = 0
+        feeds = 0
+        while self._queue and self._queue[0][0] <= now:
+            due_at, source_id = heapq.heappop(self._queue)
+            if self._due.get(source_id) != due_at or source_id in self._in_flight:
+                continue  # 已被重新排期或移除
+            group = self._feed_group(source_id)
+            for member in group:
+                # 同组其他源在队列中的条目随之失效（惰性删除）
+                self._due.pop(member, None)
+                self._in_flight.add(member)
+            task = asyncio.create_task(self._run_sources(group))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            dispatched += len(group)
+            feeds += 1
+
+        if dispatched:
+            logger.info(f"派发 {dispatched} 个到期内容源（合并为 {feeds} 次抓取），队列剩余: {len(self._due)}")
+
+    def _feed_group(self, source_id: int) -> List[int]:
+        """到期源连同订阅同一RSS地址、当前未在抓取中的其他活跃源"""
+        key = self._feed_keys.get(source_id)
+        if key is None:
+            return [source_id]
+        others = sorted(self._subscribers.get(key, set()) - self._in_flight - {source_id})
+        return [source_id, *others]
+
+    async def _run_sources(self, source_ids: List[int]):
+        """工作协程：在并发上限内抓取一组源（同一订阅源只抓取一次）并分别重新排期"""
+        if self._workers is None:
+            self._workers = asyncio.Semaphore(settings.scheduler_max_concurrency)
+
+        async with self._workers:
+            db = SessionLocal()
+            try:
+                results = await self.fetch_service.fetch_sources(source_ids, db)
+                fresh_ids = []
+                for source_id in source_ids:
+                    result = results.get(source_id, {})
+                    new_items = result.get("inserted_count", 0) if result.get("success") else 0
+                    if new_items:
+                        fresh_ids.append(source_id)
+                        self._empty_streak.pop(source_id, None)
+                        logger.info(f"抓取成功: 源{source_id}，新文章 {new_items} 篇")
+                    else:
+                        self._empty_streak[source_id] = self._empty_streak.get(source_id, 0) + 1
+                        logger.info(f"源{source_id}无新文章，退避倍数: {self._backoff(source_id)}")
+
+                # 有新文章时重新学习这些源的发布节奏
+                sources, cadences = await asyncio.to_thread(self._load_sources, db, source_ids, fresh_ids)
+                self._cadence.update(cadences)
+                now = datetime.now(timezone.utc)
+                for source in sources:
+                    if not source.is_active:
+                        continue
+                    source_id: int = source.id  # type: ignore[assignment]
+                    interval = self._interval(source)
+                    self._base_minutes[source_id] = self._base_interval(source)
+                    self._record_saved_polls(source, interval)
+                    self._push(source_id, now + interval)
+
+            except Exception as e:
+                logger.error(f"抓取异常 源{source_ids}: {str(e)}")
+                for source_id in source_ids:
+                    self._empty_streak[source_id] = self._empty_streak.get(source_id, 0) + 1
+            finally:
+                self._in_flight.difference_update(source_ids)
+                await asyncio.to_thread(db.close)
+
+    def _load_sources(
+            self,
+            db: Session,
+            source_ids: List[int],
+            fresh_ids: List[int]
+            ) -> Tuple[List[ContentSource], Dict[int, Dict]]:
+        """查询抓取后的内容源，并重新学习有新文章的源的发布节奏（同步执行，由调用方放到线程中）"""
+        sources = db.query(ContentSource).filter(ContentSource.id.in_(source_ids)).all()
+        return sources, learn_cadences(db, fresh_ids)
+
+    async def fetch_all_active_sources(self):
+        """
+        立即把所有活跃的内容源设为到期并派发（订阅同一RSS地址的源合并为一次抓取）
+        """
+        logger.info("=" * 60)
+        logger.info("开始执行全部抓取任务...")
+        await self._sync_queue(force=True)
+        now = datetime.now(timezone.utc)
+        for source_id in list(self._due):
+            self._push(source_id, now)
+        await self.dispatch_due_sources()
+
     def start(self):
         """启动调度器"""
         if self._is_running:
@@ -82,12 +227,11 @@ class SchedulerService:
             return
 
         try:
-            # 添加定时任务 - 每小时执行一次
             self.scheduler.add_job(
-                self.fetch_all_active_sources,
-                trigger=IntervalTrigger(hours=1),  # 每小时执行
-                id="fetch_rss_sources",
-                name="抓取RSS源",
+                self.dispatch_due_sources,
+                trigger=IntervalTrigger(seconds=settings.scheduler_tick_seconds),
+                id="dispatch_due_sources",
+                name="派发到期内容源",
                 replace_existing=True,
                 max_instances=1,  # 同时只运行一个实例
                 misfire_grace_time=300  # 错过执行时间5分钟内仍然执行
@@ -95,7 +239,7 @@ class SchedulerService:
             self.scheduler.start()
             self._is_running = True
             logger.info("定时任务调度器已启动")
-            logger.info("抓取频率: 每小时一次")
+            logger.info(f"按内容源fetch_frequency调度，检查间隔: {settings.scheduler_tick_seconds}秒")
 
         except Exception as e:
             logger.error(f"启动调度器失败: {str(e)}")
@@ -109,6 +253,8 @@ class SchedulerService:
 
         try:
             self.scheduler.shutdown(wait=True)
+            for task in list(self._tasks):
+                task.cancel()
             self._is_running = False
             logger.info("定时任务调度器已停止")
 
@@ -128,12 +274,38 @@ class SchedulerService:
                     "trigger": str(job.trigger)
                 })
 
+        next_due = sorted(self._due.items(), key=lambda item: item[1])[:20]
         return {
             "running": self._is_running,
             "jobs": jobs,
-            "job_count": len(jobs)
+            "job_count": len(jobs),
+            "queue_depth": len(self._due),
+            "in_flight": len(self._in_flight),
+            "max_concurrency": settings.scheduler_max_concurrency,
+            "next_due": [
+                {
+                    "source_id": source_id,
+                    "due_at": due_at.isoformat(),
+                    "backoff": self._backoff(source_id),
+                    "learned_interval_minutes": self._cadence.get(source_id, {}).get("interval_minutes"),
+                    "predicted_next_update": self._predicted_next(source_id),
+                    "polls_saved": round(self._polls_saved.get(source_id, 0.0), 2)
+                }
+                for source_id, due_at in next_due
+            ],
+            "learned_sources": len(self._cadence),
+            "polls_saved": round(sum(self._polls_saved.values()), 2),
+            "shared_feeds": sum(1 for members in self._subscribers.values() if len(members) > 1),
+            "feeds_fetched": metrics.counter("fetch.feeds_fetched"),
+            "feed_fetches_saved": metrics.counter("fetch.feed_fetches_saved")
         }
 
+    def _predicted_next(self, source_id: int) -> Optional[str]:
+        cadence = self._cadence.get(source_id)
+        if cadence is None:
+            return None
+        return cadence["predicted_next"].isoformat()
+
     def pause_job(self, job_id: str):
         """暂停指定任务"""
         try:
@@ -0,0 +1,90 @@
+"""
+文章全文检索 - PostgreSQL tsvector / SQLite FTS5，其他数据库退回 ILIKE
+"""
+from typing import List, Optional, Tuple
+import html
+import logging
+import re
+
+from sqlalchemy import Float, Integer, Select, func, literal_column, text
+
+from app.models.article import Article
+from app.services.text_prep import html_to_text, search_phrases
+
+logger = logging.getLogger(__name__)
+
+# 摘要片段长度（字符）
+SNIPPET_LENGTH = 120
+
+
+def _can_use_index(phrases: List[List[str]]) -> bool:
+    # 单个汉字不在二元组索引中，只能走 ILIKE
+    return bool(phrases) and not any(
+        len(phrase) == 1 and len(phrase[0]) == 1 and not phrase[0].isascii() for phrase in phrases
+    )
+
+
+def ilike_search(stmt: Select, term: str) -> Select:
+    search_term = f"%{term}%"
+    return stmt.where(
+        (Article.title.ilike(search_term))
+        | (Article.content.ilike(search_term))
+        | (Article.summary.ilike(search_term))
+    )
+
+
+def apply_search(stmt: Select, dialect: str, term: str) -> Tuple[Select, Optional[object]]:
+    """为文章查询加上检索条件，返回 (stmt, 相关度表达式)；相关度越大越相关，ILIKE 时为 None"""
+    phrases = search_phrases(term)
+    if not _can_use_index(phrases) or dialect not in ("postgresql", "sqlite"):
+        return ilike_search(stmt, term), None
+
+    if dialect == "postgresql":
+        # 同一段内的二元组要求相邻（<->），段与段之间为 AND
+        tsquery = func.to_tsquery(
+            'simple', ' & '.join('(' + ' <-> '.join(phrase) + ')' for phrase in phrases)
+        )
+        vector = literal_column("articles.search_vector")
+        return stmt.where(vector.op("@@")(tsquery)), func.ts_rank(vector, tsquery)
+
+    # SQLite FTS5：每段为一个短语查询，bm25 越小越相关，标题权重更高
+    match = ' AND '.join('"' + ' '.join(phrase) + '"' for phrase in phrases)
+    fts = (
+        text(
+            "SELECT rowid AS article_id, bm25(articles_fts, 10.0, 1.0) AS score "
+            "FROM articles_fts WHERE articles_fts MATCH :match"
+        )
+        .bindparams(match=match)
+        .columns(article_id=Integer, score=Float)
+        .subquery("fts")
+    )
+    return stmt.join(fts, Article.id == fts.c.article_id), -fts.c.score
+
+
+def highlight(term: str, *sources: Optional[str], length: int = SNIPPET_LENGTH) -> Optional[str]:
+    """从第一个包含检索词的文本（摘要、正文等）中截取片段，命中处用 <mark> 标记（其余内容已转义）"""
+    needles = [n for n in re.split(r'\s+', term.strip()) if n]
+    if not needles:
+        return None
+
+    for source in sources:
+        plain = html_to_text(source or '')
+        lowered = plain.lower()
+        positions = [lowered.find(n.lower()) for n in needles]
+        hits = [p for p in positions if p >= 0]
+        if not hits:
+            continue
+        start = max(0, min(hits) - length // 4)
+        snippet = plain[start:start + length]
+        escaped = html.escape(snippet)
+        for needle in needles:
+            escaped = re.sub(
+                re.escape(html.escape(needle)),
+                lambda m: f"<mark>{m.group()}</mark>",
+                escaped,
+                flags=re.IGNORECASE
+            )
+        prefix = "…" if start > 0 else ""
+        suffix = "…" if start + length < len(plain) else ""
+        return f"{prefix}{escaped}{suffix}"
+    return None
@@ -0,0 +1,166 @@
+"""
+文本预处理 - 为大模型请求去除HTML、估算token、按预算截断与分块；为全文检索分词
+"""
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+import hashlib
+import heapq
+import json
+import re
+import zlib
+
+from bs4 import BeautifulSoup
+
+_CJK_RE = re.compile(r'[　-〿㐀-䶿一-鿿＀-￯]')
+_SENTENCE_END_RE = re.compile(r'(?<=[。！？.!?\n])')
+# 检索分词：连续的中日韩汉字为一段，其余按字母数字切词
+_HAN = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+_SEARCH_RUN_RE = re.compile(rf'[{_HAN}]+|[^\W_{_HAN}]+')
+
+
+def html_to_text(content: str) -> str:
+    """去除HTML标签并压缩空白；纯文本原样（仅压缩空白）返回"""
+    if not content:
+        return ""
+    if '<' in content and '>' in content:
+        content = BeautifulSoup(content, 'html.parser').get_text(separator=' ', strip=True)
+    return re.sub(r'\s+', ' ', content).strip()
+
+
+def _char_tokens(char: str) -> float:
+    # 中文字符约1个token，其他字符约4个字符1个token
+    return 1.0 if _CJK_RE.match(char) else 0.25
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算token数（不依赖具体分词器）"""
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return int(cjk + (len(text) - cjk) / 4) + 1
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """截断到token预算内，尽量在句子结尾处截断"""
+    if estimate_tokens(text) <= budget:
+        return text
+
+    used = 0.0
+    cut = 0
+    for i, char in enumerate(text):
+        used += _char_tokens(char)
+        if used > budget:
+            break
+        cut = i + 1
+
+    truncated = text[:cut]
+    sentence_end = max(truncated.rfind(mark) for mark in ('。', '！', '？', '. ', '! ', '? '))
+    if sentence_end > cut * 0.7:
+        return truncated[:sentence_end + 1]
+    return truncated
+
+
+def chunk_text(text: str, chunk_tokens: int) -> List[str]:
+    """按句子切分为不超过chunk_tokens的块（超长句子会被硬截断）"""
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+
+    for sentence in _SENTENCE_END_RE.split(text):
+        if not sentence:
+            continue
+        tokens = estimate_tokens(sentence)
+        if tokens > chunk_tokens:
+            if current:
+                chunks.append(''.join(current))
+                current, current_tokens = [], 0
+            while sentence:
+                piece = truncate_to_tokens(sentence, chunk_tokens)
+                if not piece:
+                    piece = sentence[:1]
+                chunks.append(piece)
+                sentence = sentence[len(piece):]
+            continue
+        if current_tokens + tokens > chunk_tokens and current:
+            chunks.append(''.join(current))
+            current, current_tokens = [], 0
+        current.append(sentence)
+        current_tokens += tokens
+
+    if current:
+        chunks.append(''.join(current))
+    return chunks
+
+
+def search_phrases(text: str) -> List[List[str]]:
+    """检索分词：汉字段切为重叠的二元组（单字保留单字），其他词转小写；每段为一个短语"""
+    phrases: List[List[str]] = []
+    for match in _SEARCH_RUN_RE.finditer(text or ''):
+        run = match.group()
+        if _CJK_RE.match(run[0]):
+            phrases.append([run[i:i + 2] for i in range(len(run) - 1)] if len(run) > 1 else [run])
+        else:
+            phrases.append([run.lower()])
+    return phrases
+
+
+def search_tokens(text: str) -> str:
+    """分词结果以空格连接，写入检索列后由数据库按空白切分建索引"""
+    return ' '.join(token for phrase in search_phrases(text) for token in phrase)
+
+
+def article_search_fields(title: str, summary: str, content: str, max_chars: int) -> Dict[str, str]:
+    """文章检索列：标题与（摘要+正文前max_chars字）分别分词"""
+    body = f"{summary or ''} {html_to_text(content or '')}"[:max_chars]
+    return {"search_title": search_tokens(title or ''), "search_body": search_tokens(body)}
+
+
+def article_term_vector(
+        title: str, summary: str, content: str, max_chars: int, n_features: int, max_terms: int
+        ) -> str:
+    """推荐用的哈希词频向量，JSON {"桶序号": 词频}
+
+    分词与检索一致（汉字二元组），词项按 crc32 散列到 n_features 个桶，无需维护词表；
+    标题词计2次，正文取前max_chars字，只保留词频最高的max_terms项
+    """
+    body = f"{summary or ''} {html_to_text(content or '')}"[:max_chars]
+    counts: Dict[int, int] = {}
+    for text, weight in ((title or '', 2), (body, 1)):
+        for phrase in search_phrases(text):
+            for token in phrase:
+                bucket = zlib.crc32(token.encode()) % n_features
+                counts[bucket] = counts.get(bucket, 0) + weight
+    top = heapq.nlargest(max_terms, counts.items(), key=lambda item: item[1])
+    return json.dumps({str(bucket): count for bucket, count in sorted(top)})
+
+
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 4
+SIMHASH_BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+
+
+def simhash(tokens: Iterable[str]) -> int:
+    """64位SimHash（无符号），特征按出现次数加权"""
+    totals = [0] * SIMHASH_BITS
+    for token, weight in Counter(tokens).items():
+        value = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), 'big')
+        for bit in range(SIMHASH_BITS):
+            totals[bit] += weight if value >> bit & 1 else -weight
+    return sum(1 << bit for bit, total in enumerate(totals) if total > 0)
+
+
+def article_simhash_fields(title: str, content: str, max_chars: int, min_tokens: int) -> Dict[str, Optional[int]]:
+    """近似重复检测列：标题与正文前max_chars字的SimHash（按有符号64位存储）及4个16位分段
+
+    分词少于min_tokens的短文本容易误判，不计算（各列为空）
+    """
+    text = f"{title or ''} {html_to_text(content or '')}"[:max_chars]
+    tokens = [token for phrase in search_phrases(text) for token in phrase]
+    if len(tokens) < min_tokens:
+        return {"simhash": None, **{f"simhash_b{i}": None for i in range(SIMHASH_BANDS)}}
+    value = simhash(tokens)
+    mask = (1 << SIMHASH_BAND_BITS) - 1
+    return {
+        "simhash": value - (1 << SIMHASH_BITS) if value >= 1 << (SIMHASH_BITS - 1) else value,
+        **{f"simhash_b{i}": value >> (SIMHASH_BAND_BITS * i) & mask for i in range(SIMHASH_BANDS)},
+    }
@@ -0,0 +1,37 @@
+"""
+URL规范化 - 去除跟踪参数、片段与末尾斜杠，使同一篇文章的不同链接写法得到同一个去重键
+"""
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# 常见的广告/分享跟踪参数（utm_* 另按前缀匹配）
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid",
+    "mc_cid", "mc_eid", "_hsenc", "_hsmi", "spm", "share_source",
+}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize_url(url: str) -> str:
+    """规范化URL：scheme与主机名小写、去掉默认端口、片段、跟踪参数与路径末尾的斜杠，其余查询参数排序
+
+    无法解析的URL原样返回
+    """
+    url = (url or '').strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return url
+
+    netloc = parts.hostname.lower()
+    if port and port != DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{port}"
+    path = parts.path.rstrip('/') or '/'
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ))
+    return urlunsplit((scheme, netloc, path, query, ''))
@@ -0,0 +1,146 @@
+"""
+当前用户缓存 - 用户名到轻量用户身份（id、is_active、is_admin）的TTL缓存
+"""
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional, Tuple
+import json
+import logging
+import threading
+import time
+
+from sqlalchemy import event, inspect
+
+from app.core.config import settings
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """认证后的用户身份，路由只需要 id 与权限标记时不必加载整个 User"""
+    id: int
+    username: str
+    is_active: bool = True
+    is_admin: bool = False
+
+
+class MemoryUserCacheBackend:
+    """进程内缓存（多worker部署时各自独立，失效只作用于当前进程）"""
+
+    def __init__(self, ttl: int, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data: Dict[str, Tuple[float, UserPrincipal]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, username: str) -> Optional[UserPrincipal]:
+        item = self._data.get(username)
+        if item is None or item[0] < time.monotonic():
+            return None
+        return item[1]
+
+    def set(self, principal: UserPrincipal):
+        with self._lock:
+            if len(self._data) >= self.max_entries:
+                now = time.monotonic()
+                self._data = {k: v for k, v in self._data.items() if v[0] > now}
+                if len(self._data) >= self.max_entries:
+                    self._data.clear()
+            self._data[principal.username] = (time.monotonic() + self.ttl, principal)
+
+    def delete(self, username: str):
+        with self._lock:
+            self._data.pop(username, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisUserCacheBackend:
+    """Redis缓存，多worker共享，用户更新时的失效对所有进程生效"""
+
+    prefix = "user_principal:"
+
+    def __init__(self, redis_url: str, ttl: int):
+        import redis
+
+        self.ttl = ttl
+        self._client = redis.Redis.from_url(redis_url, decode_responses=True)
+
+    def get(self, username: str) -> Optional[UserPrincipal]:
+        raw = self._client.get(self.prefix + username)
+        return UserPrincipal(**json.loads(raw)) if raw else None
+
+    def set(self, principal: UserPrincipal):
+        self._client.set(self.prefix + principal.username, json.dumps(asdict(principal)), ex=self.ttl)
+
+    def delete(self, username: str):
+        self._client.delete(self.prefix + username)
+
+    def clear(self):
+        for key in self._client.scan_iter(match=self.prefix + "*", count=500):
+            self._client.delete(key)
+
+
+class UserCache:
+    """缓存读写失败时只记录日志，调用方回退到数据库查询"""
+
+    def __init__(self, backend=None):
+        self.backend = backend
+
+    def get(self, username: str) -> Optional[UserPrincipal]:
+        if self.backend is None:
+            return None
+        try:
+            return self.backend.get(username)
+        except Exception as e:
+            logger.warning(f"读取用户缓存失败: {str(e)}")
+            return None
+
+    def set(self, principal: UserPrincipal):
+        if self.backend is None:
+            return
+        try:
+            self.backend.set(principal)
+        except Exception as e:
+            logger.warning(f"写入用户缓存失败: {str(e)}")
+
+    def invalidate(self, username: str):
+        if self.backend is None:
+            return
+        try:
+            self.backend.delete(username)
+        except Exception as e:
+            logger.warning(f"清除用户缓存失败: {str(e)}")
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+
+def create_user_cache() -> UserCache:
+    """根据配置创建缓存：memory（默认）、redis、none"""
+    backend_name = settings.user_cache_backend
+    if backend_name == "memory":
+        return UserCache(MemoryUserCacheBackend(settings.user_cache_ttl_seconds))
+    if backend_name == "redis":
+        return UserCache(RedisUserCacheBackend(settings.redis_url, settings.user_cache_ttl_seconds))
+    if backend_name != "none":
+        logger.warning(f"未知的用户缓存后端 {backend_name}，已禁用缓存")
+    return UserCache(None)
+
+
+user_cache = create_user_cache()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target):
+    """用户更新或删除后清除缓存（包括改名前的旧用户名）"""
+    usernames = {target.username}
+    usernames.update(inspect(target).attrs.username.history.deleted or ())
+    for username in usernames:
+        if username:
+            user_cache.invalidate(username)
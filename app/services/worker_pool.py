@@ -0,0 +1,86 @@
+"""
+解析线程池 - 把 feedparser / BeautifulSoup 等阻塞的解析工作移出事件循环
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, TypeVar
+import asyncio
+import functools
+import logging
+import threading
+import time
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class WorkerPool:
+    """有界线程池：记录排队、执行中任务数与累计忙碌时间，用于计算利用率"""
+
+    def __init__(self, max_workers: int, name: str = "parse"):
+        self.max_workers = max_workers
+        self.name = name
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-worker")
+        self._started_at = time.monotonic()
+        # 计数在事件循环线程与多个工作线程中更新
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._busy_seconds = 0.0
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """在线程池中执行 fn(*args, **kwargs) 并等待结果"""
+        loop = asyncio.get_running_loop()
+        submitted_at = time.perf_counter()
+        with self._lock:
+            self._submitted += 1
+        return await loop.run_in_executor(
+            self._executor, functools.partial(self._call, fn, submitted_at, *args, **kwargs)
+        )
+
+    def _call(self, fn: Callable[..., T], submitted_at: float, *args, **kwargs) -> T:
+        start = time.perf_counter()
+        metrics.observe(f"{self.name}_pool.queue_wait_seconds", start - submitted_at)
+        with self._lock:
+            self._running += 1
+        failed = False
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._failed += failed
+                self._busy_seconds += elapsed
+            metrics.observe(f"{self.name}_pool.task_seconds", elapsed)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_status(self) -> Dict:
+        """利用率 = 累计忙碌时间 / (运行时长 × 线程数)"""
+        uptime = time.monotonic() - self._started_at
+        with self._lock:
+            submitted, running, completed = self._submitted, self._running, self._completed
+            failed, busy_seconds = self._failed, self._busy_seconds
+        return {
+            "max_workers": self.max_workers,
+            "running": running,
+            "queued": submitted - completed - running,
+            "completed": completed,
+            "failed": failed,
+            "busy_seconds": round(busy_seconds, 3),
+            "utilization": round(busy_seconds / (uptime * self.max_workers), 4) if uptime > 0 else 0.0,
+        }
+
+
+parse_pool = WorkerPool(settings.parse_pool_size)
@@ -0,0 +1,119 @@
+"""
+推荐打分基准：对比逐篇Python循环计算余弦相似度与 NumPy/SciPy 向量化打分的延迟
+
+用法：
+    python -m benchmarks.bench_recommend --articles 100000 --read 200
+
+不访问数据库，直接按配置的哈希维数生成合成词频矩阵。
+"""
+import argparse
+import math
+import statistics
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+from app.core.config import settings
+from app.services.recommender import UserMatrix, rank, tfidf_weights
+
+
+def synthetic_matrix(articles: int, read: int, terms: int, n_features: int, seed: int) -> UserMatrix:
+    rng = np.random.default_rng(seed)
+    # 词项按 Zipf 分布抽取，接近真实语料中少数高频词、大量低频词的情形
+    indices = (rng.zipf(1.3, size=articles * terms) % n_features).astype(np.int32)
+    data = rng.integers(1, 6, size=articles * terms).astype(np.float32)
+    indptr = np.arange(0, articles * terms + 1, terms, dtype=np.int64)
+    tf = sp.csr_matrix((data, indices, indptr), shape=(articles, n_features))
+    tf.sum_duplicates()
+    is_read = np.zeros(articles, dtype=bool)
+    is_read[rng.choice(articles, size=read, replace=False)] = True
+    return UserMatrix(
+        ids=np.arange(1, articles + 1, dtype=np.int64),
+        source_ids=rng.integers(1, 50, size=articles),
+        is_read=is_read,
+        created=time.time() - rng.uniform(0, 30 * 86400, size=articles),
+        tf=tf,
+        max_id=articles,
+    )
+
+
+def rank_loop(matrix: UserMatrix, limit: int, now: float, half_life_hours: float):
+    """对照组：逐篇用字典计算TF-IDF余弦相似度（只含相似度与时间衰减）"""
+    n = matrix.size
+    rows = []
+    df = {}
+    for i in range(n):
+        start, end = matrix.tf.indptr[i], matrix.tf.indptr[i + 1]
+        row = dict(zip(matrix.tf.indices[start:end].tolist(), matrix.tf.data[start:end].tolist()))
+        rows.append(row)
+        for term in row:
+            df[term] = df.get(term, 0) + 1
+    vectors = []
+    for row in rows:
+        vector = {term: (1 + math.log(tf)) * (math.log((1 + n) / (1 + df[term])) + 1) for term, tf in row.items()}
+        norm = math.sqrt(sum(w * w for w in vector.values())) or 1
+        vectors.append({term: w / norm for term, w in vector.items()})
+    profile = {}
+    read_rows = [i for i in range(n) if matrix.is_read[i]]
+    for i in read_rows:
+        for term, w in vectors[i].items():
+            profile[term] = profile.get(term, 0) + w / len(read_rows)
+    norm = math.sqrt(sum(w * w for w in profile.values())) or 1
+    scores = []
+    for i, vector in enumerate(vectors):
+        if matrix.is_read[i]:
+            continue
+        similarity = sum(w * profile.get(term, 0) for term, w in vector.items()) / norm
+        decay = 0.5 ** (max(now - matrix.created[i], 0) / 3600 / half_life_hours)
+        scores.append((similarity * decay, int(matrix.ids[i])))
+    scores.sort(reverse=True)
+    return scores[:limit]
+
+
+def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - begin) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="推荐打分基准")
+    parser.add_argument("--articles", type=int, default=100_000)
+    parser.add_argument("--read", type=int, default=200)
+    parser.add_argument("--terms", type=int, default=settings.recommend_max_terms, help="每篇文章的词项数")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--loop-repeat", type=int, default=1, help="Python循环对照组的重复次数（较慢）")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    matrix = synthetic_matrix(args.articles, args.read, args.terms, settings.recommend_hash_features, args.seed)
+    now = time.time()
+    print(f"{args.articles} 篇文章，已读 {args.read} 篇，每篇 {args.terms} 个词项，非零元 {matrix.tf.nnz}")
+
+    def vectorized_cold():
+        matrix.weights = None
+        rank(matrix, {}, args.limit, now, settings.recommend_half_life_hours,
+             settings.recommend_category_weight, settings.recommend_profile_size)
+
+    def vectorized_warm():
+        rank(matrix, {}, args.limit, now, settings.recommend_half_life_hours,
+             settings.recommend_category_weight, settings.recommend_profile_size)
+
+    matrix.weights = tfidf_weights(matrix.tf)
+    print(f"  {'方式':<28}{'p50(ms)':>10}{'max(ms)':>10}")
+    for name, fn, repeat in (
+            ("Python循环", lambda: rank_loop(matrix, args.limit, now, settings.recommend_half_life_hours), args.loop_repeat),
+            ("向量化（含TF-IDF计算）", vectorized_cold, args.repeat),
+            ("向量化（TF-IDF已缓存）", vectorized_warm, args.repeat),
+    ):
+        p50, worst = timed(fn, repeat)
+        print(f"  {name:<28}{p50:>10.1f}{worst:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
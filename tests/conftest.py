@@ -1,9 +1,14 @@
 import pytest
+from fastapi import status
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.main import app
-from app.core.database import Base, get_db
+from app.core.database import Base, get_async_db, get_db
+from app.services.embedding_index import embedding_index
+from app.services.recommender import recommender
+from app.services.user_cache import user_cache
 
 # 使用SQLite作为测试数据库
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -14,6 +19,10 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 异步路由使用同一个SQLite文件（aiosqlite驱动）
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db")
+TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 
 @pytest.fixture(scope="function")
 def test_db():
@@ -30,7 +39,7 @@ def test_db():
 
 
 @pytest.fixture(scope="function")
-def client(test_db):
+def client(test_db, tmp_path):
     """测试客户端，覆盖数据库依赖"""
     def override_get_db():
         try:
@@ -38,10 +47,22 @@ def client(test_db):
         finally:
             test_db.close()
 
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    user_cache.clear()
+    recommender.clear()
+    # 相关文章索引写到每个测试独立的临时目录
+    embedding_index.base_dir = tmp_path / "embeddings"
     yield TestClient(app)
-    # 清理依赖覆盖
+    # 清理依赖覆盖与用户、推荐缓存（每个测试重建数据库，用户与文章ID会复用）
     app.dependency_overrides.clear()
+    user_cache.clear()
+    recommender.clear()
+    embedding_index.close()
 
 
 @pytest.fixture
@@ -62,7 +83,7 @@ def test_user(client, test_user_data):
 
 
 @pytest.fixture
-def auth_token(client, test_user_data):
+def auth_token(client, test_user, test_user_data):
     """获取认证token"""
     response = client.post("/auth/login", json={
         "username": test_user_data["username"],
@@ -96,3 +117,20 @@ def test_source(client, auth_headers, test_source_data):
     """创建测试内容源"""
     response = client.post("/sources", headers=auth_headers, json=test_source_data)
     return response.json()
+
+
+@pytest.fixture
+def create_article(client, auth_headers, test_source):
+    """按给定字段创建文章"""
+    def _create(title, content="", url=None, **extra):
+        payload = {
+            "title": title,
+            "content": content,
+            "url": url or f"https://example.com/{abs(hash(title))}",
+            "source_id": test_source["id"],
+            **extra,
+        }
+        response = client.post("/articles/", headers=auth_headers, json=payload)
+        assert response.status_code == status.HTTP_200_OK
+        return response.json()
+    return _create
@@ -0,0 +1,191 @@
+"""
+文章管理相关的测试
+"""
+from fastapi import status
+
+from app.models.article import Article
+from app.models.content_source import ContentSource
+
+
+class TestArticleSearch:
+    """测试文章全文检索"""
+
+    def test_search_chinese_phrase(self, client, auth_headers, create_article):
+        """测试: 中文短语检索并返回高亮片段"""
+        hit = create_article("机器学习入门", "<p>本文介绍机器学习的基本概念。</p>")
+        create_article("烹饪笔记", "<p>学习做饭，机器人也不会。</p>")
+
+        response = client.get("/articles/", headers=auth_headers, params={"search": "机器学习"})
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert [a["id"] for a in data] == [hit["id"]]
+        assert "<mark>机器学习</mark>" in data[0]["highlight"]
+
+    def test_search_ranks_title_matches_first(self, client, auth_headers, create_article):
+        """测试: 标题命中排在正文命中之前"""
+        body_hit = create_article("周报", "<p>This week we migrated to Postgres.</p>")
+        title_hit = create_article("Postgres tuning guide", "<p>Indexes and vacuum.</p>")
+
+        response = client.get("/articles/", headers=auth_headers, params={"search": "postgres"})
+
+        assert [a["id"] for a in response.json()] == [title_hit["id"], body_hit["id"]]
+
+    def test_search_single_character(self, client, auth_headers, create_article):
+        """测试: 单个汉字检索退回模糊匹配"""
+        hit = create_article("猫的日常", "<p>今天猫睡了一整天。</p>")
+        create_article("天气", "<p>晴。</p>")
+
+        response = client.get("/articles/", headers=auth_headers, params={"search": "猫"})
+
+        assert [a["id"] for a in response.json()] == [hit["id"]]
+
+    def test_search_after_update(self, client, auth_headers, create_article):
+        """测试: 更新文章后检索结果同步"""
+        article = create_article("草稿", "<p>旧内容</p>")
+        client.put(f"/articles/{article['id']}", headers=auth_headers, json={"content": "<p>向量数据库选型</p>"})
+
+        response = client.get("/articles/", headers=auth_headers, params={"search": "向量数据库"})
+        assert [a["id"] for a in response.json()] == [article["id"]]
+
+        response = client.get("/articles/", headers=auth_headers, params={"search": "旧内容"})
+        assert response.json() == []
+
+
+class TestArticleFilters:
+    """测试文章列表筛选"""
+
+    def test_category_filters_source_category(self, client, auth_headers, create_article):
+        """测试: category 按内容源分类筛选，article_category 按文章分类筛选"""
+        article = create_article("分类筛选")
+
+        response = client.get("/articles/", headers=auth_headers, params={"category": "技术"})
+        assert [a["id"] for a in response.json()] == [article["id"]]
+
+        response = client.get("/articles/", headers=auth_headers, params={"category": "新闻"})
+        assert response.json() == []
+
+        response = client.get("/articles/", headers=auth_headers, params={"article_category": "技术"})
+        assert response.json() == []
+
+
+class TestArticlePagination:
+    """测试文章列表分页"""
+
+    def test_cursor_pagination_walks_all_articles(self, client, auth_headers, create_article):
+        """测试: 游标分页不重复、不遗漏，且按创建倒序"""
+        created = [create_article(f"文章{i}", url=f"https://example.com/page/{i}") for i in range(5)]
+
+        seen = []
+        params = {"limit": 2}
+        while True:
+            response = client.get("/articles/", headers=auth_headers, params=params)
+            assert response.status_code == status.HTTP_200_OK
+            seen.extend(a["id"] for a in response.json())
+            next_cursor = response.headers.get("X-Next-Cursor")
+            if not next_cursor:
+                break
+            params = {"limit": 2, "cursor": next_cursor}
+
+        assert seen == [a["id"] for a in reversed(created)]
+
+    def test_offset_pagination_still_supported(self, client, auth_headers, create_article):
+        """测试: 兼容偏移分页"""
+        created = [create_article(f"文章{i}", url=f"https://example.com/offset/{i}") for i in range(3)]
+
+        response = client.get("/articles/", headers=auth_headers, params={"skip": 1, "limit": 1})
+
+        assert [a["id"] for a in response.json()] == [created[1]["id"]]
+
+    def test_total_count_header(self, client, auth_headers, create_article):
+        """测试: 按需返回总数"""
+        for i in range(3):
+            create_article(f"文章{i}", url=f"https://example.com/total/{i}")
+
+        response = client.get("/articles/", headers=auth_headers, params={"limit": 1, "with_total": True})
+
+        assert response.headers["X-Total-Count"] == "3"
+
+    def test_invalid_cursor(self, client, auth_headers):
+        """测试: 无效游标返回400"""
+        response = client.get("/articles/", headers=auth_headers, params={"cursor": "not-a-cursor"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestRelatedArticles:
+    """测试相关文章"""
+
+    def test_related_articles_ranked_by_similarity(self, client, auth_headers, create_article):
+        """测试: 内容相近的文章排在前面，不包含文章本身"""
+        article = create_article("向量数据库选型指南", "<p>向量数据库与近似最近邻索引的选型。</p>")
+        similar = create_article("向量数据库索引对比", "<p>近似最近邻索引在向量数据库中的对比。</p>")
+        other = create_article("周末烘焙", "<p>戚风蛋糕的打发技巧。</p>")
+
+        response = client.get(f"/articles/{article['id']}/related", headers=auth_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert [a["id"] for a in data] == [similar["id"], other["id"]]
+        assert data[0]["similarity"] > data[1]["similarity"]
+
+    def test_related_articles_backfill_existing_articles(self, client, auth_headers, test_db, test_source, create_article):
+        """测试: 分片由新文章创建后，查询相关文章时仍回填索引之前已入库的文章"""
+        older = Article(
+            title="向量数据库索引对比",
+            content="<p>近似最近邻索引在向量数据库中的对比。</p>",
+            url="https://example.com/before-index",
+            source_id=test_source["id"],
+            user_id=test_db.get(ContentSource, test_source["id"]).user_id,
+        )
+        test_db.add(older)
+        test_db.commit()
+        older_id = older.id
+        article = create_article("向量数据库选型指南", "<p>向量数据库与近似最近邻索引的选型。</p>")
+
+        response = client.get(f"/articles/{article['id']}/related", headers=auth_headers)
+
+        assert [a["id"] for a in response.json()] == [older_id]
+
+    def test_related_articles_exclude_deleted(self, client, auth_headers, create_article):
+        """测试: 删除的文章从相关文章中移除"""
+        article = create_article("Rust 异步运行时", "<p>tokio 调度器原理。</p>")
+        removed = create_article("Rust 异步编程", "<p>tokio 与 async/await。</p>")
+        client.delete(f"/articles/{removed['id']}", headers=auth_headers)
+
+        response = client.get(f"/articles/{article['id']}/related", headers=auth_headers)
+
+        assert response.json() == []
+
+    def test_related_articles_not_found(self, client, auth_headers):
+        """测试: 文章不存在时返回404"""
+        response = client.get("/articles/99999/related", headers=auth_headers)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestNearDuplicates:
+    """测试近似重复检测"""
+
+    STORY = "<p>" + "央行宣布下调存款准备金率零点五个百分点，释放长期资金约一万亿元，以支持实体经济发展。" * 3 + "</p>"
+
+    def test_original_url_is_kept(self, test_db, create_article):
+        """测试: 文章保留原始链接，去除跟踪参数与片段的规范URL只用于去重"""
+        article = create_article("带跟踪参数的链接", url="https://example.com/story/?utm_source=rss&id=7#comments")
+
+        assert article["url"] == "https://example.com/story/?utm_source=rss&id=7#comments"
+        assert test_db.get(Article, article["id"]).canonical_url == "https://example.com/story?id=7"
+
+    def test_near_duplicate_skips_enrichment(self, client, auth_headers, create_article):
+        """测试: 转载的近似重复文章归入最早一篇的簇，不进入AI富化"""
+        original = create_article("央行降准", self.STORY, url="https://news-a.example.com/1")
+        repost = create_article("央行降准（转载）", self.STORY + "<p>来源：新闻A</p>", url="https://news-b.example.com/2")
+        other = create_article("球赛战报", "<p>" + "主队在最后时刻绝杀客队，赢得本赛季的第十场胜利。" * 3 + "</p>")
+
+        assert original["duplicate_of"] is None
+        assert repost["duplicate_of"] == original["id"]
+        assert repost["enrichment_status"] == "duplicate"
+        assert other["duplicate_of"] is None
+
+        response = client.get("/articles/", headers=auth_headers, params={"hide_duplicates": True})
+        assert {a["id"] for a in response.json()} == {original["id"], other["id"]}
@@ -1,8 +1,13 @@
 """
 用户认证相关的测试
 """
+from datetime import timedelta
+
 from fastapi import status
 
+from app.core.security import create_access_token
+from app.models.user import User
+
 
 class TestUserRegistration:
     """测试用户注册功能"""
@@ -129,6 +134,26 @@ class TestUserAuthentication:
 
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
+    def test_get_current_user_really_expired_token(self, client, test_user, test_user_data):
+        """测试: 签名有效但已过期的token返回401"""
+        token = create_access_token(
+            data={"sub": test_user_data["username"]}, expires_delta=timedelta(minutes=-1)
+        )
+        response = client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_cached_user_invalidated_on_update(self, client, test_db, auth_headers, test_user_data):
+        """测试: 用户被禁用后缓存失效，后续请求被拒绝"""
+        assert client.get("/sources", headers=auth_headers).status_code == status.HTTP_200_OK
+
+        user = test_db.query(User).filter(User.username == test_user_data["username"]).first()
+        user.is_active = False
+        test_db.commit()
+
+        response = client.get("/sources", headers=auth_headers)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
 
 # TODO: 添加更多测试用例
 # - 测试密码强度验证
@@ -0,0 +1,86 @@
+"""
+AI富化队列相关的测试（大模型调用为模拟）
+"""
+import asyncio
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from app.models.article import Article
+from app.models.content_source import ContentSource
+from app.models.document import Document
+from app.models.user import User
+from app.services.enrichment_queue import EnrichmentQueue
+
+
+class FakeAI:
+    """模拟 AIService.enrich_article：记录调用次数，返回前让出事件循环"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def enrich_article(self, title, content, max_summary_length=500, max_keywords=5):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return {"summary": f"{title} 的摘要", "keywords": ["向量检索"], "category": {"技术": 0.9}}
+
+
+def test_shared_document_enriched_once(test_db):
+    """测试: 同一共享文档的文章并发富化时只调用一次大模型，全部处理完后移除文档锁"""
+    document = Document(url="https://example.com/a", title="共享文档", content="<p>正文</p>")
+    test_db.add(document)
+    test_db.flush()
+    article_ids = []
+    for n in range(3):
+        user = User(username=f"reader{n}", email=f"reader{n}@example.com", hashed_password="x")
+        test_db.add(user)
+        test_db.flush()
+        source = ContentSource(name=f"订阅{n}", url=f"https://site{n}.example.com/", type="rss", user_id=user.id)
+        test_db.add(source)
+        test_db.flush()
+        article = Article(
+            title="共享文档", content="<p>正文</p>", url="https://example.com/a",
+            source_id=source.id, user_id=user.id, document_id=document.id, enrichment_status="pending",
+        )
+        test_db.add(article)
+        test_db.flush()
+        article_ids.append(article.id)
+    test_db.commit()
+    ai = FakeAI()
+    queue = EnrichmentQueue(session_factory=sessionmaker(bind=test_db.get_bind()), ai_service=ai)
+
+    async def run():
+        now = time.perf_counter()
+        await asyncio.gather(*(queue._process((article_id, now)) for article_id in article_ids))
+
+    asyncio.run(run())
+
+    assert ai.calls == 1
+    assert not queue._document_locks and not queue._document_refs
+    test_db.expire_all()
+    assert {(a.enrichment_status, a.summary) for a in test_db.query(Article)} == {("done", "共享文档 的摘要")}
+
+
+def test_document_lock_kept_while_awaited():
+    """测试: 释放文档锁时仍有等待者则保留该锁，之后到达的同文档文章继续排队"""
+    queue = EnrichmentQueue(ai_service=FakeAI())
+    events = []
+
+    async def hold(name):
+        async with queue._document_lock(1):
+            events.append(f"{name}+")
+            await asyncio.sleep(0.01)
+            events.append(f"{name}-")
+
+    async def run():
+        first = asyncio.create_task(hold("a"))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(hold("b"))
+        await first
+        third = asyncio.create_task(hold("c"))
+        await asyncio.gather(second, third)
+
+    asyncio.run(run())
+
+    assert events == ["a+", "a-", "b+", "b-", "c+", "c-"]
+    assert not queue._document_locks and not queue._document_refs
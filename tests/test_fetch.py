@@ -0,0 +1,263 @@
+"""
+RSS抓取入库相关的测试（订阅源与网页抓取均为模拟）
+"""
+from datetime import datetime, timedelta, timezone
+import asyncio
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.models.article import Article
+from app.models.content_source import ContentSource
+from app.models.document import Document
+from app.models.user import User
+from app.services import fetch_service as fetch_service_module
+from app.services import scheduler as scheduler_module
+from app.services.embedding_index import embedding_index
+from app.services.enrichment_queue import enrichment_queue
+from app.services.fetch_service import CrawlLimiter, FetchService
+from app.services.scheduler import SchedulerService
+
+FEED_URL = "https://feeds.example.com/tech.xml"
+
+
+class FakeFeed:
+    """模拟 RSSCrawler.fetch_feed：记录每次请求携带的校验信息，校验信息匹配时返回 not_modified"""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.calls = []
+
+    async def __call__(self, rss_url, etag=None, last_modified=None, content_hash=None):
+        self.calls.append({"rss_url": rss_url, "etag": etag})
+        result = {"status": "ok", "articles": [], "etag": "v1", "last_modified": None, "content_hash": "h1"}
+        if etag == "v1":
+            result["status"] = "not_modified"
+        else:
+            result["articles"] = [dict(entry) for entry in self.entries]
+        return result
+
+
+class FakeCrawler:
+    """模拟 ModernWebCrawler.crawl_webpage：failing 中的URL抓取失败"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+
+    async def __call__(self, url, fetch_config=None):
+        self.calls.append(url)
+        if url in self.failing:
+            return None
+        return {"title": f"全文 {url}", "content": f"<p>{url} 的完整正文</p>", "images": []}
+
+
+def entry(path, **fields):
+    return {"title": f"条目 {path}", "url": f"https://blog.example.com/{path}", "summary": f"{path} 的摘录", **fields}
+
+
+@pytest.fixture
+def fetch_env(test_db, tmp_path, monkeypatch):
+    """隔离抓取流程的进程级状态：并发限制、富化队列与相关文章索引"""
+    monkeypatch.setattr(fetch_service_module, "crawl_limiter", CrawlLimiter(8, 2))
+    enqueued = []
+
+    async def enqueue(article_ids):
+        enqueued.extend(article_ids)
+
+    monkeypatch.setattr(enrichment_queue, "enqueue", enqueue)
+    embedding_index.base_dir = tmp_path / "embeddings"
+    yield enqueued
+    embedding_index.close()
+
+
+@pytest.fixture
+def make_source(test_db):
+    """为新用户创建订阅 rss_url 的内容源"""
+    counter = iter(range(1, 1000))
+
+    def _make(rss_url=FEED_URL, user=None, **fields):
+        n = next(counter)
+        if user is None:
+            user = User(username=f"reader{n}", email=f"reader{n}@example.com", hashed_password="x")
+            test_db.add(user)
+            test_db.flush()
+        source = ContentSource(
+            name=f"订阅{n}", url=f"https://site{n}.example.com/", type="rss", rss_url=rss_url,
+            is_active=True, user_id=user.id, **fields
+        )
+        test_db.add(source)
+        test_db.commit()
+        return source
+    return _make
+
+
+def make_service(feed, crawler) -> FetchService:
+    service = FetchService()
+    service.rss_crawler.fetch_feed = feed
+    service.web_crawler.crawl_webpage = crawler
+    return service
+
+
+def user_articles(db, source):
+    return {article.url: article for article in db.query(Article).filter(Article.user_id == source.user_id)}
+
+
+class TestSharedDocuments:
+    """测试抓取内容跨用户共享"""
+
+    def test_document_reused_by_other_user(self, test_db, fetch_env, make_source):
+        """测试: 其他用户订阅的条目复用已抓取的共享文档，不再抓取网页"""
+        crawler = FakeCrawler()
+        service = make_service(FakeFeed([entry("a"), entry("b")]), crawler)
+        first, second = make_source(), make_source()
+
+        asyncio.run(service.fetch_source(first.id, test_db))
+        result = asyncio.run(service.fetch_source(second.id, test_db))
+
+        assert sorted(crawler.calls) == ["https://blog.example.com/a", "https://blog.example.com/b"]
+        assert result["success"] and result["shared_count"] == 2
+        mine, theirs = user_articles(test_db, first), user_articles(test_db, second)
+        for url, article in theirs.items():
+            assert article.document_id == mine[url].document_id is not None
+            assert article.content == mine[url].content == f"<p>{url} 的完整正文</p>"
+
+    def test_failed_crawl_not_shared(self, test_db, fetch_env, make_source):
+        """测试: 网页抓取失败时回退的RSS摘录不写入共享文档，其他用户订阅时重新抓取"""
+        feed = FakeFeed([entry("a"), entry("b")])
+        first, second = make_source(), make_source()
+
+        asyncio.run(make_service(feed, FakeCrawler(failing={"https://blog.example.com/a"})).fetch_source(first.id, test_db))
+
+        assert test_db.query(Document.url).all() == [("https://blog.example.com/b",)]
+        assert user_articles(test_db, first)["https://blog.example.com/a"].document_id is None
+
+        crawler = FakeCrawler()
+        result = asyncio.run(make_service(feed, crawler).fetch_source(second.id, test_db))
+
+        assert crawler.calls == ["https://blog.example.com/a"]
+        assert result["shared_count"] == 1
+        theirs = user_articles(test_db, second)
+        assert theirs["https://blog.example.com/a"].content == "<p>https://blog.example.com/a 的完整正文</p>"
+
+
+    def test_document_without_crawl_time_is_recrawled(self, test_db, fetch_env, make_source):
+        """测试: 没有抓取时间的共享文档（迁移时由历史文章回填）不直接复用，先重新抓取"""
+        test_db.execute(Document.__table__.insert().values(
+            url="https://blog.example.com/a", title="旧文档", content="<p>a 的摘录</p>", content_hash="x", crawled_at=None
+        ))
+        test_db.commit()
+        crawler = FakeCrawler()
+        source = make_source()
+
+        result = asyncio.run(make_service(FakeFeed([entry("a")]), crawler).fetch_source(source.id, test_db))
+
+        assert crawler.calls == ["https://blog.example.com/a"]
+        assert result["shared_count"] == 0
+        document = test_db.query(Document).one()
+        test_db.refresh(document)
+        assert document.crawled_at is not None
+        assert user_articles(test_db, source)["https://blog.example.com/a"].content == "<p>https://blog.example.com/a 的完整正文</p>"
+
+    def test_original_link_used_for_crawl_and_display(self, test_db, fetch_env, make_source):
+        """测试: 抓取与入库使用条目的原始链接，规范URL相同的链接视为同一篇文章"""
+        crawler = FakeCrawler()
+        first = make_source()
+        asyncio.run(make_service(FakeFeed([entry("a?utm_source=rss")]), crawler).fetch_source(first.id, test_db))
+        same_user = make_source(rss_url="https://feeds.example.com/other.xml", user=test_db.get(User, first.user_id))
+        skipped = asyncio.run(make_service(FakeFeed([entry("a/")]), crawler).fetch_source(same_user.id, test_db))
+        other_user = make_source(rss_url="https://feeds.example.com/other.xml")
+        shared = asyncio.run(make_service(FakeFeed([entry("a#comments")]), crawler).fetch_source(other_user.id, test_db))
+
+        assert crawler.calls == ["https://blog.example.com/a?utm_source=rss"]
+        assert skipped["skipped_count"] == 1
+        assert shared["shared_count"] == 1
+        assert list(user_articles(test_db, first)) == ["https://blog.example.com/a?utm_source=rss"]
+        assert list(user_articles(test_db, other_user)) == ["https://blog.example.com/a#comments"]
+        assert test_db.query(Document.url).all() == [("https://blog.example.com/a",)]
+
+
+class TestFeedFanOut:
+    """测试同一订阅源的多个内容源合并抓取"""
+
+    def test_feed_fetched_once_for_all_subscribers(self, test_db, fetch_env, make_source):
+        """测试: 规范化后相同的RSS地址只下载一次，条目分发给每个订阅的用户"""
+        feed, crawler = FakeFeed([entry("a"), entry("b")]), FakeCrawler()
+        first = make_source()
+        second = make_source(rss_url=FEED_URL + "?utm_source=app")
+        other = make_source(rss_url="https://feeds.example.com/other.xml")
+
+        results = asyncio.run(make_service(feed, crawler).fetch_sources([first.id, second.id, other.id], test_db))
+
+        assert len(feed.calls) == 2
+        assert [call["rss_url"] for call in feed.calls].count("https://feeds.example.com/other.xml") == 1
+        # 另一个订阅源中的相同条目复用共享文档
+        assert sorted(crawler.calls) == ["https://blog.example.com/a", "https://blog.example.com/b"]
+        for source in (first, second, other):
+            assert results[source.id]["success"]
+            assert results[source.id]["inserted_count"] == 2
+            assert sorted(user_articles(test_db, source)) == ["https://blog.example.com/a", "https://blog.example.com/b"]
+        assert len(fetch_env) == 6
+
+    def test_per_source_counts(self, test_db, fetch_env, make_source):
+        """测试: 同一次抓取中各内容源分别统计新增与更新"""
+        first = make_source()
+        asyncio.run(make_service(FakeFeed([entry("a")]), FakeCrawler()).fetch_source(first.id, test_db))
+        second = make_source()
+        later = datetime.now(timezone.utc) + timedelta(hours=1)
+        feed = FakeFeed([entry("a", updated_at=later), entry("b")])
+
+        results = asyncio.run(make_service(feed, FakeCrawler()).fetch_sources([first.id, second.id], test_db))
+
+        assert (results[first.id]["inserted_count"], results[first.id]["updated_count"]) == (1, 1)
+        assert (results[second.id]["inserted_count"], results[second.id]["updated_count"]) == (2, 0)
+        assert test_db.query(Article).count() == 4
+
+    def test_same_user_two_sources_one_row(self, test_db, fetch_env, make_source):
+        """测试: 同一用户的两个内容源订阅同一订阅源时每篇文章只写一行"""
+        first = make_source()
+        second = make_source(user=test_db.get(User, first.user_id))
+
+        results = asyncio.run(make_service(FakeFeed([entry("a"), entry("b")]), FakeCrawler()).fetch_sources(
+            [first.id, second.id], test_db
+        ))
+
+        assert test_db.query(Article).filter(Article.user_id == first.user_id).count() == 2
+        assert results[first.id]["inserted_count"] + results[second.id]["inserted_count"] == 2
+        assert len(fetch_env) == 2
+
+    def test_new_subscriber_forces_unconditional_get(self, test_db, fetch_env, make_source):
+        """测试: 校验信息一致时发送条件请求，新加入的订阅者没有校验信息时完整拉取"""
+        feed = FakeFeed([entry("a")])
+        service = make_service(feed, FakeCrawler())
+        first, second = make_source(), make_source()
+
+        asyncio.run(service.fetch_sources([first.id, second.id], test_db))
+        results = asyncio.run(service.fetch_sources([first.id, second.id], test_db))
+        assert all(result["not_modified"] for result in results.values())
+
+        third = make_source()
+        results = asyncio.run(service.fetch_sources([first.id, second.id, third.id], test_db))
+
+        assert [call["etag"] for call in feed.calls] == [None, "v1", None]
+        assert results[first.id]["skipped_count"] == 1
+        assert results[third.id]["inserted_count"] == 1
+
+    def test_scheduler_dispatches_subscribers_together(self, test_db, fetch_env, make_source, monkeypatch):
+        """测试: 调度器把同一订阅源的到期内容源合并为一次抓取，抓取后分别重新排期"""
+        monkeypatch.setattr(scheduler_module, "SessionLocal", sessionmaker(bind=test_db.get_bind()))
+        feed = FakeFeed([entry("a")])
+        scheduler = SchedulerService()
+        scheduler.fetch_service = make_service(feed, FakeCrawler())
+        sources = [make_source(), make_source(), make_source(rss_url="https://feeds.example.com/other.xml")]
+
+        async def run():
+            await scheduler.fetch_all_active_sources()
+            await asyncio.gather(*scheduler._tasks)
+
+        asyncio.run(run())
+
+        assert sorted(call["rss_url"] for call in feed.calls) == ["https://feeds.example.com/other.xml", FEED_URL]
+        assert not scheduler._in_flight
+        assert set(scheduler._due) == {source.id for source in sources}
+        assert scheduler.get_status()["shared_feeds"] == 1
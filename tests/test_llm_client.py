@@ -0,0 +1,96 @@
+import asyncio
+
+import httpx
+import pytest
+from openai import AsyncOpenAI
+
+from app.services.ai_cache import AICache
+from app.services.ai_service import AIService
+from app.services.llm_client import CircuitBreaker, LLMClient, LLMUnavailableError
+
+
+def completion(content: str) -> dict:
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "fake-model",
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20},
+    }
+
+
+def make_client(responses, **kwargs) -> LLMClient:
+    """用MockTransport模拟OpenAI兼容服务，按顺序返回给定响应"""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return responses[min(len(calls), len(responses)) - 1]
+
+    openai_client = AsyncOpenAI(
+        api_key="test",
+        base_url="http://fake-llm/v1",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    kwargs.setdefault("backoff_base", 0.01)
+    client = LLMClient(openai_client, "fake-model", **kwargs)
+    client.calls = calls
+    return client
+
+
+def test_retry_after_is_honored():
+    """429时按Retry-After等待后重试成功"""
+    client = make_client([
+        httpx.Response(429, headers={"retry-after": "0.05"}, json={"error": {"message": "slow down"}}),
+        httpx.Response(200, json=completion("ok")),
+    ])
+
+    response = asyncio.run(client.chat([{"role": "user", "content": "hi"}]))
+
+    assert response.choices[0].message.content == "ok"
+    assert len(client.calls) == 2
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_retries_exhausted_raises_unavailable():
+    """持续5xx时重试耗尽后抛出LLMUnavailableError"""
+    client = make_client([httpx.Response(503, json={"error": {"message": "down"}})], max_retries=2)
+
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(client.chat([{"role": "user", "content": "hi"}]))
+    assert len(client.calls) == 3
+
+
+def test_breaker_opens_and_short_circuits():
+    """熔断打开后不再请求服务"""
+    client = make_client(
+        [httpx.Response(500, json={"error": {"message": "boom"}})],
+        max_retries=0,
+        breaker=CircuitBreaker(failure_threshold=2, reset_seconds=60),
+    )
+
+    async def run():
+        for _ in range(3):
+            with pytest.raises(LLMUnavailableError):
+                await client.chat([{"role": "user", "content": "hi"}])
+
+    asyncio.run(run())
+    assert len(client.calls) == 2
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+
+def test_ai_service_falls_back_when_degraded():
+    """服务不可用时AIService使用降级摘要"""
+    client = make_client([httpx.Response(503, json={"error": {"message": "down"}})], max_retries=0)
+    service = AIService(cache=AICache(None), llm=client)
+
+    summary = asyncio.run(service.generate_summary("第一句话。第二句话。", max_length=50))
+
+    assert summary
+    assert len(client.calls) == 1
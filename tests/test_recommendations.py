@@ -0,0 +1,40 @@
+"""
+内容推荐相关的测试
+"""
+from fastapi import status
+
+
+class TestRecommendations:
+    """测试推荐接口"""
+
+    def test_recommends_similar_unread_articles(self, client, auth_headers, create_article):
+        """测试: 与已读文章内容相近的未读文章排在前面，已读文章不返回"""
+        read = create_article("向量数据库选型", "<p>向量检索与近似最近邻索引的对比。</p>")
+        similar = create_article("向量检索实践", "<p>近似最近邻索引在向量数据库中的应用。</p>")
+        other = create_article("家常菜谱", "<p>红烧肉的做法与火候。</p>")
+        client.patch(f"/articles/{read['id']}/toggle-read", headers=auth_headers)
+
+        response = client.get("/recommendations/", headers=auth_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert [a["id"] for a in data] == [similar["id"], other["id"]]
+        assert data[0]["score"] > data[1]["score"]
+
+    def test_picks_up_new_and_updated_articles(self, client, auth_headers, create_article):
+        """测试: 缓存建立后新增、已读和删除的文章会同步到推荐结果"""
+        first = create_article("第一篇", "<p>内容一</p>")
+        assert [a["id"] for a in client.get("/recommendations/", headers=auth_headers).json()] == [first["id"]]
+
+        second = create_article("第二篇", "<p>内容二</p>")
+        client.patch(f"/articles/{first['id']}/toggle-read", headers=auth_headers)
+        assert [a["id"] for a in client.get("/recommendations/", headers=auth_headers).json()] == [second["id"]]
+
+        client.delete(f"/articles/{second['id']}", headers=auth_headers)
+        assert client.get("/recommendations/", headers=auth_headers).json() == []
+
+    def test_recommendations_without_auth(self, client):
+        """测试: 未认证获取推荐应失败"""
+        response = client.get("/recommendations/")
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
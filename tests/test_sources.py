@@ -104,6 +104,26 @@ class TestSourceRetrieval:
 
         assert response.status_code == status.HTTP_404_NOT_FOUND
 
+    def test_same_source_for_different_users(self, client, auth_headers, test_source, test_source_data):
+        """测试: 不同用户可以订阅同一个源，同一用户重复添加失败"""
+        client.post("/auth/register", json={
+            "username": "otheruser",
+            "email": "other@example.com",
+            "password": "pass123"
+        })
+        login_response = client.post("/auth/login", json={
+            "username": "otheruser",
+            "password": "pass123"
+        })
+        other_headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+        response = client.post("/sources", headers=other_headers, json=test_source_data)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["id"] != test_source["id"]
+
+        response = client.post("/sources", headers=auth_headers, json=test_source_data)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
 
 class TestSourceUpdate:
     """测试内容源更新功能"""